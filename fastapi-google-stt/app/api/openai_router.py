@@ -1,15 +1,21 @@
 from typing import Union
-from fastapi import APIRouter, Header, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.database import get_db
+from fastapi import APIRouter, Header
 
-from app.services.openai_service import get_streaming_message_from_openai
-from app.services.log_script_service import logger
+from app.services.openai_service import (
+    get_streaming_message_from_openai,
+    get_streaming_multi_translation,
+    get_translation_stats,
+)
+from app.services.translation_cache import translation_cache
 from app.services.rag_summarizer import summarize_meeting
 from app.services.rag_pipeline import answer_question
-from app.services.openai_vector_store import add_text
+from app.services.transcript_writer import script_write_behind, get_transcript_writer_stats
+from app.services.single_flight import get_single_flight_stats
+from app.services.openai_vector_store import embedding_ingestor, vector_store_registry
+from app.services.embedding_cache import embedding_cache
 from fastapi.responses import StreamingResponse
 from app.dto.message_request import MessageRequest
+from app.dto.multi_message_request import MultiMessageRequest
 from app.dto.ask_request import AskRequest
 
 
@@ -22,7 +28,6 @@ router = APIRouter()
 async def get_generated_messages_with_header(
     data: MessageRequest,
     x_script_id: Union[str, None] = Header(default=None),
-    db: AsyncSession = Depends(get_db)
 ):
     """
     ## Open AI에 번역 요청
@@ -30,16 +35,43 @@ async def get_generated_messages_with_header(
     - data: MessageRequest
         - lang: 언어 코드 (e.g., "en-US", "ko-KR")
         - message: 번역할 메시지
+    - 원문은 응답과 별도로 스크립트 파일과 벡터 DB에 저장됩니다 (write-behind).
+    - 헤더가 없으면 400, 스크립트가 없으면 404 (스트리밍 시작 전)
     """
 
-    await logger(db, data, x_script_id)
-    await add_text(data.message, x_script_id)
+    await script_write_behind.enqueue(x_script_id, data.message)
     
     return StreamingResponse(
         get_streaming_message_from_openai(data), 
         media_type="text/event-stream"
     )
 
+@router.post(
+    "/translate/multi",
+    summary="Translate a message into several languages using OpenAI (streaming)",
+)
+async def get_multi_translated_messages(
+    data: MultiMessageRequest,
+    x_script_id: Union[str, None] = Header(default=None),
+):
+    """
+    ## Open AI에 여러 언어 번역 요청
+    - Header: "x-script-id" 포함되어야 함!
+    - data: MultiMessageRequest
+        - langs: 언어 코드 목록 (e.g., ["en-US", "ja-JP"])
+        - message: 번역할 메시지
+    - 원문 저장과 임베딩은 언어 수와 관계없이 한 번만, 응답과 별도로 수행합니다 (write-behind).
+    - 응답: 언어별 `data: {"lang", "text"}` 토큰, `data: {"lang", "done"}`, 마지막 `data: [DONE]`
+    - 헤더가 없으면 400, 스크립트가 없으면 404 (스트리밍 시작 전)
+    """
+
+    await script_write_behind.enqueue(x_script_id, data.message)
+
+    return StreamingResponse(
+        get_streaming_multi_translation(data),
+        media_type="text/event-stream"
+    )
+
 @router.post(
     "/ask",
     summary="Generate messages using OpenAI (streaming)",
@@ -78,4 +110,28 @@ async def summarize_script(
     return StreamingResponse(
         summarize_meeting(script_id=script_id), 
         media_type="text/event-stream"
-    )
\ No newline at end of file
+    )
+
+@router.get("/metrics")
+async def get_openai_metrics():
+    """
+    ## OpenAI 런타임 지표 조회
+    - translation_cache: 번역 캐시 적중률(메모리/디스크), 항목 수, 교체/만료 횟수
+    - translation: 요청별 / 묶음 번역의 LLM 호출 수와 토큰 사용량
+    - write_behind: 번역 원문 저장 큐 길이, 지연시간, 재시도/실패 횟수
+    - transcript_writer: STT 최종 결과 저장 줄 수, 재시도 횟수, 재시도 후에도 실패해 버린 줄 수
+    - single_flight: 번역 / 요약 / 질의응답별 전체 요청 수 대비 실제 LLM 호출 수와 합쳐진 요청 수
+    - embedding_ingest: 임베딩 배치 크기 분포와 초당 임베딩 수
+    - embedding_cache: 임베딩 캐시 적중률(메모리/디스크), 항목 수
+    - vector_store: 열린 컬렉션과 임베딩 API 호출 수
+    """
+    return {
+        "translation_cache": translation_cache.get_stats(),
+        "translation": get_translation_stats(),
+        "write_behind": script_write_behind.get_stats(),
+        "transcript_writer": get_transcript_writer_stats(),
+        "single_flight": get_single_flight_stats(),
+        "embedding_ingest": embedding_ingestor.get_stats(),
+        "embedding_cache": embedding_cache.get_stats(),
+        "vector_store": vector_store_registry.get_stats(),
+    }
@@ -1,8 +1,13 @@
 import logging
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, UploadFile, File
+import os
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, UploadFile, File, Form
 from fastapi.responses import StreamingResponse
-from app.services.google_stt_service import transcribe_streaming_v2
+from app.services.stt_upload_service import save_upload, decode_to_pcm, transcribe_pcm_file
 from app.services.websocket_stt_service import handle_websocket_connection
+from app.services.speech_client_pool import speech_client_pool
+from app.services.audio_ingest_buffer import get_ingest_stats
+from app.services.voice_activity_detector import get_vad_stats
+from app.services.stt_session_registry import get_resume_stats
 
 router = APIRouter()
 
@@ -21,4 +26,43 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         logger.info("WebSocket 연결이 종료되었습니다")
     except Exception as e:
-        logger.error(f"WebSocket 오류: {str(e)}")
\ No newline at end of file
+        logger.error(f"WebSocket 오류: {str(e)}")
+
+@router.post("/upload")
+async def transcribe_upload(
+    file: UploadFile = File(...),
+    lang: str = Form("ko-KR"),
+):
+    """
+    ## 긴 오디오 파일 STT (SSE)
+    - 업로드를 디스크에 저장한 뒤 무음 구간에서 나눠 병렬로 인식합니다.
+    - 결과는 구간이 끝나는 대로 시간 순서에 맞춰 `data: {"segment", "start", "end", "text", "confidence"}`로 전달되고,
+      마지막에 `data: [DONE]`을 보냅니다.
+    - 16kHz 모노 WAV와 raw PCM(.pcm)은 바로 읽고, 그 외 형식은 ffmpeg로 변환합니다.
+    """
+    upload_path = await save_upload(file)
+    try:
+        pcm_path = await decode_to_pcm(upload_path)
+    except Exception:
+        os.remove(upload_path)
+        raise
+    return StreamingResponse(
+        transcribe_pcm_file(pcm_path, lang, cleanup_paths=(upload_path,)),
+        media_type="text/event-stream",
+    )
+
+@router.get("/metrics")
+async def get_stt_metrics():
+    """
+    ## STT 런타임 지표 조회
+    - speech_client_pool: 채널 생성/재사용/재연결 횟수 및 채널 상태
+    - audio_ingest: 전역 오디오 버퍼 사용량 및 세션별 큐 깊이/바이트
+    - vad: 수신 대비 STT 전송 오디오 바이트 비율
+    - resume: 재연결을 기다리는 세션 수
+    """
+    return {
+        "speech_client_pool": speech_client_pool.get_stats(),
+        "audio_ingest": get_ingest_stats(),
+        "vad": get_vad_stats(),
+        "resume": get_resume_stats(),
+    }
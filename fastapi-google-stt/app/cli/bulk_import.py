@@ -0,0 +1,242 @@
+"""
+회의 녹음 폴더 일괄 STT 및 스크립트 / 벡터 DB 등록
+
+디렉토리를 재귀적으로 돌며 녹음 파일마다 다음을 수행합니다.
+1. 16kHz 모노 LINEAR16으로 변환 (.pcm/.raw는 그대로, 16kHz 모노 .wav는 직접, 그 외는 ffmpeg)
+2. 무음 구간에서 나눠 병렬 인식 (/stt/upload와 같은 방식)
+3. Script 행과 스크립트 파일 생성
+4. 최종 결과를 BULK_IMPORT_EMBED_BATCH 줄씩 묶어 meeting_transcripts 컬렉션에 임베딩
+
+--files개의 녹음을 동시에 처리하며, 각 녹음은 --segment-workers개의 구간을 동시에 인식합니다.
+진행 상황은 체크포인트 파일(JSON Lines)에 기록하므로 중단된 뒤 같은 명령을 다시 실행하면
+완료된 파일은 건너뛰고, 처리 중이던 파일과 실패한 파일은 같은 script_id로 다시 처리합니다.
+마지막에 처리 속도를 오디오 시간 / 실제 시간(audio-hours per wall-clock hour)으로 출력합니다.
+
+사용 예:
+    python -m app.cli.bulk_import /data/recordings --user-id 1 --lang ko-KR --files 4
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from dotenv import load_dotenv
+from app.db.database import AsyncSessionLocal
+from app.db.reset_database import reset_database
+from app.db.entity.script import Script
+from app.db.repository.script_repository import find_script_by_id, create_script
+from app.services.log_script_service import PATH as SCRIPT_PATH, generate_base64_uuid
+from app.services.openai_vector_store import init_vectordb, add_texts
+from app.services.stt_upload_service import (
+    AUDIO_BYTES_PER_SECOND,
+    STT_UPLOAD_WORKERS,
+    decode_to_pcm,
+    recognize_segments,
+)
+
+load_dotenv()
+
+# 임베딩 요청 한 번에 보내는 줄 수
+BULK_IMPORT_EMBED_BATCH = int(os.getenv("BULK_IMPORT_EMBED_BATCH", "100"))
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".m4a", ".ogg", ".opus", ".webm", ".pcm", ".raw")
+# Script.name 컬럼 길이
+SCRIPT_NAME_LENGTH = 30
+
+STATUS_STARTED = "started"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+logger = logging.getLogger("bulk_import")
+
+
+class ImportCheckpoint:
+    """
+    파일별 처리 상태를 JSON Lines로 기록하는 체크포인트
+
+    한 줄에 {"path", "size", "mtime", "status", "script_id", ...} 하나를 추가만 하며,
+    같은 파일의 마지막 줄이 현재 상태입니다. 크기나 수정 시각이 바뀐 파일은 새 파일로 처리합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 기록 도중 중단된 마지막 줄
+                    self.entries[entry["path"]] = entry
+        self._file = open(path, "a", encoding="utf-8")
+
+    def get(self, path: str, stat: os.stat_result) -> dict | None:
+        entry = self.entries.get(path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+            return None
+        return entry
+
+    def record(self, path: str, stat: os.stat_result, status: str, **fields) -> dict:
+        entry = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime, "status": status, **fields}
+        self.entries[path] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return entry
+
+    def close(self):
+        self._file.close()
+
+
+def find_recordings(directory: str) -> list:
+    """디렉토리 아래의 녹음 파일 경로 목록 (정렬)"""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def write_transcript(file_path: str, lines: list):
+    """스크립트 파일을 새로 작성 (재처리 시 이전 내용을 덮어씀)"""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+async def ensure_script(script_id: str, user_id: int, name: str) -> Script:
+    """script_id의 Script 행을 조회하고 없으면 생성 (재처리 시 같은 행을 재사용)"""
+    async with AsyncSessionLocal() as db:
+        script = await find_script_by_id(db, script_id)
+        if script is None:
+            script = Script(
+                id=script_id,
+                user_id=user_id,
+                name=name[:SCRIPT_NAME_LENGTH],
+                file_path=SCRIPT_PATH + "/" + script_id + ".txt",
+            )
+            await create_script(db, script)
+        return script
+
+
+async def embed_transcript(script_id: str, lines: list, replace: bool):
+    """스크립트 내용을 묶음 단위로 임베딩 (replace면 이전 시도에서 들어간 문서를 먼저 삭제)"""
+    if replace:
+        await asyncio.to_thread(init_vectordb(0).delete, where={"script_id": script_id})
+    for start in range(0, len(lines), BULK_IMPORT_EMBED_BATCH):
+        await add_texts(lines[start:start + BULK_IMPORT_EMBED_BATCH], script_id)
+
+
+async def import_recording(path: str, args, checkpoint: ImportCheckpoint) -> dict:
+    """녹음 하나를 처리하고 체크포인트에 기록된 항목을 반환"""
+    stat = os.stat(path)
+    entry = checkpoint.get(path, stat)
+    if entry is not None and entry["status"] == STATUS_DONE:
+        return {**entry, "skipped": True}
+
+    # 처리 중 중단되었거나 실패한 파일은 같은 script_id로 다시 처리
+    resumed = entry is not None
+    script_id = entry["script_id"] if resumed else generate_base64_uuid()
+    checkpoint.record(path, stat, STATUS_STARTED, script_id=script_id)
+    started_at = time.monotonic()
+
+    pcm_path = None
+    try:
+        pcm_path = await decode_to_pcm(path)
+        audio_seconds = os.path.getsize(pcm_path) / AUDIO_BYTES_PER_SECOND
+
+        lines = []
+        failed_segments = 0
+        async for index, results in recognize_segments(pcm_path, args.lang, args.segment_workers):
+            if isinstance(results, Exception):
+                failed_segments += 1
+                continue
+            lines.extend(result["text"] for result in results)
+        if failed_segments:
+            raise RuntimeError(f"{failed_segments}개 구간 인식 실패")
+
+        name = os.path.splitext(os.path.basename(path))[0]
+        script = await ensure_script(script_id, args.user_id, name)
+        await asyncio.to_thread(write_transcript, script.file_path, lines)
+        await embed_transcript(script_id, lines, replace=resumed)
+    except Exception as e:
+        logger.error(f"처리 실패 {path}: {str(e)}")
+        return checkpoint.record(path, stat, STATUS_FAILED, script_id=script_id, error=str(e))
+    finally:
+        if pcm_path is not None and pcm_path != path and os.path.exists(pcm_path):
+            os.remove(pcm_path)
+
+    elapsed = time.monotonic() - started_at
+    logger.info(
+        f"완료 {path}: {len(lines)}줄, 오디오 {audio_seconds / 60:.1f}분, "
+        f"{elapsed:.1f}초 (x{audio_seconds / max(elapsed, 1e-6):.1f})"
+    )
+    return checkpoint.record(
+        path, stat, STATUS_DONE,
+        script_id=script_id,
+        lines=len(lines),
+        audio_seconds=round(audio_seconds, 2),
+        elapsed_seconds=round(elapsed, 2),
+    )
+
+
+async def bulk_import(args) -> dict:
+    """--files개의 녹음을 동시에 처리하고 요약을 반환"""
+    await reset_database(force_reset=False)
+
+    paths = find_recordings(args.directory)
+    checkpoint = ImportCheckpoint(args.checkpoint or os.path.join(args.directory, ".bulk_import_checkpoint.jsonl"))
+    pending = asyncio.Queue()
+    for path in paths:
+        pending.put_nowait(path)
+
+    entries = []
+    started_at = time.monotonic()
+
+    async def worker():
+        while not pending.empty():
+            path = pending.get_nowait()
+            entries.append(await import_recording(path, args, checkpoint))
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, args.files))))
+    finally:
+        checkpoint.close()
+
+    elapsed = time.monotonic() - started_at
+    processed = [e for e in entries if e["status"] == STATUS_DONE and not e.get("skipped")]
+    audio_seconds = sum(e["audio_seconds"] for e in processed)
+    return {
+        "recordings": len(paths),
+        "imported": len(processed),
+        "skipped": sum(1 for e in entries if e.get("skipped")),
+        "failed": [e["path"] for e in entries if e["status"] == STATUS_FAILED],
+        "audio_hours": round(audio_seconds / 3600, 3),
+        "wall_clock_hours": round(elapsed / 3600, 3),
+        # 실제 1시간 동안 처리한 오디오 시간
+        "audio_hours_per_hour": round(audio_seconds / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="회의 녹음 폴더 일괄 STT 및 스크립트 / 벡터 DB 등록")
+    parser.add_argument("directory", help="녹음 파일 디렉토리 (하위 폴더 포함)")
+    parser.add_argument("--user-id", type=int, required=True, help="생성할 Script의 user_id")
+    parser.add_argument("--lang", default="ko-KR", help="인식 언어 코드")
+    parser.add_argument("--files", type=int, default=2, help="동시에 처리할 녹음 수")
+    parser.add_argument("--segment-workers", type=int, default=STT_UPLOAD_WORKERS, help="녹음별 동시 인식 구간 수")
+    parser.add_argument("--checkpoint", help="체크포인트 파일 경로 (기본: <directory>/.bulk_import_checkpoint.jsonl)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    summary = asyncio.run(bulk_import(args))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+from pydantic import BaseModel, ConfigDict, Field
+
+class MultiMessageRequest(BaseModel):
+    langs: list[str] = Field(min_length=1)
+    message: str
+
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -4,6 +4,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.api import stt_router, openai_router, user_router, script_router, receipt_router
 from app.db.reset_database import reset_database
+from app.services.speech_client_pool import speech_client_pool
+from app.services.stt_backend import STT_BACKEND
+from app.services.transcript_writer import close_transcript_writers, script_write_behind
+from app.services.stt_session_registry import close_detached_sessions
+from app.services.translation_cache import translation_cache
+from app.services.openai_vector_store import vector_store_registry, embedding_ingestor
+from app.services.embedding_cache import embedding_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,8 +38,24 @@ app.mount("/static", StaticFiles(directory="app/static", html=True), name="stati
 
 @app.on_event("startup")
 async def on_startup():
-    """애플리케이션 시작 시 데이터베이스 초기화"""
+    """애플리케이션 시작 시 데이터베이스 및 STT 클라이언트 풀 초기화"""
     await reset_database(force_reset=False)
+    await vector_store_registry.start()
+    await script_write_behind.start()
+    if STT_BACKEND == "google":
+        await speech_client_pool.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """애플리케이션 종료 시 공유 리소스 정리"""
+    await close_detached_sessions()
+    await close_transcript_writers()
+    await script_write_behind.close()
+    await speech_client_pool.close()
+    translation_cache.close()
+    await embedding_ingestor.close()
+    vector_store_registry.close()
+    embedding_cache.close()
 
 app.include_router(stt_router.router, prefix="/stt", tags=["Google STT"])
 app.include_router(openai_router.router, prefix="/openai", tags=["OpenAI"])
@@ -0,0 +1,161 @@
+# audio_decoder.py - 브라우저 코덱(Opus/WebM, Opus/Ogg) 오디오를 LINEAR16으로 실시간 디코딩
+import os
+import asyncio
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "start" 메시지의 format 값
+AUDIO_FORMAT_LINEAR16 = "linear16"    # 16kHz 모노 LINEAR16 (기본, 디코딩 없음)
+AUDIO_FORMAT_WEBM_OPUS = "webm_opus"  # MediaRecorder 기본 형식 (audio/webm;codecs=opus)
+AUDIO_FORMAT_OGG_OPUS = "ogg_opus"    # audio/ogg;codecs=opus
+AUDIO_FORMATS = (AUDIO_FORMAT_LINEAR16, AUDIO_FORMAT_WEBM_OPUS, AUDIO_FORMAT_OGG_OPUS)
+
+# ffmpeg 입력 컨테이너 (webm은 matroska 디먹서로 읽음)
+_CONTAINERS = {
+    AUDIO_FORMAT_WEBM_OPUS: "matroska",
+    AUDIO_FORMAT_OGG_OPUS: "ogg",
+}
+
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+# 디코딩 결과를 읽는 단위 (16kHz LINEAR16 기준 100ms)
+AUDIO_DECODER_READ_BYTES = int(os.getenv("AUDIO_DECODER_READ_BYTES", "3200"))
+# 디코더 파이프 버퍼 한도 - 넘으면 feed()가 대기해 소켓 수신도 함께 멈춤
+AUDIO_DECODER_PIPE_LIMIT = int(os.getenv("AUDIO_DECODER_PIPE_LIMIT", str(64 * 1024)))
+# 오류 메시지용으로 보관하는 ffmpeg stderr 마지막 부분 크기 (바이트)
+AUDIO_DECODER_STDERR_TAIL_BYTES = int(os.getenv("AUDIO_DECODER_STDERR_TAIL_BYTES", "4096"))
+
+
+class AudioDecodeError(Exception):
+    """디코더를 시작할 수 없거나 디코딩 중 프로세스가 종료되었을 때 발생"""
+
+
+class StreamingAudioDecoder:
+    """
+    압축 오디오 프레임을 ffmpeg 파이프로 디코딩해 sink로 넘기는 디코더
+
+    파일 전체를 모으지 않고 받은 프레임을 바로 ffmpeg stdin에 쓰고,
+    stdout의 16kHz 모노 LINEAR16을 AUDIO_DECODER_READ_BYTES 단위로 sink에 전달합니다.
+    sink(수신 버퍼)가 가득 차면 stdout 읽기가 멈추고, 파이프가 차면 feed()도 대기하므로
+    디코딩 단계의 메모리는 파이프 버퍼 크기로 제한됩니다.
+    """
+
+    def __init__(self, audio_format: str, sink):
+        if audio_format not in _CONTAINERS:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+        self.audio_format = audio_format
+        self.sink = sink
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._process = None
+        self._reader = None
+        self._stderr_reader = None
+        self._stderr_tail = b""
+
+    async def start(self):
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                FFMPEG_PATH,
+                "-hide_banner", "-loglevel", "error",
+                "-fflags", "nobuffer", "-flags", "low_delay",
+                "-f", _CONTAINERS[self.audio_format], "-i", "pipe:0",
+                "-f", "s16le", "-ac", "1", "-ar", "16000", "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=AUDIO_DECODER_PIPE_LIMIT,
+            )
+        except OSError as e:
+            raise AudioDecodeError(f"ffmpeg 실행 실패 ({FFMPEG_PATH}): {str(e)}")
+        self._process.stdin.transport.set_write_buffer_limits(high=AUDIO_DECODER_PIPE_LIMIT)
+        self._reader = asyncio.create_task(self._read())
+        # stderr를 계속 비워야 ffmpeg가 경고를 많이 쓸 때 파이프가 차서 멈추지 않음
+        self._stderr_reader = asyncio.create_task(self._drain_stderr())
+
+    async def _read(self):
+        pending = b""
+        while True:
+            data = await self._process.stdout.read(AUDIO_DECODER_READ_BYTES)
+            if not data:
+                break
+            pending += data
+            # 샘플(2바이트) 경계를 맞춰 전달
+            size = len(pending) - len(pending) % 2
+            if size:
+                chunk, pending = pending[:size], pending[size:]
+                self.bytes_out += len(chunk)
+                await self.sink(chunk)
+
+    async def _drain_stderr(self):
+        """stderr를 끝까지 읽고 마지막 AUDIO_DECODER_STDERR_TAIL_BYTES만 보관"""
+        while True:
+            data = await self._process.stderr.read(AUDIO_DECODER_STDERR_TAIL_BYTES)
+            if not data:
+                break
+            self._stderr_tail = (self._stderr_tail + data)[-AUDIO_DECODER_STDERR_TAIL_BYTES:]
+
+    async def feed(self, chunk: bytes):
+        """압축 오디오 프레임 입력 (파이프가 가득 차면 대기)"""
+        if self._reader.done():
+            self._reader.result()  # sink에서 발생한 예외(수신 버퍼 초과 등) 전달
+            raise AudioDecodeError(await self._error_message())
+        self.bytes_in += len(chunk)
+        try:
+            self._process.stdin.write(chunk)
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            raise AudioDecodeError(await self._error_message())
+
+    async def close(self):
+        """입력 종료 - 남은 오디오를 모두 디코딩해 sink로 넘긴 뒤 반환"""
+        if self._process is None:
+            return
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+        try:
+            await self._reader
+        finally:
+            await self._process.wait()
+            await asyncio.gather(self._stderr_reader, return_exceptions=True)
+        if self._process.returncode:
+            logging.warning(f"오디오 디코더 종료 코드 {self._process.returncode}: {await self._error_message()}")
+
+    async def cancel(self):
+        """디코더 즉시 종료 (세션 취소 시)"""
+        if self._process is None:
+            return
+        tasks = [task for task in (self._reader, self._stderr_reader) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+
+    async def _error_message(self) -> str:
+        # 프로세스가 종료되었다면 남은 stderr가 곧 모두 읽히므로 잠시 기다림
+        if self._stderr_reader is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._stderr_reader), timeout=1)
+            except (asyncio.TimeoutError, Exception):
+                pass
+        return self._stderr_tail.decode(errors="replace").strip() or "오디오 디코더가 종료되었습니다"
+
+    def get_stats(self) -> dict:
+        return {
+            "format": self.audio_format,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+async def open_audio_decoder(audio_format: str, sink):
+    """
+    format에 맞는 디코더를 시작하는 함수 (LINEAR16이면 디코딩이 필요 없으므로 None)
+    """
+    if audio_format == AUDIO_FORMAT_LINEAR16:
+        return None
+    decoder = StreamingAudioDecoder(audio_format, sink)
+    await decoder.start()
+    return decoder
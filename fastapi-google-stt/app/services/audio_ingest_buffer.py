@@ -0,0 +1,197 @@
+# audio_ingest_buffer.py - 세션별 오디오 수신 버퍼 (바이트 예산 + 백프레셔)
+import os
+import time
+import asyncio
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 과부하 정책
+POLICY_BLOCK = "block"              # 소켓 수신을 멈추고 공간이 생길 때까지 대기
+POLICY_DROP_OLDEST = "drop_oldest"  # 가장 오래된 청크를 버림
+POLICY_FAIL = "fail"                # 세션을 실패 처리
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_FAIL)
+
+# 16kHz LINEAR16 기준 1초 = 32000 바이트
+AUDIO_BUFFER_MAX_BYTES = int(os.getenv("AUDIO_BUFFER_MAX_BYTES", str(32000 * 10)))
+AUDIO_BUFFER_MAX_CHUNKS = int(os.getenv("AUDIO_BUFFER_MAX_CHUNKS", "200"))
+AUDIO_BUFFER_POLICY = os.getenv("AUDIO_BUFFER_POLICY", POLICY_BLOCK)
+AUDIO_BUFFER_GLOBAL_MAX_BYTES = int(os.getenv("AUDIO_BUFFER_GLOBAL_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# 모든 세션이 공유하는 메모리 사용량
+_global_bytes = 0
+_global_space = asyncio.Event()
+_buffers = {}
+
+
+class AudioBufferOverflowError(Exception):
+    """fail 정책에서 버퍼 한도를 넘었을 때 발생"""
+
+
+class AudioIngestBuffer:
+    """
+    WebSocket 수신부와 STT 스트림 사이의 제한된 오디오 버퍼
+
+    세션 한도(청크 수, 바이트)와 전역 바이트 한도를 모두 지키며,
+    한도를 넘으면 설정된 정책(block / drop_oldest / fail)에 따라 처리합니다.
+    get()은 close() 이후 남은 청크를 모두 꺼내면 None을 반환합니다.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        max_bytes: int = AUDIO_BUFFER_MAX_BYTES,
+        max_chunks: int = AUDIO_BUFFER_MAX_CHUNKS,
+        policy: str = AUDIO_BUFFER_POLICY,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audio buffer policy: {policy}")
+
+        self.session_id = session_id
+        self.max_bytes = max_bytes
+        self.max_chunks = max_chunks
+        self.policy = policy
+
+        self._chunks = deque()
+        self._enqueued_at = deque()  # 청크별 수신 시각 (time.monotonic)
+        self._bytes = 0
+        self._closed = False
+        self._released = False
+        self._data_event = asyncio.Event()
+        self._space_event = asyncio.Event()
+
+        self.peak_bytes = 0
+        self.received_chunks = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.blocked_count = 0
+        self.last_wait = 0.0  # 마지막으로 꺼낸 청크가 버퍼에서 기다린 시간 (초)
+
+        _buffers[session_id] = self
+
+    def _has_room(self, size: int) -> bool:
+        # 비어 있는 버퍼는 한도보다 큰 청크도 하나는 받음
+        if not self._chunks:
+            return _global_bytes + size <= AUDIO_BUFFER_GLOBAL_MAX_BYTES or _global_bytes == 0
+        return (
+            len(self._chunks) < self.max_chunks
+            and self._bytes + size <= self.max_bytes
+            and _global_bytes + size <= AUDIO_BUFFER_GLOBAL_MAX_BYTES
+        )
+
+    def _locally_full(self, size: int) -> bool:
+        return bool(self._chunks) and (
+            len(self._chunks) >= self.max_chunks or self._bytes + size > self.max_bytes
+        )
+
+    def _pop(self) -> bytes:
+        global _global_bytes
+        chunk = self._chunks.popleft()
+        self.last_wait = time.monotonic() - self._enqueued_at.popleft()
+        self._bytes -= len(chunk)
+        _global_bytes -= len(chunk)
+        self._space_event.set()
+        _global_space.set()
+        return chunk
+
+    def _drop(self, size: int):
+        self.dropped_chunks += 1
+        self.dropped_bytes += size
+
+    async def put(self, chunk: bytes):
+        """
+        청크를 버퍼에 추가하는 함수
+        block 정책에서는 공간이 생길 때까지 대기하므로 소켓 수신도 함께 멈춥니다.
+        """
+        global _global_bytes
+        if self._closed:
+            return
+
+        size = len(chunk)
+        received_at = time.monotonic()
+        self.received_chunks += 1
+
+        while not self._has_room(size):
+            if self.policy == POLICY_FAIL:
+                self._drop(size)
+                raise AudioBufferOverflowError(
+                    f"audio buffer overflow: {self._bytes} bytes queued, "
+                    f"{_global_bytes} bytes across all sessions"
+                )
+
+            if self.policy == POLICY_DROP_OLDEST:
+                if not self._chunks:
+                    # 전역 한도 초과로 버릴 청크가 없으면 새 청크를 버림
+                    self._drop(size)
+                    return
+                self._drop(len(self._pop()))
+                continue
+
+            self.blocked_count += 1
+            if self._locally_full(size):
+                self._space_event.clear()
+                await self._space_event.wait()
+            else:
+                _global_space.clear()
+                await _global_space.wait()
+
+            if self._closed:
+                return
+
+        self._chunks.append(chunk)
+        self._enqueued_at.append(received_at)
+        self._bytes += size
+        _global_bytes += size
+        self.peak_bytes = max(self.peak_bytes, self._bytes)
+        self._data_event.set()
+
+    async def get(self):
+        """
+        청크를 하나 꺼내는 함수 (종료 후 버퍼가 비면 None)
+        꺼낸 청크가 수신 후 기다린 시간은 last_wait에 기록됩니다.
+        """
+        while not self._chunks:
+            if self._closed:
+                return None
+            self._data_event.clear()
+            await self._data_event.wait()
+        return self._pop()
+
+    def close(self):
+        """입력 종료 - 남은 청크를 다 꺼낸 뒤 get()이 None을 반환"""
+        self._closed = True
+        self._data_event.set()
+        self._space_event.set()
+
+    def release(self):
+        """버퍼를 비우고 전역 사용량과 지표 목록에서 제거 (세션 정리 시 호출)"""
+        if self._released:
+            return
+        self.close()
+        while self._chunks:
+            self._pop()
+        self._released = True
+        _buffers.pop(self.session_id, None)
+
+    def get_stats(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "policy": self.policy,
+            "queue_depth": len(self._chunks),
+            "queued_bytes": self._bytes,
+            "peak_bytes": self.peak_bytes,
+            "received_chunks": self.received_chunks,
+            "dropped_chunks": self.dropped_chunks,
+            "dropped_bytes": self.dropped_bytes,
+            "blocked_count": self.blocked_count,
+        }
+
+
+def get_ingest_stats() -> dict:
+    """전체 세션의 버퍼 사용량 지표를 반환하는 함수"""
+    return {
+        "global_bytes": _global_bytes,
+        "global_max_bytes": AUDIO_BUFFER_GLOBAL_MAX_BYTES,
+        "sessions": [buffer.get_stats() for buffer in _buffers.values()],
+    }
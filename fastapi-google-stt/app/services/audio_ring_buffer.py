@@ -0,0 +1,34 @@
+# audio_ring_buffer.py - 최근 오디오를 보관하는 고정 크기 링 버퍼
+from collections import deque
+
+
+class AudioRingBuffer:
+    """
+    최근 max_bytes 만큼의 오디오만 보관하는 버퍼
+    스트림 교체 시 새 스트림에 다시 보낼 직전 오디오(overlap)를 보관합니다.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._chunks = deque()
+        self._bytes = 0
+
+    def append(self, chunk: bytes):
+        self._chunks.append(chunk)
+        self._bytes += len(chunk)
+
+        # 가장 오래된 청크부터 밀어냄 (마지막 청크는 잘라서 보관)
+        while self._bytes > self.max_bytes and self._chunks:
+            oldest = self._chunks[0]
+            excess = self._bytes - self.max_bytes
+            if len(oldest) <= excess:
+                self._chunks.popleft()
+                self._bytes -= len(oldest)
+            else:
+                self._chunks[0] = oldest[excess:]
+                self._bytes -= excess
+
+    def tail(self, nbytes: int) -> bytes:
+        """최근 nbytes 만큼의 오디오를 반환"""
+        data = b"".join(self._chunks)
+        return data[-nbytes:] if nbytes > 0 else b""
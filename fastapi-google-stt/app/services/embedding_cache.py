@@ -0,0 +1,248 @@
+# embedding_cache.py - 텍스트 내용 기준 임베딩 캐시 (메모리 LRU + 로컬 SQLite)
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+from app.services.translation_cache import normalize_text
+
+load_dotenv()
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+# 메모리 캐시 항목 수 (LRU)
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "5000"))
+# 디스크 캐시 경로 (비우면 메모리 캐시만 사용) / 항목 수 (오래 사용하지 않은 것부터 삭제)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+EMBEDDING_CACHE_DISK_ENTRIES = int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", "200000"))
+# 벡터 저장 형식 ("float16"은 "float32"의 절반 크기)
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
+
+# 디스크 항목 수가 한도를 넘으면 한도의 이 비율만큼 한 번에 정리
+_DISK_EVICT_FRACTION = 0.05
+# SQLite IN 절 하나에 넣는 키 수
+_SQL_BATCH = 500
+
+logger = logging.getLogger(__name__)
+
+
+def make_embedding_key(model: str, text: str) -> str:
+    """모델과 정규화한 텍스트로 만든 캐시 키"""
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCacheStore:
+    """
+    키 -> 벡터 저장소
+
+    메모리(LRU)에서 먼저 찾고, 없으면 SQLite에서 한 번에 찾아 메모리로 올립니다.
+    벡터는 EMBEDDING_CACHE_DTYPE의 바이트열(BLOB)로 저장하며, 임베딩 호출이 스레드에서
+    실행되므로 메모리 캐시와 SQLite 연결은 잠금 하나로 보호합니다.
+    """
+
+    def __init__(
+        self,
+        path: str = EMBEDDING_CACHE_PATH,
+        memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES,
+        disk_entries: int = EMBEDDING_CACHE_DISK_ENTRIES,
+        dtype: str = EMBEDDING_CACHE_DTYPE,
+    ):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.dtype = np.dtype(dtype)
+
+        self._memory = OrderedDict()  # key -> np.ndarray
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_count = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+    def _connect(self):
+        if self._db is None and self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, dtype TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache (last_used)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        return self._db
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def get_many(self, keys: list) -> dict:
+        """찾은 키의 벡터(float 목록)만 반환"""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(key)
+                    continue
+                self._memory.move_to_end(key)
+                found[key] = vector
+            self.memory_hits += len(found)
+
+            db = self._connect() if missing else None
+            if db is not None:
+                try:
+                    now = time.time()
+                    for start in range(0, len(missing), _SQL_BATCH):
+                        chunk = missing[start:start + _SQL_BATCH]
+                        placeholders = ",".join("?" * len(chunk))
+                        rows = db.execute(
+                            f"SELECT key, vector, dtype FROM embedding_cache WHERE key IN ({placeholders})", chunk
+                        ).fetchall()
+                        for key, blob, dtype in rows:
+                            vector = np.frombuffer(blob, dtype=dtype)
+                            found[key] = vector
+                            self._remember(key, vector)
+                        if rows:
+                            db.execute(
+                                f"UPDATE embedding_cache SET last_used = ? WHERE key IN ({placeholders})", [now, *chunk]
+                            )
+                            self.disk_hits += len(rows)
+                    db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"임베딩 캐시 조회 오류: {str(e)}")
+
+            self.misses += len(set(keys)) - len(found)
+        return {key: vector.astype(np.float32).tolist() for key, vector in found.items()}
+
+    def put_many(self, vectors: dict) -> dict:
+        """
+        키 -> 벡터(float 목록) 저장
+        저장 형식으로 변환한 벡터를 반환하므로 캐시 적중 / 미스와 관계없이 같은 값을 사용할 수 있습니다.
+        """
+        if not vectors:
+            return {}
+        with self._lock:
+            compact = {key: np.asarray(vector, dtype=self.dtype) for key, vector in vectors.items()}
+            for key, vector in compact.items():
+                self._remember(key, vector)
+            self.stores += len(compact)
+
+            db = self._connect()
+            if db is not None:
+                self._store_on_disk(db, compact)
+        return {key: vector.astype(np.float32).tolist() for key, vector in compact.items()}
+
+    def _store_on_disk(self, db, compact: dict):
+        """디스크 캐시에 저장하고 한도를 넘으면 오래 사용하지 않은 항목 정리 (잠금 안에서 호출)"""
+        try:
+            now = time.time()
+            cursor = db.executemany(
+                "INSERT OR IGNORE INTO embedding_cache (key, vector, dtype, last_used) VALUES (?, ?, ?, ?)",
+                [(key, vector.tobytes(), self.dtype.name, now) for key, vector in compact.items()],
+            )
+            self._disk_count += cursor.rowcount
+            if self._disk_count > self.disk_entries:
+                count = self._disk_count - self.disk_entries + int(self.disk_entries * _DISK_EVICT_FRACTION)
+                cursor = db.execute(
+                    "DELETE FROM embedding_cache WHERE key IN ("
+                    "SELECT key FROM embedding_cache ORDER BY last_used ASC LIMIT ?)",
+                    (count,),
+                )
+                self._disk_count -= cursor.rowcount
+                self.disk_evictions += cursor.rowcount
+            db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"임베딩 캐시 저장 오류: {str(e)}")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": EMBEDDING_CACHE_ENABLED,
+            "dtype": self.dtype.name,
+            "memory_entries": len(self._memory),
+            "memory_capacity": self.memory_entries,
+            "disk_entries": self._disk_count,
+            "disk_capacity": self.disk_entries if self.path else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 함수를 감싸 같은 텍스트는 다시 호출하지 않는 임베딩
+
+    문서 임베딩(추가)과 질의 임베딩(검색) 모두 (모델, 정규화한 텍스트) 키로 캐시를 먼저 찾고,
+    캐시에 없는 텍스트만 중복을 제거해 한 번에 원래 임베딩 함수로 요청합니다.
+    키와 값이 어긋나지 않도록 원래 임베딩 함수에도 정규화한 텍스트를 보내고,
+    캐시 미스에도 저장 형식(EMBEDDING_CACHE_DTYPE)으로 변환한 벡터를 반환합니다.
+    OpenAI 임베딩은 같은 텍스트의 문서 / 질의 벡터가 같으므로 두 경우 모두 같은 키를 사용합니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, store: EmbeddingCacheStore):
+        self.embeddings = embeddings
+        self.model = model
+        self.store = store
+        self.api_calls = 0
+        self.embedded_texts = 0
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [make_embedding_key(self.model, text) for text in texts]
+        found = self.store.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = normalize_text(text)
+        if missing:
+            self.api_calls += 1
+            self.embedded_texts += len(missing)
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            found.update(self.store.put_many(dict(zip(missing.keys(), vectors))))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list:
+        key = make_embedding_key(self.model, text)
+        found = self.store.get_many([key])
+        if key in found:
+            return found[key]
+        self.api_calls += 1
+        self.embedded_texts += 1
+        vector = self.embeddings.embed_query(normalize_text(text))
+        return self.store.put_many({key: vector})[key]
+
+    def get_stats(self) -> dict:
+        return {
+            "model": self.model,
+            "api_calls": self.api_calls,
+            "embedded_texts": self.embedded_texts,
+        }
+
+
+# 애플리케이션 전체에서 공유하는 임베딩 캐시
+embedding_cache = EmbeddingCacheStore()
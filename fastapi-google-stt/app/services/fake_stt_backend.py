@@ -0,0 +1,111 @@
+# fake_stt_backend.py - 자격 증명 없이 사용하는 결정적(deterministic) 가짜 STT 백엔드
+import os
+import random
+import asyncio
+from dotenv import load_dotenv
+from app.services.stt_backend import SttBackend, ENCODING_LINEAR16
+
+load_dotenv()
+
+FAKE_STT_LATENCY_MS = float(os.getenv("FAKE_STT_LATENCY_MS", "150"))
+FAKE_STT_JITTER_MS = float(os.getenv("FAKE_STT_JITTER_MS", "50"))
+FAKE_STT_SEED = int(os.getenv("FAKE_STT_SEED", "0"))
+FAKE_STT_WORDS_PER_SECOND = float(os.getenv("FAKE_STT_WORDS_PER_SECOND", "2.5"))
+FAKE_STT_WORDS_PER_UTTERANCE = int(os.getenv("FAKE_STT_WORDS_PER_UTTERANCE", "8"))
+
+# LINEAR16 16kHz 모노 기준 (자동 감지 형식도 같은 비율로 근사)
+AUDIO_BYTES_PER_SECOND = 16000 * 2
+
+SCRIPT_KO = "오늘 회의 안건은 다음 분기 일정과 예산 검토 그리고 신규 기능 배포 계획입니다".split()
+SCRIPT_EN = "today we will review the schedule for next quarter the budget and the release plan".split()
+
+
+class FakeSttBackend(SttBackend):
+    """
+    오디오 길이만으로 정해진 중간/최종 결과를 재생하는 가짜 백엔드
+
+    오디오가 1/FAKE_STT_WORDS_PER_SECOND 초 쌓일 때마다 대본의 단어를 하나씩 늘린
+    중간 결과를 만들고, FAKE_STT_WORDS_PER_UTTERANCE 단어마다 최종 결과를 냅니다.
+    각 결과는 해당 오디오가 도착한 뒤 지연시간(± 지터) 후에 순서대로 전달되며,
+    지터는 FAKE_STT_SEED로 고정된 난수를 사용하므로 같은 입력이면 결과도 같습니다.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = FAKE_STT_LATENCY_MS,
+        jitter_ms: float = FAKE_STT_JITTER_MS,
+        seed: int = FAKE_STT_SEED,
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.seed = seed
+
+    async def streaming_recognize(
+        self,
+        audio_chunks,
+        language_code,
+        encoding=ENCODING_LINEAR16,
+        interim_results=True,
+    ):
+        loop = asyncio.get_running_loop()
+        rng = random.Random(self.seed)
+        script = SCRIPT_KO if language_code.startswith("ko") else SCRIPT_EN
+        results = asyncio.Queue()
+        last_delivery = 0.0
+
+        def schedule(result):
+            # 결과 순서가 뒤바뀌지 않도록 전달 시각은 단조 증가
+            nonlocal last_delivery
+            delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+            last_delivery = max(last_delivery, loop.time() + delay)
+            # 같은 시각의 타이머는 실행 순서가 보장되지 않으므로 큐 순서대로 전달
+            results.put_nowait((last_delivery, result))
+
+        def make_result(words, is_final, seconds):
+            return {
+                "transcript": " ".join(words),
+                "is_final": is_final,
+                "confidence": 0.9 if is_final else 0.0,
+                "end_offset": seconds,
+            }
+
+        async def consume():
+            audio_bytes = 0
+            word_count = 0
+            words = []
+            seconds = 0.0
+            try:
+                async for chunk in audio_chunks:
+                    audio_bytes += len(chunk)
+                    seconds = audio_bytes / AUDIO_BYTES_PER_SECOND
+
+                    while word_count < int(seconds * FAKE_STT_WORDS_PER_SECOND):
+                        words.append(script[word_count % len(script)])
+                        word_count += 1
+
+                        if len(words) >= FAKE_STT_WORDS_PER_UTTERANCE:
+                            schedule(make_result(words, True, seconds))
+                            words = []
+                        elif interim_results:
+                            schedule(make_result(words, False, seconds))
+
+                # 스트림 종료 시 남은 발화를 최종 결과로 마무리
+                if words:
+                    schedule(make_result(words, True, seconds))
+            finally:
+                schedule(None)
+
+        task = asyncio.create_task(consume())
+        try:
+            while True:
+                deliver_at, result = await results.get()
+                await asyncio.sleep(max(0.0, deliver_at - loop.time()))
+                if result is None:
+                    break
+                yield result
+            # 입력 처리 중 발생한 예외 전달
+            await task
+        finally:
+            task.cancel()
@@ -0,0 +1,88 @@
+# interim_protocol.py - 중간 결과 전송 프로토콜 (full / delta) 및 전송 빈도 제한
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROTOCOL_FULL = "full"    # 매번 전체 중간 결과 전송 ("interim")
+PROTOCOL_DELTA = "delta"  # 이전 전송과 달라진 뒷부분만 전송 ("interim_delta")
+PROTOCOLS = (PROTOCOL_FULL, PROTOCOL_DELTA)
+
+# delta 모드에서 interim_rate를 지정하지 않았을 때의 초당 최대 전송 횟수
+STT_INTERIM_MAX_RATE = float(os.getenv("STT_INTERIM_MAX_RATE", "10"))
+
+
+def common_prefix_length(previous: str, current: str) -> int:
+    """두 문자열의 공통 접두사 길이"""
+    length = min(len(previous), len(current))
+    for index in range(length):
+        if previous[index] != current[index]:
+            return index
+    return length
+
+
+def utf16_length(text: str) -> int:
+    """JavaScript 문자열 길이 (UTF-16 코드 유닛 수, BMP 밖 문자는 2)"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+class InterimPublisher:
+    """
+    중간 결과를 프로토콜에 맞게 인코딩하고 전송 빈도를 제한하는 클래스
+
+    - delta 모드: {"type": "interim_delta", "offset": n, "text": 접미사}
+      클라이언트는 이전 중간 결과의 앞 n글자 뒤에 text를 붙여 복원합니다.
+      n은 JavaScript String.slice 기준인 UTF-16 코드 유닛 수입니다 (이모지 등 BMP 밖 문자는 2).
+    - max_rate가 있으면 그 사이에 들어온 중간 결과는 마지막 것만 모아 보냅니다.
+    - 최종 결과는 final()로 대기 중인 중간 결과를 버리고 상태를 초기화합니다.
+    """
+
+    def __init__(self, send, protocol: str = PROTOCOL_FULL, max_rate: float = None):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown interim protocol: {protocol}")
+        if max_rate is None and protocol == PROTOCOL_DELTA:
+            max_rate = STT_INTERIM_MAX_RATE
+
+        self.send = send
+        self.protocol = protocol
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.last_sent_text = ""
+        self.last_sent_at = 0.0
+        self.pending = None
+
+    async def interim(self, text: str):
+        """중간 결과 등록 - 허용된 빈도 안이면 바로 전송"""
+        if text == self.last_sent_text:
+            self.pending = None
+            return
+        self.pending = text
+        if self.flush_delay() == 0:
+            await self.flush()
+
+    def flush_delay(self):
+        """대기 중인 중간 결과를 보낼 때까지 남은 시간 (대기 중인 결과가 없으면 None)"""
+        if self.pending is None:
+            return None
+        return max(0.0, self.last_sent_at + self.min_interval - time.monotonic())
+
+    async def flush(self):
+        """대기 중인 중간 결과 전송"""
+        text, self.pending = self.pending, None
+        if text is None or text == self.last_sent_text:
+            return
+
+        if self.protocol == PROTOCOL_DELTA:
+            prefix = common_prefix_length(self.last_sent_text, text)
+            message = {"type": "interim_delta", "offset": utf16_length(text[:prefix]), "text": text[prefix:]}
+        else:
+            message = {"type": "interim", "text": text}
+
+        await self.send(message)
+        self.last_sent_text = text
+        self.last_sent_at = time.monotonic()
+
+    def final(self):
+        """최종 결과 전송 전 호출 - 중간 결과 상태 초기화"""
+        self.pending = None
+        self.last_sent_text = ""
@@ -15,7 +15,6 @@ from fastapi import HTTPException
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.entity.script import Script
-from app.dto.message_request import MessageRequest
 from app.dto.script_reponse import ScriptResponse
 
 speacker = None
@@ -71,21 +70,20 @@ async def get_script_by_id(db: AsyncSession, script_id: str) -> Script | None:
     else:
         raise FileNotFoundError(f"File not found at path: {file_path}")
 
-async def logger(db: AsyncSession, data: MessageRequest, script_id: str):
+async def get_script_file_path(db: AsyncSession, script_id: str) -> str:
     """
-    로그를 파일에 저장하고, 파일의 내용을 반환하는 함수
-    - db: 데이터베이스 세션
-    - data: MessageRequest 객체 (message 필드 포함)
-    - script_id: 스크립트 ID
+    script_id로 스크립트 파일 경로를 조회하는 함수
     """
-    # script_id로 스크립트 조회
     scripts = await find_script_by_id(db, script_id)
     if not scripts:
         raise HTTPException(status_code=404, detail=f"Script with ID {script_id} not found")
 
-    # 파일 경로 가져오기
-    file_path = scripts.file_path
+    return scripts.file_path
 
+def append_lines(file_path: str, lines: list):
+    """
+    스크립트 파일에 여러 줄을 한 번에 추가하는 함수 (파일이 없으면 새로 생성)
+    """
     # 파일이 없으면 새로 생성
     if not os.path.exists(file_path):
         try:
@@ -98,7 +96,7 @@ async def logger(db: AsyncSession, data: MessageRequest, script_id: str):
     # 파일에 메시지 저장
     try:
         with open(file_path, "a", encoding="utf-8") as file:
-            file.write(data.message + "\n")  # 메시지를 파일에 추가
+            file.write("".join(line + "\n" for line in lines))  # 메시지를 파일에 추가
     except Exception as e:
         raise IOError(f"Failed to write to file {file_path}: {str(e)}")
 
@@ -1,33 +1,110 @@
 import logging
 import os
+import json
+import asyncio
+import hashlib
 from fastapi import HTTPException
 from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
 from langchain_teddynote.messages import stream_response
 from app.dto.message_request import MessageRequest
+from app.dto.multi_message_request import MultiMessageRequest
+from app.services.translation_cache import (
+    translation_cache,
+    make_cache_key,
+    TRANSLATION_CACHE_ENABLED,
+    TRANSLATION_CACHE_MAX_TEXT_LENGTH,
+)
+from app.services.translation_batcher import TranslationBatcher, TRANSLATION_BATCH_ENABLED, BATCH_TEMPLATE, is_batchable
+from app.services.single_flight import SingleFlight
 
 OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
 
+TRANSLATION_MODEL = "gpt-4o-mini"
+TRANSLATION_TEMPERATURE = 0.5
+
 model = ChatOpenAI(
-    model="gpt-4o-mini", 
-    temperature=0.5, 
+    model=TRANSLATION_MODEL, 
+    temperature=TRANSLATION_TEMPERATURE, 
     openai_api_key=OPENAI_API_KEY, 
-    streaming=True
+    streaming=True,
+    stream_usage=True  # 마지막 청크에 토큰 사용량 포함 (비용 비교용)
 )
 
 templete='{text}을 {lang}로 번역해주세요. 번역 된 문장만 출력해주세요.'
 prompt = PromptTemplate.from_template(templete)
-output_parser = StrOutputParser()
-chain = prompt | model | output_parser
+chain = prompt | model
+
+# 프롬프트나 모델이 바뀌면 이전 번역 캐시를 사용하지 않도록 캐시 키에 포함
+# (묶음 번역 결과도 같은 캐시에 저장하므로 묶음 프롬프트도 포함)
+TRANSLATION_CACHE_VERSION = hashlib.sha256(
+    f"{TRANSLATION_MODEL}\0{TRANSLATION_TEMPERATURE}\0{templete}\0{BATCH_TEMPLATE}".encode("utf-8")
+).hexdigest()[:16]
+
+# 요청별 번역 호출의 토큰 사용량
+_single_usage = {"llm_requests": 0, "input_tokens": 0, "output_tokens": 0}
+
+async def stream_single_translation(text: str, lang: str):
+    """번역 요청 하나를 LLM 스트림 하나로 번역"""
+    _single_usage["llm_requests"] += 1
+    async for chunk in chain.astream({"text": text, "lang": lang}):
+        if chunk.usage_metadata:
+            _single_usage["input_tokens"] += chunk.usage_metadata.get("input_tokens", 0)
+            _single_usage["output_tokens"] += chunk.usage_metadata.get("output_tokens", 0)
+        if chunk.content:
+            yield chunk.content
+
+# 동시에 들어온 짧은 번역 요청을 묶어 처리 (TRANSLATION_BATCH_ENABLED)
+translation_batcher = TranslationBatcher(model, stream_single_translation)
+
+def stream_llm_translation(text: str, lang: str):
+    if TRANSLATION_BATCH_ENABLED and is_batchable(text):
+        return translation_batcher.translate(text, lang)
+    return stream_single_translation(text, lang)
+
+# 같은 번역을 동시에 요청하면 LLM 스트림 하나를 공유
+translation_flights = SingleFlight("translation")
+
+async def _translate_and_cache(key: str, text: str, lang: str, cacheable: bool):
+    tokens = []
+    async for token in stream_llm_translation(text, lang):
+        tokens.append(token)
+        yield token
+    if cacheable:
+        await translation_cache.put(key, tokens)
+
+async def stream_translation(text: str, lang: str):
+    """
+    번역 결과 토큰을 그대로 반환하는 비동기 스트림 (SSE 형식 없이)
+    짧은 문장은 번역 캐시에서 먼저 찾고, 없으면 번역이 끝까지 완료된 경우에만 토큰 단위로 저장합니다.
+    캐시에 없는 같은 번역이 동시에 요청되면 하나의 LLM 스트림을 함께 받습니다.
+    """
+    key = make_cache_key(text, lang, TRANSLATION_CACHE_VERSION)
+    cacheable = TRANSLATION_CACHE_ENABLED and len(text) <= TRANSLATION_CACHE_MAX_TEXT_LENGTH
+
+    if cacheable:
+        tokens = await translation_cache.get(key)
+        if tokens is not None:
+            for token in tokens:
+                yield token
+            return
+
+    async for token in translation_flights.stream(
+        key, lambda: _translate_and_cache(key, text, lang, cacheable)
+    ):
+        yield token
+
+def get_translation_stats() -> dict:
+    """요청별 경로와 묶음 경로의 LLM 호출 수 / 토큰 사용량"""
+    return {
+        "single": dict(_single_usage),
+        "batch": translation_batcher.get_stats(),
+    }
 
 async def get_streaming_message_from_openai(data: MessageRequest):
     try:
         # 스트리밍 응답 생성
-        response = chain.astream({
-            "text": data.message,
-            "lang": data.lang
-        })
+        response = stream_translation(data.message, data.lang)
 
         async for token in response:
             content = f"data: {token}\n\n"
@@ -36,4 +113,38 @@ async def get_streaming_message_from_openai(data: MessageRequest):
     except Exception as e:
         # 에러 발생 시 스트리밍 방식으로 에러 메시지 반환
         logging.error(f"Error occurred: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"OpenAI Error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"OpenAI Error: {str(e)}")
+
+async def get_streaming_multi_translation(data: MultiMessageRequest):
+    """
+    한 문장을 여러 언어로 동시에 번역해 하나의 SSE 스트림으로 반환
+    언어별 토큰은 도착하는 순서대로 섞여서 전달되며, 각 이벤트의 lang으로 구분합니다.
+    - data: {"lang": 언어, "text": 토큰}
+    - data: {"lang": 언어, "done": true}
+    - data: {"lang": 언어, "error": 메시지}  (해당 언어만 실패)
+    - data: [DONE]  (모든 언어 완료)
+    """
+    langs = list(dict.fromkeys(data.langs))  # 중복 제거 (순서 유지)
+    events = asyncio.Queue()
+
+    async def translate(lang: str):
+        try:
+            async for token in stream_translation(data.message, lang):
+                events.put_nowait({"lang": lang, "text": token})
+            events.put_nowait({"lang": lang, "done": True})
+        except Exception as e:
+            logging.error(f"Error occurred ({lang}): {str(e)}")
+            events.put_nowait({"lang": lang, "error": f"OpenAI Error: {str(e)}"})
+
+    tasks = [asyncio.create_task(translate(lang)) for lang in langs]
+    try:
+        remaining = len(langs)
+        while remaining:
+            event = await events.get()
+            if "text" not in event:
+                remaining -= 1
+            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        yield "data: [DONE]\n\n"
+    finally:
+        for task in tasks:
+            task.cancel()
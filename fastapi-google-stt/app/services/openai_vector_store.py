@@ -1,36 +1,280 @@
 import os
+import time
+import asyncio
+import threading
+from collections import deque
 from datetime import datetime
+import chromadb
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain.schema import Document
+from app.services.embedding_cache import CachedEmbeddings, embedding_cache, EMBEDDING_CACHE_ENABLED
 
 OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
 VECTOR_DB_PATH=os.getenv("VECTOR_DB_PATH")
 
-# Chroma 벡터스토어 초기화
+# 발화 임베딩 배치 (컬렉션별로 모아 임베딩 1회 + add_documents 1회로 저장)
+EMBEDDING_BATCH_ENABLED = os.getenv("EMBEDDING_BATCH_ENABLED", "true").lower() == "true"
+EMBEDDING_BATCH_MAX_DOCS = int(os.getenv("EMBEDDING_BATCH_MAX_DOCS", "256"))
+EMBEDDING_BATCH_TOKEN_BUDGET = int(os.getenv("EMBEDDING_BATCH_TOKEN_BUDGET", "8000"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "100"))
+
+# 배치 크기 분포 구간 (상한)
+_BATCH_SIZE_BUCKETS = (1, 4, 16, 64, 256)
+
+COLLECTION_NAMES = ['meeting_transcripts', 'meeting_summaries']        # 0: 회의 내용, 1: 회의 요약
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+def create_embeddings():
+    embeddings = OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        openai_api_key=OPENAI_API_KEY
+    )
+    if EMBEDDING_CACHE_ENABLED:
+        # 같은 텍스트는 다시 임베딩하지 않도록 캐시로 감쌈 (추가 / 검색 모두)
+        return CachedEmbeddings(embeddings, EMBEDDING_MODEL, embedding_cache)
+    return embeddings
+
+class VectorStoreRegistry:
+    """
+    프로세스 전체에서 공유하는 Chroma 클라이언트 / 컬렉션 / 임베딩 클라이언트
+
+    요청마다 저장 경로를 다시 열고 HTTP 클라이언트를 새로 만들지 않도록 처음 사용할 때 한 번만 생성합니다.
+    임베딩과 Chroma 호출은 스레드에서 실행되므로 생성은 잠금으로 보호하며,
+    생성된 객체는 여러 스레드에서 함께 사용합니다.
+    """
+
+    def __init__(self, path: str = VECTOR_DB_PATH, embeddings_factory=create_embeddings):
+        self.path = path
+        self.embeddings_factory = embeddings_factory
+        self._lock = threading.Lock()
+        self._client = None
+        self._embeddings = None
+        self._collections = {}
+
+    def get(self, collection_num: int = 0) -> Chroma:
+        vectordb = self._collections.get(collection_num)
+        if vectordb is not None:
+            return vectordb
+        with self._lock:
+            vectordb = self._collections.get(collection_num)
+            if vectordb is None:
+                if self._client is None:
+                    self._client = chromadb.PersistentClient(path=self.path) if self.path else chromadb.EphemeralClient()
+                    self._embeddings = self.embeddings_factory()
+                vectordb = Chroma(
+                    collection_name=COLLECTION_NAMES[collection_num],          # 컬렉션 이름 (카테고리처럼 생각)
+                    embedding_function=self._embeddings,
+                    client=self._client)                                         # 저장 경로의 공유 클라이언트
+                self._collections[collection_num] = vectordb
+            return vectordb
+
+    async def start(self):
+        """애플리케이션 시작 시 모든 컬렉션을 미리 열어 둠"""
+        for collection_num in range(len(COLLECTION_NAMES)):
+            await asyncio.to_thread(self.get, collection_num)
+
+    def close(self):
+        with self._lock:
+            self._collections.clear()
+            self._client = None
+            self._embeddings = None
+
+    def get_stats(self) -> dict:
+        stats = {
+            "path": self.path,
+            "collections": [COLLECTION_NAMES[num] for num in sorted(self._collections)],
+        }
+        if isinstance(self._embeddings, CachedEmbeddings):
+            stats["embeddings"] = self._embeddings.get_stats()
+        return stats
+
+vector_store_registry = VectorStoreRegistry()
+
+# Chroma 벡터스토어 조회 (공유 인스턴스)
 def init_vectordb(collection_num: int=0):
+    return vector_store_registry.get(collection_num)
+
+def estimate_tokens(text: str) -> int:
+    """임베딩 입력 토큰 수 대략 추정 (UTF-8 3바이트당 1토큰)"""
+    return len(text.encode("utf-8")) // 3 + 1
+
+class _IngestRequest:
+    def __init__(self, docs: list):
+        self.docs = docs
+        self.tokens = sum(estimate_tokens(doc.page_content) for doc in docs)
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+class _CollectionQueue:
+    def __init__(self):
+        self.pending = deque()
+        self.pending_docs = 0
+        self.pending_tokens = 0
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+class EmbeddingIngestor:
+    """
+    발화 문서를 컬렉션별로 모아 한 번에 임베딩하고 저장하는 배치 ingestor
 
-    collection_names = ['meeting_transcripts', 'meeting_summaries']        # 0: 회의 내용, 1: 회의 요약
+    add()로 들어온 문서는 컬렉션 큐에 쌓이고, 문서 수가 EMBEDDING_BATCH_MAX_DOCS,
+    추정 토큰이 EMBEDDING_BATCH_TOKEN_BUDGET에 도달하거나 가장 오래된 요청이
+    EMBEDDING_BATCH_MAX_WAIT_MS를 기다리면 임베딩 1회 + add_documents 1회로 저장합니다.
+    컬렉션마다 태스크 하나가 순서대로 저장하므로 저장 중에 들어온 요청은 다음 배치로 모입니다.
+    여러 회의의 문서가 한 배치에 섞여도 문서별 metadata(script_id)는 그대로 유지되며,
+    add()는 자신의 문서가 저장된 뒤에 반환하고 배치가 실패하면 같은 예외를 발생시킵니다.
+    한 번의 add()로 들어온 문서는 나누지 않습니다.
+    """
 
-    return Chroma(
-        collection_name=collection_names[collection_num],                          # 컬렉션 이름 (카테고리처럼 생각)
-        embedding_function=OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            openai_api_key=OPENAI_API_KEY
-        ),
-        persist_directory=VECTOR_DB_PATH)     # 저장 경로
+    def __init__(self):
+        self.max_wait = EMBEDDING_BATCH_MAX_WAIT_MS / 1000
+        self._queues = {}
+        self._closed = False
+
+        self.batches = 0
+        self.documents = 0
+        self.failed_batches = 0
+        self.flush_seconds = 0.0
+        self.batch_sizes = {bucket: 0 for bucket in _BATCH_SIZE_BUCKETS}
+        self.batch_sizes["more"] = 0
+        self._recent_sizes = deque(maxlen=1000)
+        self._started_at = time.monotonic()
+
+    async def add(self, docs: list, collection_num: int = 0):
+        """문서를 배치에 추가하고 저장될 때까지 대기"""
+        if not docs:
+            return
+        queue = self._queues.get(collection_num)
+        if queue is None:
+            queue = self._queues[collection_num] = _CollectionQueue()
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(self._run(collection_num, queue))
+
+        request = _IngestRequest(docs)
+        queue.pending.append(request)
+        queue.pending_docs += len(docs)
+        queue.pending_tokens += request.tokens
+        queue.wakeup.set()
+        await asyncio.shield(request.future)
+
+    def _is_full(self, queue: _CollectionQueue) -> bool:
+        return queue.pending_docs >= EMBEDDING_BATCH_MAX_DOCS or queue.pending_tokens >= EMBEDDING_BATCH_TOKEN_BUDGET
+
+    def _take_batch(self, queue: _CollectionQueue) -> list:
+        """한도 안에서 앞에서부터 요청을 꺼냄 (최소 1개)"""
+        batch, docs, tokens = [], 0, 0
+        while queue.pending:
+            request = queue.pending[0]
+            if batch and (docs + len(request.docs) > EMBEDDING_BATCH_MAX_DOCS
+                          or tokens + request.tokens > EMBEDDING_BATCH_TOKEN_BUDGET):
+                break
+            queue.pending.popleft()
+            batch.append(request)
+            docs += len(request.docs)
+            tokens += request.tokens
+        queue.pending_docs -= docs
+        queue.pending_tokens -= tokens
+        return batch
+
+    async def _run(self, collection_num: int, queue: _CollectionQueue):
+        while True:
+            if not queue.pending:
+                if self._closed:
+                    return
+                queue.wakeup.clear()
+                await queue.wakeup.wait()
+                continue
+
+            # 배치가 차거나 가장 오래된 요청의 대기 시간이 지날 때까지 모음
+            deadline = queue.pending[0].enqueued_at + self.max_wait
+            while not self._is_full(queue) and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                queue.wakeup.clear()
+                try:
+                    await asyncio.wait_for(queue.wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(collection_num, self._take_batch(queue))
+
+    async def _flush(self, collection_num: int, batch: list):
+        docs = [doc for request in batch for doc in request.docs]
+        started = time.monotonic()
+        try:
+            await asyncio.to_thread(init_vectordb(collection_num).add_documents, docs)
+        except Exception as e:
+            self.failed_batches += 1
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        finally:
+            self.flush_seconds += time.monotonic() - started
+
+        self.batches += 1
+        self.documents += len(docs)
+        self._recent_sizes.append(len(docs))
+        bucket = next((b for b in _BATCH_SIZE_BUCKETS if len(docs) <= b), "more")
+        self.batch_sizes[bucket] += 1
+        for request in batch:
+            if not request.future.done():
+                request.future.set_result(None)
+
+    async def close(self):
+        """남은 문서를 모두 저장하고 종료"""
+        self._closed = True
+        for queue in self._queues.values():
+            queue.wakeup.set()
+        await asyncio.gather(*(q.task for q in self._queues.values() if q.task), return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        sizes = sorted(self._recent_sizes)
+        elapsed = time.monotonic() - self._started_at
+        return {
+            "enabled": EMBEDDING_BATCH_ENABLED,
+            "queued_documents": sum(q.pending_docs for q in self._queues.values()),
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "documents": self.documents,
+            "avg_batch_size": round(self.documents / self.batches, 2) if self.batches else 0.0,
+            "p50_batch_size": sizes[len(sizes) // 2] if sizes else 0,
+            "p95_batch_size": sizes[min(len(sizes) - 1, int(len(sizes) * 0.95))] if sizes else 0,
+            # 배치 크기 상한별 배치 수 (1, 2~4, 5~16, ...)
+            "batch_size_distribution": {f"<={b}" if b != "more" else f">{_BATCH_SIZE_BUCKETS[-1]}": n
+                                        for b, n in self.batch_sizes.items()},
+            # 저장(임베딩 + 쓰기)에 걸린 시간 기준 / 가동 시간 기준 처리량
+            "embeddings_per_second": round(self.documents / self.flush_seconds, 2) if self.flush_seconds else 0.0,
+            "embeddings_per_uptime_second": round(self.documents / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+embedding_ingestor = EmbeddingIngestor()
 
 # 텍스트를 임베딩하고 DB에 저장하는 함수
 async def add_text(text: str, script_id:str, collection_num:int=0):
+    await add_texts([text], script_id, collection_num)
+
+# 여러 텍스트를 DB에 저장하는 함수 (EMBEDDING_BATCH_ENABLED면 다른 요청과 묶어 한 번에 임베딩)
+async def add_texts(texts: list, script_id:str, collection_num:int=0):
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S") # 현재 시간
 
     source = "stt" if collection_num == 0 else "summary"
 
-    doc = Document(page_content=text, metadata={
+    docs = [Document(page_content=text, metadata={
         "script_id": script_id,
         "source": source,
         "created_at":now
-    })    # 문서 객체로 변환
+    }) for text in texts]    # 문서 객체로 변환
+
+    if EMBEDDING_BATCH_ENABLED:
+        await embedding_ingestor.add(docs, collection_num)
+        return
+
+    def add_documents():
+        vectordb = init_vectordb(collection_num)
+        vectordb.add_documents(docs)                    # 벡터 DB에 추가
 
-    vectordb = init_vectordb(collection_num)
-    vectordb.add_documents([doc])                      # 벡터 DB에 추가
\ No newline at end of file
+    await asyncio.to_thread(add_documents)              # 임베딩 호출은 스레드에서 실행
@@ -1,5 +1,7 @@
 # rag_pipeline.py
 from app.services.vector_retriever import get_meeting_retriever
+from app.services.transcript_writer import flush_script
+from app.services.single_flight import SingleFlight
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
@@ -16,8 +18,21 @@ llm = ChatOpenAI(
     streaming=True
 )
 
+# 같은 회의에 같은 질문이 동시에 들어오면 답변 스트림 하나를 공유
+answer_flights = SingleFlight("answer")
+
 # 질의응답 함수
 async def answer_question(query: str, script_id: str, collection_num: int=0):
+    key = (script_id, collection_num, " ".join(query.split()))
+    async for chunk in answer_flights.stream(
+        key, lambda: _answer_question(query, script_id, collection_num)
+    ):
+        yield chunk
+
+async def _answer_question(query: str, script_id: str, collection_num: int):
+    # 0. 저장 대기 중인 회의 내용을 먼저 저장
+    await flush_script(script_id)
+
     # 1. 회의 문서 리트리버 초기화
     retriever = get_meeting_retriever(script_id=script_id, collection_num=collection_num)
     
@@ -7,6 +7,8 @@ from app.services.openai_vector_store import (
     init_vectordb,
     add_text
 )
+from app.services.transcript_writer import flush_script
+from app.services.single_flight import SingleFlight
 import os
 
 OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
@@ -31,8 +33,21 @@ summary_default = """
   
 """
 
+# 같은 회의 요약을 동시에 요청하면 (버튼 중복 클릭 등) 요약 스트림 하나를 공유
+summary_flights = SingleFlight("summary")
+
 # 함수 시그니처는 원래대로 유지하고 내부 로직만 변경
 async def summarize_meeting(script_id: str, collection_num: int=0, summary_contents: str = summary_default):
+    key = (script_id, collection_num, summary_contents)
+    async for chunk in summary_flights.stream(
+        key, lambda: _summarize_meeting(script_id, collection_num, summary_contents)
+    ):
+        yield chunk
+
+async def _summarize_meeting(script_id: str, collection_num: int, summary_contents: str):
+
+    # 0. 저장 대기 중인 회의 내용을 먼저 저장
+    await flush_script(script_id)
 
     # 1. 벡터DB 초기화 및 문서 검색
     vectordb = init_vectordb(collection_num)
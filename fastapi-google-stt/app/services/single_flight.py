@@ -0,0 +1,97 @@
+# single_flight.py - 동시에 들어온 같은 LLM 스트림 요청을 하나의 업스트림 호출로 합침
+import asyncio
+
+# 이름 -> SingleFlight (지표 조회용)
+_groups = {}
+
+
+class _Flight:
+    """진행 중인 업스트림 스트림 하나와 지금까지 받은 항목"""
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task = None
+
+
+class SingleFlight:
+    """
+    같은 키의 스트림 요청을 하나의 업스트림 호출로 합치는 그룹
+
+    처음 요청한 쪽이 factory()로 업스트림 스트림을 시작하고, 끝나기 전에 같은 키로 들어온
+    요청은 새 호출 없이 같은 스트림을 구독합니다. 늦게 들어온 구독자도 지금까지 받은 항목을
+    처음부터 다시 받은 뒤 이어지는 항목을 받으므로 모든 구독자가 같은 전체 스트림을 받습니다.
+    업스트림은 별도 태스크에서 실행되며, 구독자가 모두 떠나면 취소됩니다.
+    스트림이 끝나면 키를 지우므로 이후 요청은 새로 호출합니다 (결과 재사용은 캐시의 역할).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+        _groups[name] = self
+
+    async def stream(self, key, factory):
+        """factory()가 반환하는 비동기 이터레이터를 같은 키의 요청들과 공유해 반환"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            self.upstream_calls += 1
+            flight.task = asyncio.create_task(self._run(key, flight, factory))
+        else:
+            self.coalesced += 1
+        flight.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                if index < len(flight.items):
+                    item = flight.items[index]
+                    index += 1
+                    yield item
+                    continue
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                flight.changed.clear()
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # 남은 구독자가 없으면 업스트림 중단 (이후 요청은 새로 호출)
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    async def _run(self, key, flight: _Flight, factory):
+        try:
+            async for item in factory():
+                flight.items.append(item)
+                flight.changed.set()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            flight.changed.set()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def get_stats(self) -> dict:
+        requests = self.upstream_calls + self.coalesced
+        return {
+            "requests": requests,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / requests, 4) if requests else 0.0,
+            "in_flight": len(self._flights),
+        }
+
+
+def get_single_flight_stats() -> dict:
+    return {name: group.get_stats() for name, group in _groups.items()}
@@ -0,0 +1,158 @@
+# speech_client_pool.py - 프로세스 전역 Speech v2 gRPC 채널 풀
+import os
+import asyncio
+import logging
+import grpc
+from dotenv import load_dotenv
+from google.cloud.speech_v2 import SpeechAsyncClient
+from google.cloud.speech_v2.services.speech.transports import SpeechGrpcAsyncIOTransport
+
+load_dotenv()
+
+SPEECH_ENDPOINT = os.getenv("SPEECH_ENDPOINT", "speech.googleapis.com:443")
+STT_CLIENT_POOL_SIZE = int(os.getenv("STT_CLIENT_POOL_SIZE", "4"))
+STT_KEEPALIVE_TIME_MS = int(os.getenv("STT_KEEPALIVE_TIME_MS", "30000"))
+STT_KEEPALIVE_TIMEOUT_MS = int(os.getenv("STT_KEEPALIVE_TIMEOUT_MS", "10000"))
+STT_HEALTH_CHECK_INTERVAL = float(os.getenv("STT_HEALTH_CHECK_INTERVAL", "30"))
+STT_CHANNEL_READY_TIMEOUT = float(os.getenv("STT_CHANNEL_READY_TIMEOUT", "10"))
+
+# 재연결로 교체된 채널에서 진행 중인 스트림이 끝날 때까지 기다리는 시간 (초)
+STT_CHANNEL_CLOSE_GRACE = 30
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechClientPool:
+    """
+    미리 연결해 둔 SpeechAsyncClient를 공유하는 풀
+
+    gRPC 채널 하나가 여러 스트림을 다중화하므로 세션마다 채널을 만들지 않고
+    라운드로빈으로 클라이언트를 나눠 줍니다. 주기적으로 채널 상태를 확인하여
+    끊어진 채널은 새 채널로 교체합니다.
+    """
+
+    def __init__(self, size: int = STT_CLIENT_POOL_SIZE):
+        self.size = max(1, size)
+        self._clients = [None] * self.size
+        self._next = 0
+        self._health_task = None
+        self._stats = {
+            "channels_created": 0,
+            "channel_reuses": 0,
+            "reconnects": 0,
+            "health_checks": 0,
+        }
+
+    def _create_client(self) -> SpeechAsyncClient:
+        """keepalive 옵션을 적용한 새 채널과 클라이언트를 생성"""
+        channel = SpeechGrpcAsyncIOTransport.create_channel(
+            SPEECH_ENDPOINT,
+            options=[
+                ("grpc.keepalive_time_ms", STT_KEEPALIVE_TIME_MS),
+                ("grpc.keepalive_timeout_ms", STT_KEEPALIVE_TIMEOUT_MS),
+                ("grpc.keepalive_permit_without_calls", 1),
+                ("grpc.http2.max_pings_without_data", 0),
+                ("grpc.max_send_message_length", -1),
+                ("grpc.max_receive_message_length", -1),
+            ],
+        )
+        self._stats["channels_created"] += 1
+        return SpeechAsyncClient(transport=SpeechGrpcAsyncIOTransport(channel=channel))
+
+    @staticmethod
+    def _channel(client: SpeechAsyncClient):
+        return client.transport.grpc_channel
+
+    async def _warm(self, client: SpeechAsyncClient):
+        """채널 연결(TLS 핸드셰이크 포함)을 미리 완료"""
+        try:
+            await asyncio.wait_for(
+                self._channel(client).channel_ready(),
+                timeout=STT_CHANNEL_READY_TIMEOUT,
+            )
+        except Exception as e:
+            logger.warning(f"STT 채널 사전 연결 실패: {str(e)}")
+
+    async def start(self):
+        """애플리케이션 시작 시 채널을 생성하고 연결을 미리 맺어 둠"""
+        for index in range(self.size):
+            if self._clients[index] is None:
+                self._clients[index] = self._create_client()
+        await asyncio.gather(*(self._warm(client) for client in self._clients))
+
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_check_loop())
+
+        logger.info(f"STT 클라이언트 풀 준비 완료: 채널 {self.size}개")
+
+    async def close(self):
+        """헬스 체크를 중단하고 모든 채널을 닫음"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+
+        clients, self._clients = self._clients, [None] * self.size
+        await asyncio.gather(
+            *(self._channel(client).close() for client in clients if client is not None),
+            return_exceptions=True,
+        )
+
+    def acquire(self) -> SpeechAsyncClient:
+        """풀에서 클라이언트를 하나 꺼냄 (채널은 다른 세션과 공유됨)"""
+        index = self._next
+        self._next = (self._next + 1) % self.size
+
+        client = self._clients[index]
+        if client is None:
+            # start() 전에 호출된 경우 필요한 슬롯만 생성
+            client = self._clients[index] = self._create_client()
+        else:
+            self._stats["channel_reuses"] += 1
+        return client
+
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.sleep(STT_HEALTH_CHECK_INTERVAL)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"STT 채널 헬스 체크 오류: {str(e)}")
+
+    async def check_health(self):
+        """끊어졌거나 실패 상태인 채널을 새 채널로 교체"""
+        self._stats["health_checks"] += 1
+        for index, client in enumerate(self._clients):
+            if client is None:
+                continue
+
+            state = self._channel(client).get_state(try_to_connect=True)
+            if state not in (
+                grpc.ChannelConnectivity.TRANSIENT_FAILURE,
+                grpc.ChannelConnectivity.SHUTDOWN,
+            ):
+                continue
+
+            logger.warning(f"STT 채널 {index} 상태 {state.name}, 재연결합니다")
+            new_client = self._create_client()
+            self._clients[index] = new_client
+            self._stats["reconnects"] += 1
+            await self._warm(new_client)
+
+            # 기존 채널은 진행 중인 스트림이 끝날 시간을 주고 닫음
+            asyncio.create_task(self._channel(client).close(grace=STT_CHANNEL_CLOSE_GRACE))
+
+    def get_stats(self) -> dict:
+        states = [
+            self._channel(client).get_state().name if client is not None else "NOT_CREATED"
+            for client in self._clients
+        ]
+        return {"size": self.size, "channel_states": states, **self._stats}
+
+
+speech_client_pool = SpeechClientPool()
+
+
+def get_speech_client() -> SpeechAsyncClient:
+    """공유 풀에서 SpeechAsyncClient를 가져오는 함수"""
+    return speech_client_pool.acquire()
@@ -0,0 +1,144 @@
+# stt_backend.py - STT 백엔드 인터페이스와 Google Speech v2 구현
+import os
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+from dotenv import load_dotenv
+from google.cloud.speech_v2.types import cloud_speech as cloud_speech_types
+from app.services.speech_client_pool import get_speech_client
+
+load_dotenv()
+
+PROJECT_ID = os.getenv("PROJECT_ID")
+# 사용할 STT 백엔드: "google" (기본) 또는 "fake" (자격 증명 없이 부하 테스트용)
+STT_BACKEND = os.getenv("STT_BACKEND", "google")
+
+# LINEAR16 16kHz 모노 (WebSocket 경로의 기본 오디오 형식)
+ENCODING_LINEAR16 = "linear16"
+
+
+class SttBackend(ABC):
+    """
+    스트리밍 음성 인식 백엔드 인터페이스 (구현체는 streaming_recognize를 비동기 제너레이터로 구현)
+
+    streaming_recognize()는 오디오 청크의 비동기 이터레이터를 받아
+    {"transcript", "is_final", "confidence", "end_offset"} 형태의 결과를 비동기로 반환합니다.
+    end_offset은 스트림 시작부터 해당 결과 끝까지의 오디오 길이(초)입니다.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def streaming_recognize(
+        self,
+        audio_chunks: AsyncIterator[bytes],
+        language_code: str,
+        encoding: str = ENCODING_LINEAR16,
+        interim_results: bool = True,
+    ) -> AsyncIterator[dict]:
+        """
+        Args:
+            audio_chunks: 오디오 청크 비동기 이터레이터 (끝나면 스트림 half-close)
+            language_code: 인식 언어 코드
+            encoding: "linear16" 또는 None (컨테이너/코덱 자동 감지)
+            interim_results: 중간 결과 포함 여부
+        """
+
+
+class GoogleSttBackend(SttBackend):
+    """Google Cloud Speech-to-Text v2 스트리밍 백엔드 (공유 클라이언트 풀 사용)"""
+
+    name = "google"
+
+    @staticmethod
+    def build_config_request(
+        language_code: str,
+        encoding: str = ENCODING_LINEAR16,
+        interim_results: bool = True,
+    ) -> cloud_speech_types.StreamingRecognizeRequest:
+        """스트리밍 설정 요청을 생성"""
+        if encoding == ENCODING_LINEAR16:
+            recognition_config = cloud_speech_types.RecognitionConfig(
+                explicit_decoding_config=cloud_speech_types.ExplicitDecodingConfig(
+                    encoding=cloud_speech_types.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
+                    sample_rate_hertz=16000,
+                    audio_channel_count=1,
+                ),
+                language_codes=[language_code],
+                model="long",
+            )
+        else:
+            recognition_config = cloud_speech_types.RecognitionConfig(
+                auto_decoding_config=cloud_speech_types.AutoDetectDecodingConfig(),
+                language_codes=[language_code],
+                model="long",
+            )
+
+        streaming_features = cloud_speech_types.StreamingRecognitionFeatures(
+            interim_results=interim_results,
+        )
+
+        streaming_config = cloud_speech_types.StreamingRecognitionConfig(
+            config=recognition_config,
+            streaming_features=streaming_features,
+        )
+
+        return cloud_speech_types.StreamingRecognizeRequest(
+            recognizer=f"projects/{PROJECT_ID}/locations/global/recognizers/_",
+            streaming_config=streaming_config,
+        )
+
+    async def streaming_recognize(
+        self,
+        audio_chunks,
+        language_code,
+        encoding=ENCODING_LINEAR16,
+        interim_results=True,
+    ):
+        client = get_speech_client()
+        config_request = self.build_config_request(language_code, encoding, interim_results)
+
+        # 비동기 제너레이터 - STT API 호출에 사용
+        async def request_generator():
+            # 설정 요청 먼저 보내기
+            yield config_request
+            async for chunk in audio_chunks:
+                yield cloud_speech_types.StreamingRecognizeRequest(audio=chunk)
+
+        responses = await client.streaming_recognize(requests=request_generator())
+
+        async for response in responses:
+            # 결과가 없는 경우 스킵
+            if not response.results:
+                continue
+
+            # 중간 결과 모드에서는 마지막 결과만 처리 (일반적으로 가장 최신, 가장 정확한 결과)
+            results = response.results[-1:] if interim_results else response.results
+
+            for result in results:
+                if not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                end_offset = result.result_end_offset
+                yield {
+                    "transcript": alternative.transcript,
+                    "is_final": result.is_final,
+                    "confidence": getattr(alternative, "confidence", 0.0),
+                    "end_offset": end_offset.total_seconds() if end_offset else None,
+                }
+
+
+_backend = None
+
+
+def get_stt_backend() -> SttBackend:
+    """STT_BACKEND 환경 변수에 따라 프로세스 전역 백엔드를 반환하는 함수"""
+    global _backend
+    if _backend is None:
+        if STT_BACKEND == "fake":
+            from app.services.fake_stt_backend import FakeSttBackend
+            _backend = FakeSttBackend()
+        elif STT_BACKEND == "google":
+            _backend = GoogleSttBackend()
+        else:
+            raise ValueError(f"Unknown STT backend: {STT_BACKEND}")
+    return _backend
@@ -0,0 +1,156 @@
+# stt_diagnostics.py - WebSocket STT 세션별 단계 지연시간 측정
+import os
+import math
+import time
+import logging
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 단계별로 보관하는 최근 측정값 개수 (긴 세션의 메모리 사용 제한)
+STT_DIAGNOSTICS_MAX_SAMPLES = int(os.getenv("STT_DIAGNOSTICS_MAX_SAMPLES", "2000"))
+
+# LINEAR16 16kHz 모노 기준 초당 바이트 수
+AUDIO_BYTES_PER_SECOND = 16000 * 2
+
+# 측정 단계 (모두 time.monotonic() 기준, 밀리초)
+STAGE_RECEIVE_INTERVAL = "receive_interval"  # 소켓 오디오 프레임 수신 간격
+STAGE_INGEST_WAIT = "ingest_wait"            # 소켓 수신 -> 수신 버퍼에서 꺼냄
+STAGE_UPSTREAM_SEND = "upstream_send"        # 버퍼에서 꺼냄 -> STT 스트림으로 전달
+STAGE_RECOGNITION = "recognition"            # 오디오 전달 -> 해당 구간의 결과 수신
+STAGE_DELIVERY = "delivery"                  # 결과 수신 -> WebSocket 전송 완료
+STAGES = (
+    STAGE_RECEIVE_INTERVAL,
+    STAGE_INGEST_WAIT,
+    STAGE_UPSTREAM_SEND,
+    STAGE_RECOGNITION,
+    STAGE_DELIVERY,
+)
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """정렬된 값에서 nearest-rank 백분위수 계산"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class SessionDiagnostics:
+    """
+    WebSocket STT 세션 하나의 단계별 지연시간 타임라인
+
+    handle_websocket_connection / run_stt_stream / process_responses가
+    각 단계의 시각을 기록하고, 세션 종료 시 단계별 p50/p95와 오디오 길이,
+    결과 수, 버려진 프레임 수를 요약합니다.
+    """
+
+    def __init__(self, session_id: str, audio_buffer=None):
+        self.session_id = session_id
+        self.audio_buffer = audio_buffer
+        self.started_at = time.monotonic()
+        self.samples = {stage: deque(maxlen=STT_DIAGNOSTICS_MAX_SAMPLES) for stage in STAGES}
+
+        self.bytes_received = 0  # 소켓으로 받은 바이트 (압축 형식이면 압축된 크기)
+        self.bytes_pcm = 0       # LINEAR16 기준 오디오 바이트 (디코딩 결과 포함)
+        self.bytes_sent = 0
+        self.interims = 0
+        self.finals = 0
+        self.errors = 0
+        self._last_receive = None
+
+        # "start" 수신 시각과 첫 결과 전송까지 걸린 시간 (warm standby 효과 측정)
+        self.start_at = None
+        self.from_standby = False
+        self.start_to_first_result = None
+
+    def record(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds * 1000)
+
+    def audio_received(self, size: int, pcm: bool = True):
+        """소켓에서 오디오 프레임 수신 (pcm=False이면 디코딩 전 압축 프레임)"""
+        now = time.monotonic()
+        if self._last_receive is not None:
+            self.record(STAGE_RECEIVE_INTERVAL, now - self._last_receive)
+        self._last_receive = now
+        self.bytes_received += size
+        if pcm:
+            self.bytes_pcm += size
+
+    def audio_decoded(self, size: int):
+        """압축 오디오를 디코딩한 LINEAR16 바이트"""
+        self.bytes_pcm += size
+
+    def audio_sent(self, size: int):
+        """STT 스트림으로 오디오 전달 (VAD 통과분 + 교체 시 재전송분)"""
+        self.bytes_sent += size
+
+    def result_received(self, is_final: bool, latency: float = None):
+        """STT 결과 수신 (latency: 해당 오디오 전달 후 결과까지 걸린 시간)"""
+        if is_final:
+            self.finals += 1
+        else:
+            self.interims += 1
+        if latency is not None:
+            self.record(STAGE_RECOGNITION, latency)
+
+    def mark_started(self, from_standby: bool = False):
+        """클라이언트 "start" 수신 (미리 연 세션이면 from_standby)"""
+        self.start_at = time.monotonic()
+        self.from_standby = from_standby
+
+    def result_delivered(self):
+        """결과를 WebSocket으로 전송 - 첫 전송이면 start 이후 경과 시간 기록"""
+        if self.start_to_first_result is None and self.start_at is not None:
+            self.start_to_first_result = time.monotonic() - self.start_at
+
+    def error(self):
+        self.errors += 1
+
+    def stage_summary(self) -> dict:
+        summary = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            summary[stage] = {
+                "p50": round(percentile(ordered, 50), 2) if ordered else None,
+                "p95": round(percentile(ordered, 95), 2) if ordered else None,
+                "count": len(ordered),
+            }
+        return summary
+
+    def summary(self) -> dict:
+        """세션 요약 (diagnostics 메시지와 종료 로그에 사용)"""
+        buffer_stats = self.audio_buffer.get_stats() if self.audio_buffer is not None else {}
+        return {
+            "session_id": self.session_id,
+            "duration_seconds": round(time.monotonic() - self.started_at, 2),
+            "received_bytes": self.bytes_received,
+            "audio_seconds": round(self.bytes_pcm / AUDIO_BYTES_PER_SECOND, 2),
+            "sent_seconds": round(self.bytes_sent / AUDIO_BYTES_PER_SECOND, 2),
+            "interims": self.interims,
+            "finals": self.finals,
+            "errors": self.errors,
+            "standby": self.from_standby,
+            "start_to_first_result_ms": (
+                round(self.start_to_first_result * 1000, 2)
+                if self.start_to_first_result is not None else None
+            ),
+            "dropped_frames": buffer_stats.get("dropped_chunks", 0),
+            "dropped_bytes": buffer_stats.get("dropped_bytes", 0),
+            "stages_ms": self.stage_summary(),
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        stages = ", ".join(
+            f"{stage} p50={values['p50']} p95={values['p95']}"
+            for stage, values in summary["stages_ms"].items()
+            if values["count"]
+        )
+        logging.info(
+            f"STT 세션 요약 ({self.session_id}): 오디오 {summary['audio_seconds']}초, "
+            f"중간 결과 {summary['interims']}, 최종 결과 {summary['finals']}, "
+            f"버려진 프레임 {summary['dropped_frames']}, "
+            f"첫 결과 {summary['start_to_first_result_ms']}ms (standby={summary['standby']}) / {stages}"
+        )
@@ -0,0 +1,135 @@
+# stt_session_registry.py - 연결이 끊긴 WebSocket STT 세션을 재연결할 때까지 보관
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 연결이 끊긴 세션을 재연결(resume)할 수 있도록 유지하는 시간 (초)
+STT_RESUME_TTL = float(os.getenv("STT_RESUME_TTL", "30"))
+# 재전송을 위해 보관하는 미확인(ack 이전) 최종 결과 개수
+STT_RESUME_MAX_FINALS = int(os.getenv("STT_RESUME_MAX_FINALS", "200"))
+
+# session_token -> DetachedSession
+_detached = {}
+
+
+class SessionOutput:
+    """
+    process_responses가 WebSocket 대신 사용하는 출력
+
+    최종 결과는 id와 함께 STT_RESUME_MAX_FINALS개까지 보관했다가
+    재연결 시 클라이언트가 확인(ack)하지 않은 것만 다시 보냅니다.
+    소켓이 없거나 전송에 실패하면 메시지를 버리며, 최종 결과는 보관된 것으로 재전송됩니다.
+    """
+
+    def __init__(self, websocket, max_finals: int = STT_RESUME_MAX_FINALS):
+        self.websocket = websocket
+        self.finals = deque(maxlen=max_finals)  # (id, 직렬화된 메시지)
+        self.acked_id = -1
+
+    @property
+    def last_final_id(self) -> int:
+        return self.finals[-1][0] if self.finals else self.acked_id
+
+    async def send_text(self, text: str):
+        websocket = self.websocket
+        if websocket is None:
+            return
+        try:
+            await websocket.send_text(text)
+        except Exception as e:
+            logging.info(f"결과 전송 실패, 재연결 대기: {str(e)}")
+            if self.websocket is websocket:
+                self.websocket = None
+
+    def record_final(self, final_id: int, text: str):
+        """전송할 최종 결과 보관"""
+        if final_id > self.acked_id:
+            self.finals.append((final_id, text))
+
+    def ack(self, final_id: int):
+        """클라이언트가 final_id까지 받았음을 확인"""
+        self.acked_id = max(self.acked_id, final_id)
+        while self.finals and self.finals[0][0] <= self.acked_id:
+            self.finals.popleft()
+
+    def detach(self):
+        self.websocket = None
+
+    async def attach(self, websocket, last_final_id: int):
+        """
+        새 소켓 연결 - last_final_id 이후의 최종 결과를 먼저 보낸 뒤 실시간 전송을 이어감
+        재전송 중에 새로 생긴 최종 결과도 순서대로 함께 보냅니다.
+        """
+        self.ack(last_final_id)
+        sent_id = self.acked_id
+        while True:
+            pending = [(final_id, text) for final_id, text in self.finals if final_id > sent_id]
+            if not pending:
+                break
+            for final_id, text in pending:
+                await websocket.send_text(text)
+                sent_id = final_id
+        self.websocket = websocket
+
+
+class DetachedSession:
+    """연결이 끊긴 세션의 상태와 만료 처리"""
+
+    def __init__(self, token: str, state: dict, on_expire):
+        self.token = token
+        self.state = state
+        self.on_expire = on_expire
+        self.detached_at = time.monotonic()
+        self._expire_task = asyncio.create_task(self._expire())
+
+    async def _expire(self):
+        await asyncio.sleep(STT_RESUME_TTL)
+        if _detached.get(self.token) is self:
+            del _detached[self.token]
+            logging.info(f"재연결 대기 만료로 세션 종료: {self.token}")
+            await self.on_expire()
+
+
+def new_session_token() -> str:
+    return uuid.uuid4().hex
+
+
+def detach_session(token: str, state: dict, on_expire):
+    """
+    연결이 끊긴 세션을 STT_RESUME_TTL초 동안 보관하는 함수
+    그 안에 resume_session()으로 가져가지 않으면 on_expire()로 정리합니다.
+    """
+    _detached[token] = DetachedSession(token, state, on_expire)
+
+
+def resume_session(token: str):
+    """보관 중인 세션 상태를 꺼내는 함수 (없거나 만료되었으면 None)"""
+    session = _detached.pop(token, None)
+    if session is None:
+        return None
+    session._expire_task.cancel()
+    return session.state
+
+
+async def close_detached_sessions():
+    """애플리케이션 종료 시 보관 중인 세션 정리"""
+    sessions = list(_detached.values())
+    _detached.clear()
+    for session in sessions:
+        session._expire_task.cancel()
+    await asyncio.gather(*(session.on_expire() for session in sessions), return_exceptions=True)
+
+
+def get_resume_stats() -> dict:
+    now = time.monotonic()
+    return {
+        "detached_sessions": len(_detached),
+        "ttl_seconds": STT_RESUME_TTL,
+        "oldest_detached_seconds": round(max((now - s.detached_at for s in _detached.values()), default=0.0), 2),
+    }
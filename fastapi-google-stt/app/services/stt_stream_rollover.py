@@ -0,0 +1,86 @@
+# stt_stream_rollover.py - 스트림 교체 시 경계 구간 결과 병합
+import os
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Google 스트리밍 인식은 스트림 하나당 약 5분으로 제한되므로 그 전에 교체
+STT_STREAM_ROLLOVER_SECONDS = float(os.getenv("STT_STREAM_ROLLOVER_SECONDS", "240"))
+# 새 스트림에 다시 보내는 직전 오디오 길이 (초)
+STT_ROLLOVER_OVERLAP_SECONDS = float(os.getenv("STT_ROLLOVER_OVERLAP_SECONDS", "2"))
+
+# 겹침 판단에 사용할 이전 최종 결과 개수
+_RECENT_FINALS = 3
+
+
+def trim_overlap(previous_text: str, text: str) -> str:
+    """
+    text 앞부분이 previous_text 끝부분과 겹치면 겹친 단어를 제거하는 함수
+    """
+    previous_words = previous_text.split()
+    words = text.split()
+
+    for size in range(min(len(previous_words), len(words)), 0, -1):
+        if previous_words[-size:] == words[:size]:
+            return " ".join(words[size:])
+    return text
+
+
+class RolloverMerger:
+    """
+    여러 세대(generation)의 STT 스트림 결과를 하나의 결과 흐름으로 합치는 클래스
+
+    - 새 스트림은 이전 스트림의 마지막 overlap 초를 다시 듣기 때문에,
+      재전송 구간 안에서 끝나는 최종 결과는 버리고 경계에 걸친 최종 결과는
+      이전 최종 결과와 겹치는 단어를 잘라냅니다.
+    - 이전 스트림이 남은 결과를 마무리하는 동안에는 새 스트림의 중간 결과를 숨깁니다.
+    """
+
+    def __init__(self, response_queue, overlap_seconds: float = STT_ROLLOVER_OVERLAP_SECONDS):
+        self.response_queue = response_queue
+        self.overlap_seconds = overlap_seconds
+        self.generation = 0
+        self._active = set()
+        self._boundary_pending = set()
+        self._recent_finals = deque(maxlen=_RECENT_FINALS)
+
+    def open(self, generation: int, replay: bool = True):
+        """새 스트림 세대 시작 (replay: 이전 스트림의 마지막 오디오를 다시 보내는지 여부)"""
+        self.generation = generation
+        self._active.add(generation)
+        if generation > 0 and replay:
+            self._boundary_pending.add(generation)
+
+    def close(self, generation: int):
+        """스트림 세대 종료"""
+        self._active.discard(generation)
+
+    async def emit(self, generation: int, result: dict):
+        """스트림 결과를 중복 제거 후 response_queue로 전달"""
+        if "error" in result:
+            await self.response_queue.put(result)
+            return
+
+        older_active = any(g < generation for g in self._active)
+
+        if not result["is_final"]:
+            # 이전 스트림이 아직 마무리 중이면 새 스트림의 중간 결과는 숨김
+            if generation == self.generation and older_active:
+                return
+            await self.response_queue.put(result)
+            return
+
+        if generation in self._boundary_pending:
+            end_offset = result.get("end_offset")
+            if end_offset is not None and end_offset <= self.overlap_seconds:
+                # 이전 스트림이 이미 인식한 재전송 구간
+                return
+            self._boundary_pending.discard(generation)
+            transcript = trim_overlap(" ".join(self._recent_finals), result["transcript"].strip())
+            if not transcript:
+                return
+            result = {**result, "transcript": transcript}
+
+        self._recent_finals.append(result["transcript"].strip())
+        await self.response_queue.put(result)
@@ -0,0 +1,66 @@
+# stt_translation_pipeline.py - WebSocket STT 최종 결과를 서버에서 바로 번역
+import asyncio
+import logging
+from app.services.openai_service import stream_translation
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationPipeline:
+    """
+    최종 결과를 순서대로 번역해 같은 WebSocket으로 토큰을 보내는 파이프라인
+
+    번역은 별도 태스크에서 진행되므로 음성 인식과 동시에 진행되며,
+    문장 순서가 섞이지 않도록 한 세션 안에서는 제출된 순서대로 번역합니다.
+    - {"type": "translation", "id": n, "lang": 언어, "text": 토큰}
+    - {"type": "translation_done", "id": n, "lang": 언어}
+    id는 같은 세션의 "final" 메시지 id와 같습니다.
+    """
+
+    def __init__(self, send, lang: str):
+        self.send = send
+        self.lang = lang
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, segment_id: int, text: str):
+        """번역할 최종 결과 등록"""
+        self._queue.put_nowait((segment_id, text))
+
+    async def close(self):
+        """등록된 번역을 모두 마친 뒤 종료"""
+        self._queue.put_nowait(None)
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def cancel(self):
+        self._task.cancel()
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            segment_id, text = item
+            try:
+                async for token in stream_translation(text, self.lang):
+                    await self.send({
+                        "type": "translation",
+                        "id": segment_id,
+                        "lang": self.lang,
+                        "text": token,
+                    })
+                await self.send({
+                    "type": "translation_done",
+                    "id": segment_id,
+                    "lang": self.lang,
+                })
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"번역 오류: {str(e)}")
+                await self.send({
+                    "type": "error",
+                    "id": segment_id,
+                    "message": f"번역 오류: {str(e)}",
+                })
@@ -0,0 +1,277 @@
+# stt_upload_service.py - 긴 오디오 파일을 무음 구간에서 나눠 병렬로 인식
+import os
+import json
+import wave
+import asyncio
+import logging
+import tempfile
+import numpy as np
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile
+from app.services.stt_backend import get_stt_backend, ENCODING_LINEAR16
+from app.services.voice_activity_detector import classify_frames, VAD_FRAME_BYTES, VAD_FRAME_MS
+from app.services.audio_decoder import FFMPEG_PATH
+
+load_dotenv()
+
+# 구간 길이 목표 / 최대 (초) - 목표 길이를 넘긴 뒤 처음 나오는 무음에서 자르고, 최대 길이에서는 강제로 자름
+STT_SEGMENT_TARGET_SECONDS = float(os.getenv("STT_SEGMENT_TARGET_SECONDS", "30"))
+STT_SEGMENT_MAX_SECONDS = float(os.getenv("STT_SEGMENT_MAX_SECONDS", "60"))
+# 자를 수 있는 최소 무음 길이 (밀리초)
+STT_SEGMENT_MIN_SILENCE_MS = int(os.getenv("STT_SEGMENT_MIN_SILENCE_MS", "300"))
+# 동시에 인식하는 구간 수
+STT_UPLOAD_WORKERS = int(os.getenv("STT_UPLOAD_WORKERS", "4"))
+
+SAMPLE_RATE = 16000
+AUDIO_BYTES_PER_SECOND = SAMPLE_RATE * 2
+# 업로드 저장 / 구간 분석 단위
+UPLOAD_READ_BYTES = 1024 * 1024
+SCAN_BLOCK_SECONDS = 10
+# 인식 요청 하나에 담는 오디오 크기 (0.5초)
+SEGMENT_CHUNK_BYTES = AUDIO_BYTES_PER_SECOND // 2
+
+
+async def save_upload(file: UploadFile) -> str:
+    """업로드 파일을 메모리에 모으지 않고 임시 파일로 저장하는 함수"""
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                data = await file.read(UPLOAD_READ_BYTES)
+                if not data:
+                    break
+                await asyncio.to_thread(out.write, data)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def _copy_wav_frames(path: str, pcm_path: str) -> bool:
+    """16kHz 모노 16-bit WAV면 프레임만 복사하고 True (그 외 형식이면 False)"""
+    try:
+        with wave.open(path, "rb") as source:
+            if (source.getframerate(), source.getnchannels(), source.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                return False
+            with open(pcm_path, "wb") as out:
+                while True:
+                    frames = source.readframes(UPLOAD_READ_BYTES // 2)
+                    if not frames:
+                        break
+                    out.write(frames)
+        return True
+    except (wave.Error, EOFError):
+        return False
+
+
+async def decode_to_pcm(path: str) -> str:
+    """
+    저장한 업로드를 16kHz 모노 LINEAR16 파일로 변환하는 함수
+    .pcm/.raw는 그대로 사용하고, 16kHz 모노 WAV는 직접 읽으며, 그 외 형식은 ffmpeg로 변환합니다.
+    """
+    if path.endswith((".pcm", ".raw")):
+        return path
+
+    fd, pcm_path = tempfile.mkstemp(suffix=".pcm")
+    os.close(fd)
+
+    if path.endswith(".wav") and await asyncio.to_thread(_copy_wav_frames, path, pcm_path):
+        return pcm_path
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-y",
+            "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), pcm_path,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        os.remove(pcm_path)
+        raise HTTPException(status_code=415, detail=f"16kHz 모노 WAV 외의 형식은 ffmpeg가 필요합니다: {str(e)}")
+
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        os.remove(pcm_path)
+        raise HTTPException(status_code=415, detail=f"오디오 변환 실패: {stderr.decode(errors='replace').strip()}")
+    return pcm_path
+
+
+def split_at_silence(pcm_path: str):
+    """
+    LINEAR16 파일을 무음 구간에서 나눈 (시작 바이트, 끝 바이트) 목록을 만드는 제너레이터
+
+    파일을 SCAN_BLOCK_SECONDS 단위로 읽어 VAD로 프레임별 음성 여부를 판정하고,
+    구간이 STT_SEGMENT_TARGET_SECONDS를 넘은 뒤 STT_SEGMENT_MIN_SILENCE_MS 이상 무음이 나오면
+    무음 한가운데에서 자릅니다. STT_SEGMENT_MAX_SECONDS를 넘으면 무음이 없어도 자르며,
+    음성 프레임이 하나도 없는 구간은 건너뜁니다.
+    """
+    frame_bytes = VAD_FRAME_BYTES
+    frame_seconds = VAD_FRAME_MS / 1000
+    target_frames = int(STT_SEGMENT_TARGET_SECONDS / frame_seconds)
+    max_frames = int(STT_SEGMENT_MAX_SECONDS / frame_seconds)
+    min_silence_frames = max(1, STT_SEGMENT_MIN_SILENCE_MS // VAD_FRAME_MS)
+    block_frames = int(SCAN_BLOCK_SECONDS / frame_seconds)
+
+    segment_start = 0      # 현재 구간 시작 프레임
+    frame_index = 0        # 다음에 판정할 프레임
+    silence_run = 0        # 연속 무음 프레임 수
+    has_voice = False
+
+    with open(pcm_path, "rb") as f:
+        while True:
+            data = f.read(block_frames * frame_bytes)
+            usable = len(data) - len(data) % frame_bytes
+            if usable == 0:
+                break
+
+            samples = np.frombuffer(data[:usable], dtype="<i2").reshape(-1, frame_bytes // 2)
+            for voiced in classify_frames(samples):
+                frame_index += 1
+                if voiced:
+                    has_voice = True
+                    silence_run = 0
+                else:
+                    silence_run += 1
+
+                length = frame_index - segment_start
+                cut_at = None
+                if length >= target_frames and silence_run >= min_silence_frames:
+                    cut_at = frame_index - silence_run // 2
+                elif length >= max_frames:
+                    cut_at = frame_index
+
+                if cut_at is not None:
+                    if has_voice:
+                        yield segment_start * frame_bytes, cut_at * frame_bytes
+                    segment_start = cut_at
+                    has_voice = silence_run == 0
+                    silence_run = min(silence_run, frame_index - cut_at)
+        # 프레임보다 짧은 꼬리까지 마지막 구간에 포함
+        file_end = f.tell()
+
+    if has_voice and frame_index > segment_start:
+        yield segment_start * frame_bytes, file_end - file_end % 2
+
+
+async def recognize_segment(pcm_path: str, start: int, end: int, lang: str) -> list:
+    """구간 하나를 인식해 최종 결과 목록을 반환하는 함수 (시각은 파일 기준 초)"""
+    def read_segment():
+        with open(pcm_path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    audio = await asyncio.to_thread(read_segment)
+    offset = start / AUDIO_BYTES_PER_SECOND
+
+    async def audio_chunks():
+        for position in range(0, len(audio), SEGMENT_CHUNK_BYTES):
+            yield audio[position:position + SEGMENT_CHUNK_BYTES]
+
+    backend = get_stt_backend()
+    results = []
+    segment_start = offset
+    async for result in backend.streaming_recognize(
+        audio_chunks(), lang, encoding=ENCODING_LINEAR16, interim_results=False
+    ):
+        transcript = result["transcript"].strip()
+        if not transcript:
+            continue
+        end_offset = result.get("end_offset")
+        result_end = offset + end_offset if end_offset is not None else end / AUDIO_BYTES_PER_SECOND
+        results.append({
+            "start": round(segment_start, 2),
+            "end": round(result_end, 2),
+            "text": transcript,
+            "confidence": result.get("confidence", 0.0),
+        })
+        segment_start = result_end
+    return results
+
+
+async def recognize_segments(pcm_path: str, lang: str = "ko-KR", workers: int = STT_UPLOAD_WORKERS):
+    """
+    PCM 파일을 구간별로 병렬 인식해 (구간 번호, 결과 목록 또는 예외)를 구간 순서대로 반환하는 비동기 제너레이터
+
+    workers개의 구간을 동시에 인식하며, 먼저 끝난 구간은 앞 구간이 끝날 때까지 보관했다가
+    순서대로 반환합니다. 보관 중인 구간이 많아지지 않도록 아직 반환하지 않은 구간이
+    workers의 두 배가 되면 다음 구간 인식을 시작하지 않습니다.
+    """
+    segments = split_at_silence(pcm_path)
+    window = asyncio.Semaphore(workers * 2)
+    running = asyncio.Semaphore(workers)
+    finished = {}              # 구간 번호 -> 결과 목록 또는 예외
+    ready = asyncio.Event()
+    tasks = []
+
+    async def run(index, start, end):
+        try:
+            async with running:
+                finished[index] = await recognize_segment(pcm_path, start, end, lang)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"구간 {index} 인식 오류: {str(e)}")
+            finished[index] = e
+        ready.set()
+
+    async def schedule():
+        # 구간 분석은 파일을 읽으므로 스레드에서 하나씩 꺼냄
+        index = 0
+        while True:
+            segment = await asyncio.to_thread(next, segments, None)
+            if segment is None:
+                break
+            await window.acquire()
+            tasks.append(asyncio.create_task(run(index, *segment)))
+            index += 1
+        return index
+
+    scheduler = asyncio.create_task(schedule())
+    next_index = 0
+    try:
+        while True:
+            if next_index in finished:
+                results = finished.pop(next_index)
+                window.release()
+                yield next_index, results
+                next_index += 1
+                continue
+
+            if scheduler.done() and next_index >= scheduler.result():
+                break
+
+            ready.clear()
+            waiters = [asyncio.ensure_future(ready.wait())]
+            if not scheduler.done():
+                waiters.append(scheduler)
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            waiters[0].cancel()
+    finally:
+        scheduler.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(scheduler, *tasks, return_exceptions=True)
+
+
+async def transcribe_pcm_file(pcm_path: str, lang: str = "ko-KR", cleanup_paths: tuple = ()):
+    """
+    PCM 파일을 구간별로 병렬 인식하고 결과를 시간 순서대로 SSE로 반환하는 비동기 제너레이터
+    끝나거나 연결이 끊기면 pcm_path와 cleanup_paths 파일을 삭제합니다.
+    - data: {"segment", "start", "end", "text", "confidence"}  (구간 안의 최종 결과마다)
+    - data: {"segment", "error"}  (구간 인식 실패)
+    - data: [DONE]
+    """
+    try:
+        async for index, results in recognize_segments(pcm_path, lang):
+            if isinstance(results, Exception):
+                yield f"data: {json.dumps({'segment': index, 'error': str(results)}, ensure_ascii=False)}\n\n"
+                continue
+            for result in results:
+                yield f"data: {json.dumps({'segment': index, **result}, ensure_ascii=False)}\n\n"
+
+        yield "data: [DONE]\n\n"
+    finally:
+        for path in {pcm_path, *cleanup_paths}:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,455 @@
+# transcript_writer.py - STT 최종 결과와 번역 원문을 스크립트 파일과 벡터 DB에 배치로 저장
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from fastapi import HTTPException
+from dotenv import load_dotenv
+from app.db.database import AsyncSessionLocal
+from app.services.log_script_service import get_script_file_path, append_lines
+from app.services.openai_vector_store import add_texts
+
+load_dotenv()
+
+TRANSCRIPT_BATCH_SIZE = int(os.getenv("TRANSCRIPT_BATCH_SIZE", "20"))
+TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "2"))
+TRANSCRIPT_MAX_RETRIES = int(os.getenv("TRANSCRIPT_MAX_RETRIES", "3"))
+TRANSCRIPT_RETRY_DELAY = float(os.getenv("TRANSCRIPT_RETRY_DELAY", "0.5"))
+
+# /openai/translate 원문 저장 (write-behind)
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "50"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5"))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "5"))
+WRITE_BEHIND_RETRY_DELAY = float(os.getenv("WRITE_BEHIND_RETRY_DELAY", "0.5"))
+# 저장 전 항목을 기록하는 저널 (비우면 사용하지 않음) - 비정상 종료 후 시작 시 다시 저장
+WRITE_BEHIND_JOURNAL_PATH = os.getenv("WRITE_BEHIND_JOURNAL_PATH", "write_behind_journal.jsonl")
+# 저널 줄 수가 이 값(그리고 완료되지 않은 항목 수의 2배) 이상이면 완료되지 않은 항목만 남기도록 다시 작성
+WRITE_BEHIND_JOURNAL_COMPACT_RECORDS = int(os.getenv("WRITE_BEHIND_JOURNAL_COMPACT_RECORDS", "10000"))
+# 스크립트 파일 경로 캐시 크기 / 유지 시간 (초) - 삭제된 스크립트는 최대 이 시간 뒤에 404
+WRITE_BEHIND_SCRIPT_CACHE_SIZE = int(os.getenv("WRITE_BEHIND_SCRIPT_CACHE_SIZE", "1000"))
+WRITE_BEHIND_SCRIPT_CACHE_TTL = float(os.getenv("WRITE_BEHIND_SCRIPT_CACHE_TTL", "60"))
+
+logger = logging.getLogger(__name__)
+
+# 실행 중인 writer (종료 시 남은 내용 저장)
+_writers = set()
+# 모든 writer의 저장 / 재시도 / 버린 줄 수
+_writer_stats = {"saved_lines": 0, "retries": 0, "dropped_lines": 0}
+
+
+class TranscriptWriter:
+    """
+    스크립트 하나의 최종 결과를 모아 저장하는 writer
+
+    add()는 메모리에만 쌓고 바로 반환하므로 응답 전송 경로를 막지 않습니다.
+    백그라운드 태스크가 TRANSCRIPT_BATCH_SIZE개가 모이거나
+    TRANSCRIPT_FLUSH_INTERVAL초가 지나면 파일 추가 1회 + 임베딩 1회로 저장합니다.
+    저장에 실패하면 지수 백오프로 TRANSCRIPT_MAX_RETRIES회까지 다시 시도하고,
+    그래도 실패한 줄 수는 get_transcript_writer_stats()의 dropped_lines로 집계합니다.
+    label이 있으면 각 줄 앞에 "[label] "을 붙입니다 (여러 마이크 채널 구분).
+    """
+
+    def __init__(self, script_id: str, file_path: str, label: str = None):
+        self.script_id = script_id
+        self.file_path = file_path
+        self.label = label
+        self._pending = []
+        self._wakeup = asyncio.Event()
+        # 저장은 한 번에 하나씩 (flush_script가 진행 중인 저장이 끝날 때까지 기다리도록)
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+        _writers.add(self)
+
+    def add(self, text: str):
+        """최종 결과 한 줄 추가"""
+        if self._closed:
+            return
+        if self.label:
+            text = f"[{self.label}] {text}"
+        self._pending.append(text)
+        if len(self._pending) >= TRANSCRIPT_BATCH_SIZE:
+            self._wakeup.set()
+
+    def close(self):
+        """남은 내용을 저장하고 종료하도록 요청 (기다리지 않음)"""
+        self._closed = True
+        self._wakeup.set()
+
+    async def wait_closed(self):
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=TRANSCRIPT_FLUSH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+                if self._closed:
+                    break
+        finally:
+            _writers.discard(self)
+
+    async def flush(self):
+        """쌓인 결과를 파일과 벡터 DB에 저장 (진행 중인 저장이 있으면 끝난 뒤 실행)"""
+        async with self._flush_lock:
+            await self._flush_pending()
+
+    async def _flush_pending(self):
+        if not self._pending:
+            return
+        lines, self._pending = self._pending, []
+
+        # 파일 추가가 끝난 뒤 임베딩만 실패하면 임베딩만 다시 시도 (파일에 중복 기록 방지)
+        file_saved = False
+        for attempt in range(TRANSCRIPT_MAX_RETRIES + 1):
+            try:
+                if not file_saved:
+                    await asyncio.to_thread(append_lines, self.file_path, lines)
+                    file_saved = True
+                await add_texts(lines, self.script_id)
+                _writer_stats["saved_lines"] += len(lines)
+                return
+            except Exception as e:
+                if attempt == TRANSCRIPT_MAX_RETRIES:
+                    logger.error(
+                        f"스크립트 저장 실패 ({self.script_id}, {attempt + 1}회 시도, {len(lines)}줄): {str(e)}"
+                    )
+                    break
+                logger.warning(f"스크립트 저장 오류, 다시 시도 ({self.script_id}): {str(e)}")
+                _writer_stats["retries"] += 1
+                await asyncio.sleep(TRANSCRIPT_RETRY_DELAY * 2 ** attempt)
+        _writer_stats["dropped_lines"] += len(lines)
+
+
+def get_transcript_writer_stats() -> dict:
+    return {"active_writers": len(_writers), **_writer_stats}
+
+
+async def open_transcript_writer(script_id: str, label: str = None) -> TranscriptWriter:
+    """
+    script_id의 파일 경로를 조회해 writer를 생성하는 함수
+    스크립트가 없으면 HTTPException(404)이 발생합니다.
+    """
+    async with AsyncSessionLocal() as db:
+        file_path = await get_script_file_path(db, script_id)
+    return TranscriptWriter(script_id, file_path, label)
+
+
+class ScriptWriteBehind:
+    """
+    번역 요청 원문을 응답과 분리해 저장하는 write-behind 파이프라인
+
+    enqueue()는 스크립트가 있는지 확인하고(파일 경로는 WRITE_BEHIND_SCRIPT_CACHE_TTL초 동안 캐시)
+    저널에 한 줄을 기록해 크기가 제한된 큐에 넣은 뒤 바로 반환하므로
+    번역 스트리밍이 파일 추가, 임베딩을 기다리지 않습니다 (큐가 가득 차면 대기).
+    백그라운드 태스크가 WRITE_BEHIND_BATCH_SIZE개 또는 WRITE_BEHIND_FLUSH_INTERVAL초마다
+    스크립트별로 묶어 파일 추가 1회 + 임베딩 1회로 저장하고, 실패하면 지수 백오프로
+    WRITE_BEHIND_MAX_RETRIES회까지 다시 시도합니다.
+    저장이 끝난 항목은 저널에 완료로 기록하며, 완료되지 않은 항목(비정상 종료, 재시도 초과)은
+    다음 시작 시 다시 저장합니다. 재시도를 초과한 항목은 실행 중에는 다시 시도하지 않고(dead)
+    대기 수에서 빼므로 flush()가 멈추지 않습니다. 저널 파일 작업은 이벤트 루프를 막지 않도록 스레드에서
+    순서대로 실행하고, 완료되지 않은 항목이 없거나 저널이 길어지면 남은 항목만으로 다시 작성합니다.
+    """
+
+    def __init__(self, journal_path: str = WRITE_BEHIND_JOURNAL_PATH):
+        self.journal_path = journal_path
+        self._queue = None
+        self._task = None
+        self._journal = None
+        self._journal_lock = asyncio.Lock()  # 저널 기록 / 재작성 순서 보장
+        self._journal_records = 0            # 현재 저널 파일의 줄 수
+        self._outstanding = {}               # seq -> 완료 기록되지 않은 항목 (저널 재작성 시 유지)
+        self._seq = 0
+        self._pending = {}           # script_id -> 저장 대기 중인 항목 수
+        self._oldest = {}            # seq -> 큐에 넣은 시각 (지연시간 계산용)
+        self._file_paths = OrderedDict()  # script_id -> (스크립트 파일 경로, 조회 시각), LRU
+        self._saved = asyncio.Condition()
+
+        self.enqueued = 0
+        self.saved = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+        self.dead = 0  # 재시도를 초과해 다음 시작 시 다시 저장할 항목 수
+        self.replayed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def _open_journal(self) -> list:
+        """저널에서 완료되지 않은 항목을 읽고, 남은 항목만으로 저널을 새로 작성"""
+        if not self.journal_path:
+            return []
+        entries = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 기록 도중 중단된 마지막 줄
+                    if "ack" in record:
+                        for seq in record["ack"]:
+                            entries.pop(seq, None)
+                    elif "file_ack" in record:
+                        # 파일에는 추가된 항목 - 다시 저장할 때 임베딩만 수행
+                        for seq in record["file_ack"]:
+                            if seq in entries:
+                                entries[seq]["file_saved"] = True
+                    else:
+                        entries[record["seq"]] = record
+        self._rewrite_journal(list(entries.values()))
+        return list(entries.values())
+
+    def _rewrite_journal(self, entries: list):
+        """완료되지 않은 항목만으로 저널을 새로 작성 (임시 파일 작성 후 교체)"""
+        if self._journal is not None:
+            self._journal.close()
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+        os.replace(temp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_records = len(entries)
+
+    def _append_journal(self, record: dict):
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        self._journal_records += 1
+
+    async def _write_journal(self, record: dict):
+        if self._journal is None:
+            return
+        async with self._journal_lock:
+            await asyncio.to_thread(self._append_journal, record)
+
+    async def _compact_journal(self):
+        """완료되지 않은 항목이 없거나 저널이 길어졌으면 남은 항목만으로 다시 작성"""
+        if self._journal is None:
+            return
+        async with self._journal_lock:
+            threshold = max(WRITE_BEHIND_JOURNAL_COMPACT_RECORDS, 2 * len(self._outstanding))
+            if self._journal_records == 0 or (self._outstanding and self._journal_records < threshold):
+                return
+            await asyncio.to_thread(self._rewrite_journal, list(self._outstanding.values()))
+
+    def _track(self, entry: dict):
+        """큐에 들어간 항목을 flush() 대기 수와 지연시간 계산에 반영"""
+        self._pending[entry["script_id"]] = self._pending.get(entry["script_id"], 0) + 1
+        self._oldest[entry["seq"]] = time.monotonic()
+
+    async def start(self):
+        """저널에 남은 항목을 다시 저장하도록 큐에 넣고 백그라운드 태스크 시작"""
+        if self._task is not None:
+            return
+        replay = await asyncio.to_thread(self._open_journal)
+        self._seq = max((entry["seq"] for entry in replay), default=0)
+        # 재시작 시 남은 항목은 큐 크기와 관계없이 모두 다시 저장
+        self._queue = asyncio.Queue(maxsize=max(WRITE_BEHIND_QUEUE_SIZE, len(replay)))
+        for entry in replay:
+            self._outstanding[entry["seq"]] = entry
+            self._track(entry)
+            self._queue.put_nowait(entry)
+        self.replayed += len(replay)
+        if replay:
+            logger.info(f"저장되지 않은 번역 원문 {len(replay)}건을 다시 저장합니다")
+        self._task = asyncio.create_task(self._run())
+
+    async def get_file_path(self, script_id: str) -> str:
+        """
+        script_id의 스크립트 파일 경로를 조회하는 함수 (찾은 경로는 캐시)
+        script_id가 없으면 HTTPException(400), 스크립트가 없으면 HTTPException(404)이 발생합니다.
+        """
+        if not script_id:
+            raise HTTPException(status_code=400, detail="x-script-id header is required")
+        cached = self._file_paths.get(script_id)
+        if cached is not None and time.monotonic() - cached[1] < WRITE_BEHIND_SCRIPT_CACHE_TTL:
+            self._file_paths.move_to_end(script_id)
+            return cached[0]
+
+        async with AsyncSessionLocal() as db:
+            file_path = await get_script_file_path(db, script_id)
+        self._file_paths[script_id] = (file_path, time.monotonic())
+        self._file_paths.move_to_end(script_id)
+        while len(self._file_paths) > WRITE_BEHIND_SCRIPT_CACHE_SIZE:
+            self._file_paths.popitem(last=False)
+        return file_path
+
+    def forget(self, script_id: str):
+        """캐시한 스크립트 파일 경로 삭제 (스크립트 삭제, 저장 실패 시)"""
+        self._file_paths.pop(script_id, None)
+
+    async def enqueue(self, script_id: str, text: str):
+        """
+        저장할 원문 등록 (저장을 기다리지 않음)
+        스크립트가 없으면 등록하지 않고 HTTPException(400/404)을 그대로 전달합니다.
+        """
+        await self.get_file_path(script_id)
+        await self.start()
+        self._seq += 1
+        entry = {"seq": self._seq, "script_id": script_id, "text": text}
+        # 저널 재작성 시 빠지지 않도록 기록 전에 등록하고, 큐에 넣지 못하면(요청 취소 등) 되돌림
+        self._outstanding[entry["seq"]] = entry
+        try:
+            await self._write_journal(entry)
+            await self._queue.put(entry)
+        except BaseException:
+            self._outstanding.pop(entry["seq"], None)
+            raise
+        # put() 이후에는 await가 없으므로 저장 태스크보다 먼저 반영됨
+        self._track(entry)
+        self.enqueued += 1
+
+    async def flush(self, script_id: str):
+        """script_id에 대해 지금까지 등록된 원문이 모두 저장될 때까지 대기"""
+        if self._task is None:
+            return
+        async with self._saved:
+            await self._saved.wait_for(lambda: not self._pending.get(script_id) or self._task.done())
+
+    async def close(self):
+        """남은 항목을 모두 저장하고 종료"""
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await asyncio.gather(self._task, return_exceptions=True)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = time.monotonic() + WRITE_BEHIND_FLUSH_INTERVAL
+            while len(batch) < WRITE_BEHIND_BATCH_SIZE:
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                batch.append(entry)
+            await self._save_batch(batch)
+
+    async def _save_batch(self, batch: list):
+        by_script = {}
+        for entry in batch:
+            by_script.setdefault(entry["script_id"], []).append(entry)
+
+        saved = await asyncio.gather(*(self._save_script(script_id, entries) for script_id, entries in by_script.items()))
+        acked = [entry["seq"] for entries, ok in zip(by_script.values(), saved) if ok for entry in entries]
+        for seq in acked:
+            self._outstanding.pop(seq, None)
+        # 재시도를 초과한 항목은 저널(_outstanding)에만 남기고 아래에서 대기 수는 줄임
+        self.dead += len(batch) - len(acked)
+        file_saved = [entry["seq"] for entry in batch if entry.get("file_saved") and entry["seq"] in self._outstanding]
+        if file_saved:
+            await self._write_journal({"file_ack": file_saved})
+
+        now = time.monotonic()
+        for entry in batch:
+            lag = now - self._oldest.pop(entry["seq"], now)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+        self.batches += 1
+        if acked:
+            await self._write_journal({"ack": acked})
+        await self._compact_journal()
+
+        # 저장 여부와 관계없이 처리가 끝났으므로 flush() 대기를 해제
+        async with self._saved:
+            for script_id, entries in by_script.items():
+                remaining = self._pending.get(script_id, 0) - len(entries)
+                if remaining > 0:
+                    self._pending[script_id] = remaining
+                else:
+                    self._pending.pop(script_id, None)
+            self._saved.notify_all()
+
+    async def _save_script(self, script_id: str, entries: list) -> bool:
+        """
+        스크립트 하나의 원문을 파일과 벡터 DB에 저장 (단계별로 재시도)
+        재시도 후에도 실패하면 False를 반환해 저널에 남기고, 다음 시작 시 다시 저장합니다.
+        파일에 추가한 항목은 file_saved로 표시해 다시 저장할 때 파일에 중복으로 추가하지 않습니다.
+        """
+        lines = [entry["text"] for entry in entries]
+        for attempt in range(WRITE_BEHIND_MAX_RETRIES + 1):
+            try:
+                unsaved = [entry for entry in entries if not entry.get("file_saved")]
+                if unsaved:
+                    file_path = await self.get_file_path(script_id)
+                    await asyncio.to_thread(append_lines, file_path, [entry["text"] for entry in unsaved])
+                    for entry in unsaved:
+                        entry["file_saved"] = True
+                await add_texts(lines, script_id)
+                self.saved += len(entries)
+                return True
+            except HTTPException as e:
+                # 스크립트가 없으면 다시 시도해도 실패하므로 버림
+                logger.error(f"번역 원문 저장 실패 ({script_id}): {e.detail}")
+                self.forget(script_id)
+                self.failed += len(entries)
+                return True
+            except Exception as e:
+                # 스크립트가 삭제되었을 수 있으므로 다음 시도에서 경로를 다시 조회
+                self.forget(script_id)
+                if attempt == WRITE_BEHIND_MAX_RETRIES:
+                    logger.error(f"번역 원문 저장 실패 ({script_id}, {attempt + 1}회 시도): {str(e)}")
+                    break
+                self.retries += 1
+                await asyncio.sleep(WRITE_BEHIND_RETRY_DELAY * 2 ** attempt)
+        self.failed += len(entries)
+        return False
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": WRITE_BEHIND_QUEUE_SIZE,
+            "pending_scripts": len(self._pending),
+            "cached_scripts": len(self._file_paths),
+            "oldest_lag_seconds": round(max((now - t for t in self._oldest.values()), default=0.0), 3),
+            "last_lag_seconds": round(self.last_lag, 3),
+            "max_lag_seconds": round(self.max_lag, 3),
+            "enqueued": self.enqueued,
+            "saved": self.saved,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed": self.failed,
+            "dead": self.dead,
+            "replayed": self.replayed,
+            "journal_records": self._journal_records,
+            "journal_outstanding": len(self._outstanding),
+        }
+
+
+# /openai/translate 원문 저장 파이프라인
+script_write_behind = ScriptWriteBehind()
+
+
+async def flush_script(script_id: str):
+    """
+    script_id의 저장 대기 중인 내용(번역 원문, STT 최종 결과)을 모두 저장하는 함수
+    요약 / 질의응답처럼 방금 기록한 내용을 읽어야 하는 곳에서 먼저 호출합니다.
+    """
+    await script_write_behind.flush(script_id)
+    await asyncio.gather(*(writer.flush() for writer in list(_writers) if writer.script_id == script_id))
+
+
+async def close_transcript_writers():
+    """애플리케이션 종료 시 모든 writer의 남은 내용을 저장"""
+    writers = list(_writers)
+    for writer in writers:
+        writer.close()
+    await asyncio.gather(*(writer.wait_closed() for writer in writers))
@@ -0,0 +1,243 @@
+# translation_batcher.py - 동시에 들어온 짧은 번역 요청을 하나의 LLM 호출로 묶어 처리
+import os
+import re
+import asyncio
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRANSLATION_BATCH_ENABLED = os.getenv("TRANSLATION_BATCH_ENABLED", "false").lower() == "true"
+# 첫 요청 이후 다른 요청을 기다리는 시간 (밀리초)
+TRANSLATION_BATCH_WINDOW_MS = float(os.getenv("TRANSLATION_BATCH_WINDOW_MS", "20"))
+# 한 번에 묶는 최대 요청 수 / 입력 토큰 예산 (추정치)
+TRANSLATION_BATCH_MAX_ITEMS = int(os.getenv("TRANSLATION_BATCH_MAX_ITEMS", "16"))
+TRANSLATION_BATCH_TOKEN_BUDGET = int(os.getenv("TRANSLATION_BATCH_TOKEN_BUDGET", "1500"))
+# 이보다 긴 문장은 묶지 않고 개별 요청으로 번역
+TRANSLATION_BATCH_MAX_TEXT_LENGTH = int(os.getenv("TRANSLATION_BATCH_MAX_TEXT_LENGTH", "300"))
+
+BATCH_TEMPLATE = (
+    "다음 항목들을 각각 [ ] 안의 언어로 번역해주세요.\n"
+    "입력과 같은 순서로 항목마다 한 줄씩 \"<<번호>> 번역문\" 형식으로만 출력하고, "
+    "번역문 안에는 줄바꿈이나 다른 설명을 넣지 마세요.\n\n"
+    "{items}"
+)
+
+# 출력 줄 앞의 항목 번호 표시
+_MARKER = re.compile(r"<<(\d+)>>[ \t]*")
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """입력 토큰 수 대략 추정 (UTF-8 3바이트당 1토큰)"""
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def is_batchable(text: str) -> bool:
+    return len(text) <= TRANSLATION_BATCH_MAX_TEXT_LENGTH and "\n" not in text
+
+
+class _BatchItem:
+    def __init__(self, text: str, lang: str):
+        self.text = text
+        self.lang = lang
+        self.tokens = estimate_tokens(text) + estimate_tokens(lang) + 4
+        self.queue = asyncio.Queue()  # 토큰, 예외 또는 None(끝)
+        self.started = False
+        self.done = False
+
+    def emit(self, token: str):
+        if token and not self.done:
+            self.started = True
+            self.queue.put_nowait(token)
+
+    def finish(self, error: Exception = None):
+        if not self.done:
+            self.done = True
+            self.queue.put_nowait(error)
+
+
+class BatchOutputParser:
+    """
+    "<<번호>> 번역문" 줄 단위 출력을 스트리밍으로 나눠 각 항목에 전달하는 파서
+    줄 앞의 번호를 읽은 뒤에는 줄바꿈이 나올 때까지 받은 토큰을 바로 해당 항목으로 보냅니다.
+    """
+
+    def __init__(self, items: list):
+        self.items = items
+        self._buffer = ""
+        self._current = None
+
+    def feed(self, text: str):
+        self._buffer += text
+        while self._buffer:
+            if self._current is None:
+                stripped = self._buffer.lstrip()
+                match = _MARKER.match(stripped)
+                if match is None:
+                    newline = stripped.find("\n")
+                    if newline < 0:
+                        # 번호 표시가 아직 다 도착하지 않았을 수 있음
+                        self._buffer = stripped
+                        return
+                    self._buffer = stripped[newline + 1:]  # 형식에 맞지 않는 줄은 버림
+                    continue
+                if match.end() == len(stripped) and not stripped.endswith((" ", "\t")):
+                    # 번호 뒤 공백이 다음 토큰으로 올 수 있으므로 대기
+                    self._buffer = stripped
+                    return
+                index = int(match.group(1))
+                self._current = self.items[index] if index < len(self.items) else None
+                self._buffer = stripped[match.end():]
+                if self._current is None:
+                    newline = self._buffer.find("\n")
+                    self._buffer = self._buffer[newline + 1:] if newline >= 0 else ""
+                    continue
+
+            newline = self._buffer.find("\n")
+            if newline < 0:
+                self._current.emit(self._buffer)
+                self._buffer = ""
+                return
+            self._current.emit(self._buffer[:newline].rstrip())
+            self._end_current()
+            self._buffer = self._buffer[newline + 1:]
+
+    def close(self):
+        if self._current is not None:
+            self._current.emit(self._buffer.rstrip())
+            self._end_current()
+        self._buffer = ""
+
+    def _end_current(self):
+        # 빈 번역은 끝내지 않고 남겨 두어 개별 번역으로 다시 처리
+        if self._current.started:
+            self._current.finish()
+        self._current = None
+
+
+class TranslationBatcher:
+    """
+    짧은 번역 요청을 TRANSLATION_BATCH_WINDOW_MS 동안 모아 하나의 프롬프트로 번역하는 스케줄러
+
+    첫 요청이 들어오면 창(window)이 열리고, 창이 닫히거나 요청 수가 TRANSLATION_BATCH_MAX_ITEMS,
+    추정 입력 토큰이 TRANSLATION_BATCH_TOKEN_BUDGET에 도달하면 묶음을 보냅니다.
+    출력은 줄 단위로 나눠 각 호출자의 스트림으로 바로 전달하므로 호출자는 개별 요청과 같은
+    토큰 스트림을 받습니다. 묶음 출력에서 빠진 항목(토큰을 하나도 받지 못한 경우)은
+    translate_single로 다시 번역하며, 요청이 하나뿐인 창도 translate_single로 처리합니다.
+    """
+
+    def __init__(self, model, translate_single):
+        self.model = model
+        self.translate_single = translate_single
+        self.window = TRANSLATION_BATCH_WINDOW_MS / 1000
+        self._pending = []
+        self._pending_tokens = 0
+        self._timer = None
+        self._tasks = set()
+
+        self.batches = 0
+        self.batched_items = 0
+        self.single_items = 0
+        self.fallbacks = 0
+        self.llm_requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    async def translate(self, text: str, lang: str):
+        """번역 토큰을 반환하는 비동기 제너레이터"""
+        item = _BatchItem(text, lang)
+        self._submit(item)
+        while True:
+            token = await item.queue.get()
+            if token is None:
+                return
+            if isinstance(token, Exception):
+                raise token
+            yield token
+
+    def _submit(self, item: _BatchItem):
+        if self._pending and self._pending_tokens + item.tokens > TRANSLATION_BATCH_TOKEN_BUDGET:
+            self._flush()
+        self._pending.append(item)
+        self._pending_tokens += item.tokens
+        if len(self._pending) >= TRANSLATION_BATCH_MAX_ITEMS or self._pending_tokens >= TRANSLATION_BATCH_TOKEN_BUDGET:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending, self._pending_tokens = self._pending, [], 0
+        if not items:
+            return
+        if len(items) == 1:
+            self.single_items += 1
+            self._spawn(self._run_single(items[0]))
+        else:
+            self._spawn(self._run_batch(items))
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_single(self, item: _BatchItem):
+        try:
+            async for token in self.translate_single(item.text, item.lang):
+                item.emit(token)
+            item.finish()
+        except Exception as e:
+            item.finish(e)
+
+    async def _run_batch(self, items: list):
+        self.batches += 1
+        self.batched_items += len(items)
+        self.llm_requests += 1
+        prompt = BATCH_TEMPLATE.format(items="\n".join(
+            f"<<{index}>> [{item.lang}] {item.text}" for index, item in enumerate(items)
+        ))
+        parser = BatchOutputParser(items)
+        error = None
+        try:
+            async for chunk in self.model.astream(prompt):
+                usage = getattr(chunk, "usage_metadata", None)
+                if usage:
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+                if chunk.content:
+                    parser.feed(chunk.content)
+            parser.close()
+        except Exception as e:
+            logger.error(f"묶음 번역 오류: {str(e)}")
+            error = e
+
+        # 일부만 전달된 항목은 오류로 끝내고, 아무것도 받지 못한 항목은 개별 번역
+        missing = []
+        for item in items:
+            if item.done:
+                continue
+            if item.started:
+                item.finish(error or RuntimeError("묶음 번역 결과가 중간에 끊겼습니다"))
+            else:
+                missing.append(item)
+        if missing:
+            self.fallbacks += len(missing)
+            await asyncio.gather(*(self._run_single(item) for item in missing))
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": TRANSLATION_BATCH_ENABLED,
+            "window_ms": TRANSLATION_BATCH_WINDOW_MS,
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "single_items": self.single_items,
+            "fallbacks": self.fallbacks,
+            "llm_requests": self.llm_requests,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
@@ -0,0 +1,218 @@
+# translation_cache.py - 번역 결과 2단계 캐시 (메모리 LRU + 로컬 SQLite)
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRANSLATION_CACHE_ENABLED = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+# 이보다 긴 문장은 다시 나올 가능성이 낮으므로 캐시하지 않음
+TRANSLATION_CACHE_MAX_TEXT_LENGTH = int(os.getenv("TRANSLATION_CACHE_MAX_TEXT_LENGTH", "200"))
+# 메모리 캐시 항목 수 (LRU)
+TRANSLATION_CACHE_MEMORY_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MEMORY_ENTRIES", "2000"))
+# 디스크 캐시 경로 (비우면 메모리 캐시만 사용) / 항목 수 / 교체 정책 ("lru" 또는 "lfu")
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", "translation_cache.sqlite3")
+TRANSLATION_CACHE_DISK_ENTRIES = int(os.getenv("TRANSLATION_CACHE_DISK_ENTRIES", "100000"))
+TRANSLATION_CACHE_EVICTION = os.getenv("TRANSLATION_CACHE_EVICTION", "lru").lower()
+# 항목 유효 시간 (초, 0이면 만료 없음)
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", "0"))
+
+# 디스크 항목 수가 한도를 넘으면 한도의 이 비율만큼 한 번에 정리 (매 저장마다 정리하지 않도록)
+_DISK_EVICT_FRACTION = 0.05
+
+_EVICTION_ORDER = {
+    "lru": "last_used ASC",
+    "lfu": "hits ASC, last_used ASC",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 정규화 - 유니코드 정규화(NFKC) 후 공백 정리"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def make_cache_key(text: str, lang: str, version: str) -> str:
+    """정규화한 원문, 대상 언어, 프롬프트/모델 버전으로 만든 캐시 키"""
+    raw = "\0".join((version, lang.strip().lower(), normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    번역 토큰 목록을 저장하는 2단계 캐시
+
+    메모리(LRU)에서 먼저 찾고, 없으면 SQLite에서 찾아 메모리로 올립니다.
+    토큰 단위로 저장하므로 캐시 적중 시에도 원래와 같은 SSE 스트림을 재생할 수 있습니다.
+    디스크 항목은 TRANSLATION_CACHE_DISK_ENTRIES를 넘으면 TRANSLATION_CACHE_EVICTION 정책으로,
+    TRANSLATION_CACHE_TTL이 지나면 조회 시점에 삭제합니다.
+    SQLite 작업은 스레드에서 실행되며 하나의 연결을 잠금으로 보호합니다.
+    """
+
+    def __init__(
+        self,
+        path: str = TRANSLATION_CACHE_PATH,
+        memory_entries: int = TRANSLATION_CACHE_MEMORY_ENTRIES,
+        disk_entries: int = TRANSLATION_CACHE_DISK_ENTRIES,
+        eviction: str = TRANSLATION_CACHE_EVICTION,
+        ttl: float = TRANSLATION_CACHE_TTL,
+    ):
+        if eviction not in _EVICTION_ORDER:
+            raise ValueError(f"Unsupported eviction policy: {eviction}")
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.eviction = eviction
+        self.ttl = ttl
+
+        self._memory = OrderedDict()  # key -> (저장 시각, 토큰 목록)
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_count = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        self.expired = 0
+
+    def _connect(self):
+        if self._db is None and self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translation_cache ("
+                "key TEXT PRIMARY KEY, tokens TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_translation_cache_last_used ON translation_cache (last_used)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM translation_cache").fetchone()[0]
+        return self._db
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - created_at > self.ttl
+
+    def _remember(self, key: str, created_at: float, tokens: list):
+        self._memory[key] = (created_at, tokens)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def _get_disk(self, key: str, now: float):
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return None
+            row = db.execute("SELECT tokens, created_at FROM translation_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            tokens, created_at = row
+            if self._is_expired(created_at, now):
+                db.execute("DELETE FROM translation_cache WHERE key = ?", (key,))
+                db.commit()
+                self._disk_count -= 1
+                self.expired += 1
+                return None
+            db.execute("UPDATE translation_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            db.commit()
+            return created_at, json.loads(tokens)
+
+    def _put_disk(self, key: str, tokens: list, now: float):
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO translation_cache (key, tokens, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(tokens, ensure_ascii=False), now, now),
+            )
+            self._disk_count += cursor.rowcount
+            if self._disk_count > self.disk_entries:
+                count = self._disk_count - self.disk_entries + int(self.disk_entries * _DISK_EVICT_FRACTION)
+                # 방금 저장한 항목은 사용 횟수가 0이라 LFU에서 바로 지워지지 않도록 제외
+                cursor = db.execute(
+                    f"DELETE FROM translation_cache WHERE key IN ("
+                    f"SELECT key FROM translation_cache WHERE key != ? "
+                    f"ORDER BY {_EVICTION_ORDER[self.eviction]} LIMIT ?)",
+                    (key, count),
+                )
+                self._disk_count -= cursor.rowcount
+                self.disk_evictions += cursor.rowcount
+            db.commit()
+
+    async def get(self, key: str) -> list | None:
+        """캐시된 토큰 목록 조회 (없으면 None)"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._is_expired(entry[0], now):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            del self._memory[key]
+
+        try:
+            entry = await asyncio.to_thread(self._get_disk, key, now)
+        except sqlite3.Error as e:
+            logger.error(f"번역 캐시 조회 오류: {str(e)}")
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, *entry)
+        return entry[1]
+
+    async def put(self, key: str, tokens: list):
+        """번역 토큰 목록 저장"""
+        now = time.time()
+        self._remember(key, now, tokens)
+        self.stores += 1
+        try:
+            await asyncio.to_thread(self._put_disk, key, tokens, now)
+        except sqlite3.Error as e:
+            logger.error(f"번역 캐시 저장 오류: {str(e)}")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": TRANSLATION_CACHE_ENABLED,
+            "memory_entries": len(self._memory),
+            "memory_capacity": self.memory_entries,
+            "disk_entries": self._disk_count,
+            "disk_capacity": self.disk_entries if self.path else 0,
+            "eviction": self.eviction,
+            "ttl_seconds": self.ttl,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+            "expired": self.expired,
+        }
+
+
+# 애플리케이션 전체에서 공유하는 번역 캐시
+translation_cache = TranslationCache()
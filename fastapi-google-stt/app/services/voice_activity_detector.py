@@ -0,0 +1,138 @@
+# voice_activity_detector.py - LINEAR16 16kHz 음성 구간 검출 (에너지 + 영교차율)
+import os
+from collections import deque
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 기본은 사용하지 않음 - 조용한 화자의 음성이 잘릴 수 있으므로 환경에 맞게 VAD_ENERGY_DBFS를 조정한 뒤 사용
+VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() == "true"
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+VAD_ENERGY_DBFS = float(os.getenv("VAD_ENERGY_DBFS", "-45"))
+VAD_MAX_ZCR = float(os.getenv("VAD_MAX_ZCR", "0.35"))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "600"))
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "200"))
+# 무음 구간에서도 스트림이 끊기지 않도록 주기적으로 짧은 무음을 보냄
+VAD_KEEPALIVE_INTERVAL_MS = int(os.getenv("VAD_KEEPALIVE_INTERVAL_MS", "1000"))
+VAD_KEEPALIVE_FRAME_MS = int(os.getenv("VAD_KEEPALIVE_FRAME_MS", "100"))
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+# 에너지가 충분히 크면 영교차율과 무관하게 음성으로 판단
+_LOUD_MARGIN_DB = 15
+
+# 전체 세션 누적 지표
+_totals = {"sessions": 0, "bytes_received": 0, "bytes_forwarded": 0}
+
+
+def _ms_to_bytes(ms: int) -> int:
+    return SAMPLE_RATE * BYTES_PER_SAMPLE * ms // 1000
+
+
+# VAD 프레임 하나의 바이트 수
+VAD_FRAME_BYTES = _ms_to_bytes(VAD_FRAME_MS)
+
+
+def classify_frames(samples: np.ndarray) -> np.ndarray:
+    """
+    (프레임 수, 프레임 길이) 배열의 각 프레임이 음성인지 판정하는 함수
+
+    세션 지표를 남기지 않으므로 업로드 구간 분할처럼 스트림이 아닌 곳에서도 사용할 수 있습니다.
+    """
+    frames = samples.astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20.0 * np.log10(np.maximum(rms, 1e-10))
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    voiced = (energy_db > VAD_ENERGY_DBFS) & (zcr < VAD_MAX_ZCR)
+    return voiced | (energy_db > VAD_ENERGY_DBFS + _LOUD_MARGIN_DB)
+
+
+class VoiceActivityDetector:
+    """
+    오디오 청크에서 무음 구간을 걸러내는 VAD
+
+    프레임 단위 에너지(dBFS)와 영교차율은 NumPy로 한 번에 계산하고,
+    음성 판정 뒤에는 hangover 만큼 프레임을 더 보내 발화 끝이 잘리지 않게 합니다.
+    발화 시작 직전 preroll 프레임도 함께 보내며, 긴 무음은 keepalive 간격마다
+    짧은 무음 프레임으로 압축해 보냅니다.
+    """
+
+    def __init__(self):
+        self.frame_bytes = VAD_FRAME_BYTES
+        self.hangover_frames = max(0, VAD_HANGOVER_MS // VAD_FRAME_MS)
+        self.keepalive_frames = max(1, VAD_KEEPALIVE_INTERVAL_MS // VAD_FRAME_MS)
+        self.keepalive_chunk = bytes(_ms_to_bytes(VAD_KEEPALIVE_FRAME_MS))
+
+        self._pending = b""
+        self._preroll = deque(maxlen=max(0, VAD_PREROLL_MS // VAD_FRAME_MS))
+        self._hangover = 0
+        self._silent_frames = 0
+
+        self.bytes_received = 0
+        self.bytes_forwarded = 0
+        _totals["sessions"] += 1
+
+    def process(self, chunk: bytes) -> bytes:
+        """청크를 받아 STT로 보낼 오디오만 반환 (없으면 빈 바이트)"""
+        self.bytes_received += len(chunk)
+        _totals["bytes_received"] += len(chunk)
+
+        data = self._pending + chunk
+        frame_count = len(data) // self.frame_bytes
+        usable = frame_count * self.frame_bytes
+        self._pending = data[usable:]
+        if frame_count == 0:
+            return b""
+
+        samples = np.frombuffer(data[:usable], dtype="<i2").reshape(frame_count, -1)
+        voiced = classify_frames(samples)
+
+        output = []
+        for index, is_voiced in enumerate(voiced):
+            frame = data[index * self.frame_bytes:(index + 1) * self.frame_bytes]
+
+            if is_voiced:
+                # 발화 시작: 직전 preroll 프레임을 먼저 보냄
+                output.extend(self._preroll)
+                self._preroll.clear()
+                output.append(frame)
+                self._hangover = self.hangover_frames
+                self._silent_frames = 0
+            elif self._hangover > 0:
+                output.append(frame)
+                self._hangover -= 1
+            else:
+                self._preroll.append(frame)
+                self._silent_frames += 1
+                if self._silent_frames % self.keepalive_frames == 0:
+                    output.append(self.keepalive_chunk)
+
+        return self._forward(b"".join(output))
+
+    def flush(self) -> bytes:
+        """스트림 종료 시 남은 부분 프레임을 반환"""
+        pending, self._pending = self._pending, b""
+        return self._forward(pending if self._hangover > 0 else b"")
+
+    def _forward(self, data: bytes) -> bytes:
+        self.bytes_forwarded += len(data)
+        _totals["bytes_forwarded"] += len(data)
+        return data
+
+    @property
+    def forwarded_ratio(self) -> float:
+        return self.bytes_forwarded / self.bytes_received if self.bytes_received else 1.0
+
+
+def get_vad_stats() -> dict:
+    """전체 세션의 VAD 전송 비율 지표를 반환하는 함수"""
+    received = _totals["bytes_received"]
+    return {
+        "enabled": VAD_ENABLED,
+        **_totals,
+        "forwarded_ratio": _totals["bytes_forwarded"] / received if received else 1.0,
+    }
@@ -3,22 +3,79 @@ import os
 import json
 import logging
 import asyncio
-import threading
-import queue
 import time
+import uuid
+import functools
+from collections import deque
 from dotenv import load_dotenv
-from fastapi import WebSocket
-from google.cloud.speech_v2 import SpeechClient
-from google.cloud.speech_v2.types import cloud_speech as cloud_speech_types
+from fastapi import WebSocket, HTTPException
+from app.services.stt_backend import get_stt_backend
+from app.services.audio_ingest_buffer import AudioIngestBuffer, AudioBufferOverflowError
+from app.services.audio_ring_buffer import AudioRingBuffer
+from app.services.voice_activity_detector import VoiceActivityDetector, VAD_ENABLED
+from app.services.interim_protocol import InterimPublisher, PROTOCOL_FULL, PROTOCOLS
+from app.services.transcript_writer import open_transcript_writer
+from app.services.stt_translation_pipeline import TranslationPipeline
+from app.services.audio_decoder import open_audio_decoder, AudioDecodeError, AUDIO_FORMAT_LINEAR16, AUDIO_FORMATS
+from app.services.stt_session_registry import SessionOutput, new_session_token, detach_session, resume_session
+from app.services.stt_diagnostics import SessionDiagnostics, STAGE_INGEST_WAIT, STAGE_UPSTREAM_SEND, STAGE_DELIVERY
+from app.services.stt_stream_rollover import (
+    RolloverMerger,
+    STT_STREAM_ROLLOVER_SECONDS,
+    STT_ROLLOVER_OVERLAP_SECONDS,
+)
 
 # 환경 변수 로드
 load_dotenv()
-PROJECT_ID = os.getenv("PROJECT_ID")
+
+# 세션 종료 시 STT 태스크가 남은 결과를 정리할 때까지 기다리는 시간 (초)
+STT_SHUTDOWN_TIMEOUT = 2
+# 스트림별 전송 대기 청크 수 (수신 버퍼의 백프레셔가 유지되도록 작게 유지)
+STT_STREAM_QUEUE_SIZE = 4
+# LINEAR16 16kHz 모노 기준 초당 바이트 수
+AUDIO_BYTES_PER_SECOND = 16000 * 2
+# 연결 직후/세션 종료 후 다음 세션의 STT 스트림을 미리 열어 두는 warm standby 모드
+STT_WARM_STANDBY = os.getenv("STT_WARM_STANDBY", "false").lower() == "true"
+# 미리 연 스트림을 오디오 없이 유지하는 시간 (초) - Google은 약 10초간 오디오가 없으면 스트림을 끊음
+STT_STANDBY_TTL = float(os.getenv("STT_STANDBY_TTL", "8"))
+# 대기 세션을 교체하며 유지하는 최대 시간 (초) - 지나면 "start"까지 스트림을 열지 않음
+STT_STANDBY_MAX_IDLE_SECONDS = float(os.getenv("STT_STANDBY_MAX_IDLE_SECONDS", "60"))
+# 오디오가 이 시간(초) 동안 들어오지 않으면 Google 무음 제한 전에 스트림을 half-close
+STT_IDLE_CLOSE_SECONDS = float(os.getenv("STT_IDLE_CLOSE_SECONDS", "5"))
+# 한 연결에서 동시에 처리하는 최대 오디오 채널(마이크) 수
+STT_MAX_CHANNELS = int(os.getenv("STT_MAX_CHANNELS", "16"))
 
 async def handle_websocket_connection(websocket: WebSocket):
     """
     WebSocket 연결을 처리하는 함수
-    
+
+    세션마다 두 개의 태스크를 유지합니다.
+    - stt_task: 오디오 버퍼를 Google STT 스트림으로 보내고 결과를 response_queue에 넣음
+    - response_task: response_queue의 결과를 WebSocket으로 전송
+
+    STT_WARM_STANDBY이면 연결 직후에 다음 세션의 stt_task를 미리 시작해
+    "start" 시점에는 스트림 연결과 설정 전송이 끝나 있도록 합니다.
+    세션 종료 후에는 "end"에 "standby": true가 있을 때만 다시 준비하며, 대기 세션은
+    STT_STANDBY_MAX_IDLE_SECONDS 동안 "start"가 없으면 더 이상 스트림을 열지 않습니다.
+    대기 언어는 쿼리 파라미터 lang(없으면 직전 세션 언어)이며, "start" 이전에 받은
+    오디오는 미리 연 세션의 버퍼에 쌓였다가 "start" 이후 결과와 함께 전달됩니다.
+
+    "start" 응답의 session_token으로 끊긴 세션을 이어갈 수 있습니다.
+    - 연결이 끊겨도 세션은 STT_RESUME_TTL초 동안 인식을 계속하며 최종 결과를 보관합니다.
+    - 새 연결에서 {"type": "resume", "session_token", "last_final_id"}를 보내면
+      서버가 받은 오디오 바이트 수(audio_offset)를 알려 주고, 확인되지 않은 최종 결과를 다시 보냅니다.
+      클라이언트는 audio_offset 이후의 오디오만 이어서 보내면 됩니다.
+    - {"type": "ack", "id": n}은 id n까지의 최종 결과를 받았음을 알려 보관 목록에서 지웁니다.
+
+    "start"의 format이 "webm_opus" / "ogg_opus"이면 브라우저 MediaRecorder 프레임을 받아
+    서버에서 LINEAR16으로 디코딩한 뒤 같은 인식 경로로 넘깁니다 (기본값 "linear16").
+    "start" 이전 오디오(warm standby)는 LINEAR16만 지원합니다.
+
+    "start"에 channels(채널 수 또는 채널 id 목록)가 있으면 한 연결에서 여러 마이크를 처리합니다.
+    바이너리 프레임 첫 바이트가 채널 id이고, 결과 메시지에는 "channel"이 붙습니다.
+    {"type": "end", "channel": n}은 해당 채널만, channel이 없으면 모든 채널을 종료합니다.
+    (다중 채널 세션은 LINEAR16만 받으며 resume을 지원하지 않습니다)
+
     Args:
         websocket (WebSocket): 연결된 WebSocket 객체
     """
@@ -26,236 +83,924 @@ async def handle_websocket_connection(websocket: WebSocket):
     is_active = False
     language_code = "ko-KR"  # 기본 언어
 
-    # 스레드 간 데이터 교환을 위한 큐
-    audio_queue = queue.Queue()
-    response_queue = asyncio.Queue()
-    
-    # STT 스트리밍 스레드
-    stt_thread = None
-    
+    # 세션 태스크와 오디오 버퍼
+    audio_buffer = None
+    diagnostics = None
+    stt_task = None
+    response_task = None
+    decoder = None
+    output = None
+    session_token = None
+    multichannel = None
+
+    # 미리 열어 두는 다음 세션
+    standby = WarmStandby() if STT_WARM_STANDBY else None
+    if standby is not None:
+        standby.arm(websocket.query_params.get("lang", language_code))
+
     try:
         while True:
             # 클라이언트로부터 메시지 수신
             message = await websocket.receive()
-            
+
+            # 연결 종료
+            if message.get("type") == "websocket.disconnect":
+                logging.info("WebSocket 연결 해제")
+                break
+
             # 텍스트 메시지인 경우 (명령 처리)
-            if "text" in message:
+            if message.get("text") is not None:
                 try:
                     data = json.loads(message["text"])
                     msg_type = data.get("type")
-                    
+
                     if msg_type == "start":
-                        # 이전 스레드가 실행 중이면 종료
-                        if stt_thread and stt_thread.is_alive():
-                            audio_queue.put(None)  # 종료 신호
-                            stt_thread.join(timeout=2)
-                            
-                        # 큐 초기화
-                        while not audio_queue.empty():
-                            audio_queue.get()
-                        while not response_queue.empty():
-                            await response_queue.get()
-                        
+                        # 이전 세션이 실행 중이면 종료
+                        await stop_session(audio_buffer, stt_task, response_task, decoder)
+                        decoder = None
+                        if multichannel is not None:
+                            await multichannel.stop()
+                            multichannel = None
+
                         # 녹음 시작 명령
                         language_code = data.get("lang", "ko-KR")
                         is_active = True
-                        
+
+                        # 중간 결과 전송 방식 협상 (기본: 전체 텍스트)
+                        protocol = data.get("protocol", PROTOCOL_FULL)
+                        if protocol not in PROTOCOLS:
+                            protocol = PROTOCOL_FULL
+                        interim_rate = data.get("interim_rate")
+                        if not isinstance(interim_rate, (int, float)) or interim_rate <= 0:
+                            interim_rate = None
+
+                        # translate가 있으면 최종 결과를 해당 언어로 번역해 함께 전송
+                        translate_lang = data.get("translate")
+                        if not isinstance(translate_lang, str) or not translate_lang:
+                            translate_lang = None
+
+                        # diagnostics가 true이면 단계별 지연시간을 'diagnostics' 메시지로 함께 전송
+                        report_diagnostics = data.get("diagnostics") is True
+
+                        # channels가 있으면 채널(마이크)마다 인식 스트림을 따로 실행
+                        if data.get("channels") is not None:
+                            is_active = False
+                            try:
+                                channel_ids = parse_channel_ids(data["channels"])
+                            except ValueError as e:
+                                await websocket.send_text(json.dumps({
+                                    "type": "error",
+                                    "message": str(e)
+                                }, ensure_ascii=False))
+                                continue
+
+                            multichannel = MultiChannelSession(
+                                websocket, language_code, protocol, interim_rate, translate_lang, report_diagnostics
+                            )
+                            persist = await multichannel.start(channel_ids, data.get("script_id"))
+                            await websocket.send_text(json.dumps({
+                                "type": "system",
+                                "message": f"인식 시작: 언어 - {language_code}, 채널 {len(channel_ids)}개",
+                                "protocol": protocol,
+                                "persist": persist,
+                                "translate": translate_lang,
+                                "diagnostics": report_diagnostics,
+                                "channels": channel_ids,
+                                "format": AUDIO_FORMAT_LINEAR16,
+                            }, ensure_ascii=False))
+                            logging.info(f"다중 채널 음성 인식 시작: 언어 - {language_code}, 채널 - {channel_ids}")
+                            continue
+
+                        # script_id가 있으면 최종 결과를 서버에서 바로 저장
+                        writer = None
+                        script_id = data.get("script_id")
+                        if script_id:
+                            try:
+                                writer = await open_transcript_writer(script_id)
+                            except Exception as e:
+                                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                                await websocket.send_text(json.dumps({
+                                    "type": "error",
+                                    "message": f"스크립트 저장 불가: {detail}"
+                                }, ensure_ascii=False))
+
+                        # 오디오 형식 협상 (기본: LINEAR16 16kHz 모노)
+                        audio_format = data.get("format", AUDIO_FORMAT_LINEAR16)
+                        if audio_format not in AUDIO_FORMATS:
+                            audio_format = AUDIO_FORMAT_LINEAR16
+
+                        # 새로운 세션 태스크 시작
+                        # 언어가 같은 대기 세션이 있으면 그대로 사용
+                        session = await standby.take(language_code) if standby is not None else None
+                        if session is not None and audio_format != AUDIO_FORMAT_LINEAR16 and session.has_audio:
+                            # 대기 중 받은 오디오는 LINEAR16으로 처리되었으므로 사용하지 않음
+                            await session.cancel()
+                            session = None
+                        from_standby = session is not None
+                        if session is None:
+                            session = PreparedSession(language_code)
+
+                        audio_buffer = session.audio_buffer
+                        diagnostics = session.diagnostics
+                        stt_task = session.stt_task
+
+                        # 압축 오디오면 디코더 시작
+                        try:
+                            decoder = await open_audio_decoder(
+                                audio_format, decoded_audio_sink(audio_buffer, diagnostics)
+                            )
+                        except AudioDecodeError as e:
+                            logging.error(f"오디오 디코더 시작 실패: {str(e)}")
+                            is_active = False
+                            await session.cancel()
+                            audio_buffer = stt_task = None
+                            await websocket.send_text(json.dumps({
+                                "type": "error",
+                                "message": f"오디오 형식({audio_format})을 처리할 수 없습니다: {str(e)}"
+                            }, ensure_ascii=False))
+                            continue
+
+                        # 재연결 시 세션을 찾기 위한 토큰
+                        session_token = new_session_token()
+
                         await websocket.send_text(json.dumps({
                             "type": "system",
-                            "message": f"인식 시작: 언어 - {language_code}"
+                            "message": f"인식 시작: 언어 - {language_code}",
+                            "protocol": protocol,
+                            "persist": writer is not None,
+                            "translate": translate_lang,
+                            "diagnostics": report_diagnostics,
+                            "session_token": session_token,
+                            "format": audio_format,
                         }, ensure_ascii=False))
-                        
-                        logging.info(f"음성 인식 시작: 언어 - {language_code}")
-                        
-                        # 새로운 STT 스레드 시작
-                        stt_thread = threading.Thread(
-                            target=run_stt_stream,
-                            args=(audio_queue, response_queue, language_code)
+
+                        logging.info(
+                            f"음성 인식 시작: 언어 - {language_code}, 프로토콜 - {protocol}, 형식 - {audio_format}"
                         )
-                        stt_thread.daemon = True
-                        stt_thread.start()
-                        
-                        # 응답 처리 태스크 시작
-                        asyncio.create_task(process_responses(response_queue, websocket))
-                        
+
+                        diagnostics.mark_started(from_standby)
+                        output = SessionOutput(websocket)
+                        response_task = asyncio.create_task(
+                            process_responses(
+                                session.response_queue, output, protocol, interim_rate, writer, translate_lang,
+                                diagnostics, report_diagnostics,
+                            )
+                        )
+
+                    elif msg_type == "resume":
+                        # 끊긴 세션 재개
+                        token = data.get("session_token")
+                        state = resume_session(token) if isinstance(token, str) else None
+                        if state is None:
+                            await websocket.send_text(json.dumps({
+                                "type": "error",
+                                "code": "resume_failed",
+                                "message": "재개할 세션이 없습니다. start로 새로 시작하세요"
+                            }, ensure_ascii=False))
+                        else:
+                            # 이 연결에서 실행 중이던 세션은 종료
+                            await stop_session(audio_buffer, stt_task, response_task, decoder)
+                            if multichannel is not None:
+                                await multichannel.stop()
+                                multichannel = None
+
+                            session_token = token
+                            audio_buffer = state["audio_buffer"]
+                            diagnostics = state["diagnostics"]
+                            stt_task = state["stt_task"]
+                            response_task = state["response_task"]
+                            decoder = state["decoder"]
+                            output = state["output"]
+                            is_active = state["is_active"]
+                            language_code = state["language_code"]
+
+                            last_final_id = data.get("last_final_id")
+                            if not isinstance(last_final_id, int):
+                                last_final_id = -1
+
+                            await websocket.send_text(json.dumps({
+                                "type": "system",
+                                "message": f"세션 재개: 언어 - {language_code}",
+                                "session_token": session_token,
+                                "audio_offset": diagnostics.bytes_received,
+                                "active": is_active,
+                            }, ensure_ascii=False))
+                            await output.attach(websocket, last_final_id)
+                            logging.info(f"세션 재개: {session_token}, 오디오 {diagnostics.bytes_received} bytes 수신됨")
+
+                    elif msg_type == "ack":
+                        # 클라이언트가 받은 최종 결과 확인
+                        if output is not None and isinstance(data.get("id"), int):
+                            output.ack(data["id"])
+
+                    elif msg_type == "end" and multichannel is not None:
+                        # 다중 채널: 지정한 채널(없으면 전체) 종료
+                        multichannel.end(data.get("channel"))
+                        logging.info(f"다중 채널 음성 인식 종료: {data.get('channel', '전체')}")
+
                     elif msg_type == "end":
                         # 녹음 종료 명령
                         is_active = False
-                        
-                        # 스트리밍 종료 신호
-                        audio_queue.put(None)
-                        
-                        # await websocket.send_text(json.dumps({
-                        #     "type": "system",
-                        #     "message": "인식 종료: 다음 세션 대기 중"
-                        # }, ensure_ascii=False))
-                        
+
+                        # 디코더에 남은 오디오까지 버퍼로 넘긴 뒤 종료
+                        if decoder is not None:
+                            try:
+                                await decoder.close()
+                            except Exception as e:
+                                logging.warning(f"오디오 디코더 종료 오류: {str(e)}")
+                            decoder = None
+
+                        # 스트리밍 종료 신호 (남은 결과는 태스크가 마저 전송)
+                        if audio_buffer is not None:
+                            audio_buffer.close()
+
+                        # 클라이언트가 요청한 경우에만 다음 세션 미리 준비
+                        if standby is not None and data.get("standby"):
+                            standby.arm(language_code)
+
                         logging.info("음성 인식 종료, 다음 세션 대기 중")
-                        
+
                 except json.JSONDecodeError:
                     logging.error("잘못된 JSON 형식")
-                    
+
+            # 다중 채널 오디오 프레임 (첫 바이트: 채널 id)
+            elif message.get("bytes") is not None and multichannel is not None:
+                await multichannel.feed(message["bytes"])
+
             # 바이너리 메시지인 경우 (오디오 데이터)
-            elif "bytes" in message and is_active:
-                audio_chunk = message["bytes"]
-                # 오디오 데이터를 큐에 추가
-                audio_queue.put(audio_chunk)
-                
+            elif message.get("bytes") is not None and is_active:
+                # 오디오 데이터를 버퍼에 추가 (버퍼가 가득 차면 정책에 따라 대기/폐기/실패)
+                try:
+                    if decoder is not None:
+                        # 압축 오디오는 디코더를 거쳐 버퍼로 전달
+                        diagnostics.audio_received(len(message["bytes"]), pcm=False)
+                        await decoder.feed(message["bytes"])
+                    else:
+                        diagnostics.audio_received(len(message["bytes"]))
+                        await audio_buffer.put(message["bytes"])
+                except AudioBufferOverflowError as e:
+                    logging.warning(f"오디오 버퍼 초과로 세션 종료: {str(e)}")
+                    is_active = False
+                    await cancel_session(audio_buffer, stt_task, response_task, decoder)
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"오디오 버퍼 초과: {str(e)}"
+                    }, ensure_ascii=False))
+                except AudioDecodeError as e:
+                    logging.warning(f"오디오 디코딩 실패로 세션 종료: {str(e)}")
+                    is_active = False
+                    await cancel_session(audio_buffer, stt_task, response_task, decoder)
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"오디오 디코딩 오류: {str(e)}"
+                    }, ensure_ascii=False))
+
+            # "start" 이전 오디오는 대기 세션 버퍼에 보관
+            elif message.get("bytes") is not None and standby is not None:
+                await standby.put(message["bytes"])
+
     except Exception as e:
         logging.error(f"WebSocket 오류: {str(e)}")
-        # 스레드 정리
-        if stt_thread and stt_thread.is_alive():
-            audio_queue.put(None)  # 종료 신호
+    finally:
+        # 태스크 정리
+        if standby is not None:
+            await standby.close()
+        if multichannel is not None:
+            await multichannel.cancel()
+
+        # 진행 중인 세션은 재연결을 기다리며 보관 (만료되면 정상 종료)
+        if session_token is not None and response_task is not None and not response_task.done():
+            output.detach()
+            detach_session(
+                session_token,
+                {
+                    "audio_buffer": audio_buffer,
+                    "diagnostics": diagnostics,
+                    "stt_task": stt_task,
+                    "response_task": response_task,
+                    "decoder": decoder,
+                    "output": output,
+                    "is_active": is_active,
+                    "language_code": language_code,
+                },
+                functools.partial(stop_session, audio_buffer, stt_task, response_task, decoder),
+            )
+            logging.info(f"재연결 대기: {session_token}")
+        else:
+            await cancel_session(audio_buffer, stt_task, response_task, decoder)
+
+def decoded_audio_sink(audio_buffer, diagnostics):
+    """디코더 출력(LINEAR16)을 세션 수신 버퍼로 넘기는 함수 생성"""
+    async def sink(chunk: bytes):
+        diagnostics.audio_decoded(len(chunk))
+        await audio_buffer.put(chunk)
+    return sink
 
-def run_stt_stream(audio_queue, response_queue, language_code):
+def parse_channel_ids(value) -> list:
     """
-    별도 스레드에서 STT 스트리밍을 실행하는 함수
-    
+    "start"의 channels 값(채널 수 또는 채널 id 목록)을 채널 id 목록으로 변환하는 함수
+    채널 id는 프레임 헤더 1바이트에 들어가야 하므로 0~255입니다.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        channel_ids = list(range(value))
+    elif isinstance(value, list) and all(isinstance(v, int) and not isinstance(v, bool) for v in value):
+        channel_ids = list(dict.fromkeys(value))
+    else:
+        raise ValueError("channels는 채널 수 또는 채널 id 목록이어야 합니다")
+
+    if not channel_ids or len(channel_ids) > STT_MAX_CHANNELS:
+        raise ValueError(f"채널 수는 1~{STT_MAX_CHANNELS}개여야 합니다")
+    if any(not 0 <= channel_id <= 255 for channel_id in channel_ids):
+        raise ValueError("채널 id는 0~255여야 합니다")
+    return channel_ids
+
+class MultiChannelSession:
+    """
+    한 WebSocket 연결에서 여러 오디오 채널(마이크)을 처리하는 세션
+
+    바이너리 프레임은 [채널 id 1바이트][LINEAR16 오디오] 형식입니다.
+    채널마다 수신 버퍼와 인식 스트림(PreparedSession), 응답 처리 태스크를 따로 두고
+    결과에는 "channel"을 붙여 같은 소켓으로 보냅니다.
+    한 채널의 버퍼가 가득 차면(block 정책) 소켓 수신이 멈추므로 다른 채널도 함께 대기합니다.
+    """
+
+    def __init__(self, websocket, language_code, protocol, interim_rate, translate_lang, report_diagnostics):
+        self.websocket = websocket
+        self.language_code = language_code
+        self.protocol = protocol
+        self.interim_rate = interim_rate
+        self.translate_lang = translate_lang
+        self.report_diagnostics = report_diagnostics
+        self.channels = {}  # 채널 id -> (PreparedSession, 응답 처리 태스크)
+        self.unknown_frames = 0
+
+    async def start(self, channel_ids: list, script_id: str = None) -> bool:
+        """채널별 세션 시작 (script_id가 있으면 채널 이름을 붙여 저장, 저장 여부 반환)"""
+        writers = {}
+        if script_id:
+            try:
+                for channel_id in channel_ids:
+                    writers[channel_id] = await open_transcript_writer(script_id, label=f"채널 {channel_id}")
+            except Exception as e:
+                for writer in writers.values():
+                    writer.close()
+                writers = {}
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                await self.websocket.send_text(json.dumps({
+                    "type": "error",
+                    "message": f"스크립트 저장 불가: {detail}"
+                }, ensure_ascii=False))
+
+        for channel_id in channel_ids:
+            session = PreparedSession(self.language_code)
+            session.diagnostics.mark_started()
+            response_task = asyncio.create_task(
+                process_responses(
+                    session.response_queue, SessionOutput(self.websocket), self.protocol, self.interim_rate,
+                    writers.get(channel_id), self.translate_lang, session.diagnostics, self.report_diagnostics,
+                    channel_id,
+                )
+            )
+            self.channels[channel_id] = (session, response_task)
+        return bool(writers)
+
+    async def feed(self, frame: bytes):
+        """채널 헤더를 읽어 해당 채널 버퍼로 오디오 전달"""
+        channel = self.channels.get(frame[0]) if len(frame) > 1 else None
+        if channel is None:
+            self.unknown_frames += 1
+            if self.unknown_frames == 1:
+                # 클라이언트 채널 설정 오류를 알 수 있도록 첫 프레임에서 한 번만 알림
+                await self.websocket.send_text(json.dumps({
+                    "type": "warning",
+                    "channel": frame[0] if frame else None,
+                    "message": "시작하지 않은 채널 또는 빈 프레임은 무시됩니다"
+                }, ensure_ascii=False))
+            return
+
+        session, response_task = channel
+        chunk = frame[1:]
+        try:
+            session.diagnostics.audio_received(len(chunk))
+            await session.audio_buffer.put(chunk)
+        except AudioBufferOverflowError as e:
+            logging.warning(f"오디오 버퍼 초과로 채널 {frame[0]} 종료: {str(e)}")
+            del self.channels[frame[0]]
+            await cancel_session(session.audio_buffer, session.stt_task, response_task)
+            await self.websocket.send_text(json.dumps({
+                "type": "error",
+                "channel": frame[0],
+                "message": f"오디오 버퍼 초과: {str(e)}"
+            }, ensure_ascii=False))
+
+    def end(self, channel_id=None):
+        """채널 입력 종료 (channel_id가 없으면 전체) - 남은 결과는 계속 전송"""
+        for key, (session, _) in self.channels.items():
+            if channel_id is None or key == channel_id:
+                session.audio_buffer.close()
+
+    async def stop(self):
+        """모든 채널을 정상 종료"""
+        self._log_unknown_frames()
+        channels, self.channels = self.channels, {}
+        await asyncio.gather(*(
+            stop_session(session.audio_buffer, session.stt_task, response_task)
+            for session, response_task in channels.values()
+        ))
+
+    async def cancel(self):
+        """모든 채널을 즉시 종료"""
+        self._log_unknown_frames()
+        channels, self.channels = self.channels, {}
+        await asyncio.gather(*(
+            cancel_session(session.audio_buffer, session.stt_task, response_task)
+            for session, response_task in channels.values()
+        ))
+
+    def _log_unknown_frames(self):
+        if self.unknown_frames:
+            logging.warning(f"알 수 없는 채널 프레임 {self.unknown_frames}개 무시됨")
+
+class PreparedSession:
+    """
+    "start" 전에 미리 시작할 수 있는 세션 구성 요소
+    오디오 버퍼, 결과 큐, 진단 기록과 STT 스트림 태스크(run_stt_stream)를 함께 만듭니다.
+    대기(standby) 세션은 오디오가 없는 것이 정상이므로 꺼낼 때(enable_idle_close)까지
+    입력 없음으로 스트림을 half-close하지 않습니다.
+    """
+
+    def __init__(self, language_code: str, standby: bool = False):
+        self.language_code = language_code
+        self.audio_buffer = AudioIngestBuffer(uuid.uuid4().hex[:12])
+        self.diagnostics = SessionDiagnostics(self.audio_buffer.session_id, self.audio_buffer)
+        self.response_queue = asyncio.Queue()
+        self.idle_close = asyncio.Event()
+        if not standby:
+            self.idle_close.set()
+        self.stt_task = asyncio.create_task(
+            run_stt_stream(
+                self.audio_buffer, self.response_queue, language_code, self.diagnostics, self.idle_close
+            )
+        )
+
+    def enable_idle_close(self):
+        self.idle_close.set()
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_buffer.received_chunks > 0
+
+    async def cancel(self):
+        await cancel_session(self.audio_buffer, self.stt_task, None)
+
+class WarmStandby:
+    """
+    다음 세션을 미리 열어 두는 대기 슬롯
+
+    오디오가 없는 스트림은 Google이 끊으므로 STT_STANDBY_TTL마다 새 세션으로 교체하며,
+    "start" 이전 오디오를 받은 세션은 스트림이 유지되므로 교체하지 않습니다.
+    유휴 연결이 과금되는 스트림을 계속 열어 두지 않도록 STT_STANDBY_MAX_IDLE_SECONDS가
+    지나면 교체를 멈추고 대기 세션을 닫습니다 (다음 "start"는 스트림을 새로 엶).
+    """
+
+    def __init__(self):
+        self.session = None
+        self._task = None
+
+    def arm(self, language_code: str):
+        """대기 세션 준비 시작 (이미 준비 중이거나 오디오를 받은 대기 세션이 있으면 무시)"""
+        if self.session is not None or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run(language_code))
+
+    async def _run(self, language_code: str):
+        deadline = time.monotonic() + STT_STANDBY_MAX_IDLE_SECONDS
+        while True:
+            self.session = PreparedSession(language_code, standby=True)
+            await asyncio.sleep(min(STT_STANDBY_TTL, max(0.0, deadline - time.monotonic())))
+            if self.session.has_audio:
+                return
+            session, self.session = self.session, None
+            await session.cancel()
+            if time.monotonic() >= deadline:
+                logging.info(f"대기 세션 {STT_STANDBY_MAX_IDLE_SECONDS}초 동안 사용되지 않아 준비 중단")
+                return
+
+    async def _stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def take(self, language_code: str):
+        """
+        대기 세션을 꺼내는 함수
+        언어가 다르거나 스트림이 이미 끝난 세션은 정리하고 None을 반환합니다.
+        """
+        await self._stop()
+        session, self.session = self.session, None
+        if session is None:
+            return None
+        if session.language_code != language_code or session.stt_task.done():
+            await session.cancel()
+            return None
+        session.enable_idle_close()
+        return session
+
+    async def put(self, chunk: bytes):
+        """"start" 이전 오디오를 대기 세션 버퍼에 추가"""
+        session = self.session
+        if session is None:
+            return
+        try:
+            session.diagnostics.audio_received(len(chunk))
+            await session.audio_buffer.put(chunk)
+        except AudioBufferOverflowError as e:
+            logging.warning(f"대기 세션 오디오 버퍼 초과: {str(e)}")
+            self.session = None
+            await session.cancel()
+
+    async def close(self):
+        await self._stop()
+        session, self.session = self.session, None
+        if session is not None:
+            await session.cancel()
+
+async def stop_session(audio_buffer, stt_task, response_task, decoder=None):
+    """
+    실행 중인 세션을 정상 종료하는 함수
+    종료 신호를 보낸 뒤 STT 태스크가 마무리되기를 기다리고, 시간이 초과되면 취소합니다.
+    """
+    if stt_task is None:
+        return
+
+    if not stt_task.done():
+        try:
+            if decoder is not None:
+                await asyncio.wait_for(decoder.close(), timeout=STT_SHUTDOWN_TIMEOUT)
+        except (asyncio.TimeoutError, Exception):
+            pass
+        audio_buffer.close()  # 종료 신호
+        try:
+            await asyncio.wait_for(asyncio.shield(stt_task), timeout=STT_SHUTDOWN_TIMEOUT)
+        except (asyncio.TimeoutError, Exception):
+            pass
+
+    await cancel_session(audio_buffer, stt_task, response_task, decoder)
+
+async def cancel_session(audio_buffer, stt_task, response_task, decoder=None):
+    """
+    세션 태스크를 취소하고 종료될 때까지 기다리는 함수
+    남아 있는 오디오는 버리고 전역 버퍼 사용량에서 반환합니다.
+    """
+    if decoder is not None:
+        await decoder.cancel()
+    if audio_buffer is not None:
+        audio_buffer.release()
+
+    tasks = [task for task in (stt_task, response_task) if task is not None and not task.done()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def run_stt_stream(audio_buffer, response_queue, language_code, diagnostics=None, idle_close=None):
+    """
+    STT 백엔드(기본: Google Speech v2)로 스트리밍 인식을 실행하는 함수
+    스트림이 끝나면 response_queue에 None을 넣어 응답 처리 태스크를 종료시킵니다.
+
+    Google 스트림은 길이 제한이 있으므로 STT_STREAM_ROLLOVER_SECONDS가 지나면
+    다음 스트림을 열고 직전 오디오(overlap)를 다시 보낸 뒤 이전 스트림을 닫습니다.
+    두 스트림의 경계 결과는 RolloverMerger가 중복을 제거해 하나의 흐름으로 합칩니다.
+    오디오가 STT_IDLE_CLOSE_SECONDS 동안 끊기면(일시 정지, 재연결 대기) 스트림을 half-close하고,
+    다음 오디오가 오면 새 스트림을 엽니다. 이때 이전 스트림이 모든 오디오를 받았으므로 재전송은 하지 않습니다.
+    idle_close가 설정되기 전(warm standby 대기 중)에는 미리 연 스트림을 유지하기 위해 half-close하지 않습니다.
+    VAD_ENABLED이면 무음 구간은 VoiceActivityDetector가 걸러낸 뒤 전송합니다.
+
     Args:
-        audio_queue (queue.Queue): 오디오 데이터를 받는 큐
+        audio_buffer (AudioIngestBuffer): 오디오 데이터를 받는 버퍼 (None은 종료 신호)
         response_queue (asyncio.Queue): 처리 결과를 전달할 큐
         language_code (str): 인식 언어 코드
+        diagnostics (SessionDiagnostics): 단계별 지연시간 기록 (없으면 기록하지 않음)
+        idle_close (asyncio.Event): 설정된 경우에만 입력 없음 half-close 사용 (없으면 항상 사용)
     """
+    streams = []
+    vad = VoiceActivityDetector() if VAD_ENABLED else None
     try:
-        client = SpeechClient()
-        
-        # 음성 인식 설정
-        recognition_config = cloud_speech_types.RecognitionConfig(
-            explicit_decoding_config=cloud_speech_types.ExplicitDecodingConfig(
-                encoding=cloud_speech_types.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=16000,
-                audio_channel_count=1,
-            ),
-            language_codes=[language_code],
-            model="long",
-        )
+        backend = get_stt_backend()
+        ring = AudioRingBuffer(int(STT_ROLLOVER_OVERLAP_SECONDS * AUDIO_BYTES_PER_SECOND))
+        merger = RolloverMerger(response_queue)
 
-        streaming_features = cloud_speech_types.StreamingRecognitionFeatures(
-            interim_results=True,
-        )
-        
-        streaming_config = cloud_speech_types.StreamingRecognitionConfig(
-            config=recognition_config,
-            streaming_features=streaming_features,
-        )
-        
-        config_request = cloud_speech_types.StreamingRecognizeRequest(
-            recognizer=f"projects/{PROJECT_ID}/locations/global/recognizers/_",
-            streaming_config=streaming_config,
-        )
-        
-        # 동기 제너레이터 - STT API 호출에 사용
-        def request_generator():
-            # 설정 요청 먼저 보내기
-            yield config_request
-            
-            while True:
-                # 큐에서 오디오 데이터 가져오기 (blocking)
-                chunk = audio_queue.get()
-                
-                # None은 스트림 종료 신호
-                if chunk is None:
-                    break
-                    
-                # 오디오 데이터 요청 생성 및 전송
-                yield cloud_speech_types.StreamingRecognizeRequest(audio=chunk)
-        
-        # Google STT API 호출
-        responses = client.streaming_recognize(requests=request_generator())
-        
-        # 응답 처리 및 결과 큐에 추가
-        for response in responses:
-            # 결과가 없는 경우 스킵
-            if not response.results:
+        def open_stream(generation, replay=True):
+            stream = UpstreamStream(generation)
+            merger.open(generation, replay)
+            stream.task = asyncio.create_task(
+                recognize_stream(backend, language_code, stream, merger, diagnostics)
+            )
+            streams.append(stream)
+            return stream
+
+        stream = open_stream(0)
+
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    audio_buffer.get(),
+                    timeout=None if stream.closed else STT_IDLE_CLOSE_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                if idle_close is not None and not idle_close.is_set():
+                    continue
+                await stream.close()
+                logging.info(f"오디오 입력 없음, STT 스트림 {stream.generation} half-close")
                 continue
-                
-            # 마지막 결과만 처리 (일반적으로 가장 최신, 가장 정확한 결과)
-            result = response.results[-1]
-            
-            if result.alternatives:
-                transcript = result.alternatives[0].transcript
-                is_final = result.is_final
-                confidence = result.alternatives[0].confidence if hasattr(result.alternatives[0], 'confidence') else 0.0
-                
-                # 메인 스레드에 응답 전달
-                asyncio.run(response_queue.put({
-                    "transcript": transcript,
-                    "is_final": is_final,
-                    "confidence": confidence,
-                }))
 
+            # None은 스트림 종료 신호
+            if chunk is None:
+                if vad is not None:
+                    await stream.send(vad.flush())
+                break
+
+            if diagnostics is not None:
+                diagnostics.record(STAGE_INGEST_WAIT, audio_buffer.last_wait)
+                dequeued_at = time.monotonic()
+
+            # 무음 구간 제거
+            if vad is not None:
+                chunk = vad.process(chunk)
+                if not chunk:
+                    continue
+
+            # 오류로 끝난 스트림이면 세션 종료 (오류는 이미 전달됨)
+            if stream.task.done() and stream.task.result() is not None:
+                break
+
+            # 입력이 끊겨 닫은 스트림이면 재전송 없이 새 스트림으로 이어감
+            if stream.closed:
+                previous = stream
+                stream = open_stream(previous.generation + 1, replay=False)
+                logging.info(f"STT 스트림 재개: {previous.generation} -> {stream.generation}")
+
+            # 제한 시간이 가까워졌거나 서버가 먼저 스트림을 닫았으면 교체
+            elif stream.task.done() or stream.age() >= STT_STREAM_ROLLOVER_SECONDS:
+                previous = stream
+                stream = open_stream(previous.generation + 1)
+                overlap = ring.tail(ring.max_bytes)
+                if overlap:
+                    await stream.send(overlap)
+                await previous.close()
+                logging.info(f"STT 스트림 교체: {previous.generation} -> {stream.generation}")
+
+            ring.append(chunk)
+            await stream.send(chunk)
+            if diagnostics is not None:
+                diagnostics.record(STAGE_UPSTREAM_SEND, time.monotonic() - dequeued_at)
+
+        await stream.close()
+        await asyncio.gather(*(s.task for s in streams))
+
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         logging.error(f"STT 스트리밍 오류: {str(e)}")
         # 오류 정보 전달
-        try:
-            asyncio.run(response_queue.put({
-                "error": str(e)
-            }))
-        except:
-            pass
+        await response_queue.put({
+            "error": str(e)
+        })
+    finally:
+        for s in streams:
+            if not s.task.done():
+                s.task.cancel()
+        if vad is not None and vad.bytes_received:
+            logging.info(
+                f"VAD 전송 비율: {vad.bytes_forwarded}/{vad.bytes_received} bytes "
+                f"({vad.forwarded_ratio:.1%})"
+            )
+        # 응답 처리 태스크 종료 신호
+        response_queue.put_nowait(None)
 
-async def process_responses(response_queue, websocket):
+class UpstreamStream:
+    """
+    Google STT 스트림 하나(세대)의 오디오 큐와 태스크
+    """
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.queue = asyncio.Queue(maxsize=STT_STREAM_QUEUE_SIZE)
+        self.task = None
+        self.closed = False
+        self.opened_at = time.monotonic()
+        self.sent_bytes = 0
+        self._sent_marks = deque()  # (누적 바이트, 전달 시각)
+
+    def age(self) -> float:
+        return time.monotonic() - self.opened_at
+
+    async def send(self, chunk: bytes):
+        if chunk and not self.closed and not self.task.done():
+            await self.queue.put(chunk)
+
+    async def close(self):
+        """요청 스트림을 half-close - 이미 보낸 오디오의 결과는 계속 수신"""
+        if self.closed:
+            return
+        self.closed = True
+        if not self.task.done():
+            await self.queue.put(None)
+
+    def mark_sent(self, size: int):
+        """오디오가 백엔드로 전달된 시각 기록"""
+        self.sent_bytes += size
+        self._sent_marks.append((self.sent_bytes, time.monotonic()))
+
+    def sent_at(self, end_offset):
+        """
+        스트림 기준 end_offset(초)까지의 오디오가 전달된 시각 (모르면 None)
+        결과는 시간 순서로 오므로 이미 지난 기록은 버립니다.
+        """
+        if end_offset is None:
+            return None
+        offset_bytes = end_offset * AUDIO_BYTES_PER_SECOND
+        while len(self._sent_marks) > 1 and self._sent_marks[0][0] < offset_bytes:
+            self._sent_marks.popleft()
+        if not self._sent_marks or self._sent_marks[0][0] < offset_bytes:
+            return None
+        return self._sent_marks[0][1]
+
+    def drain(self):
+        # 태스크 종료 후 대기 중인 send()가 막히지 않도록 비움
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+async def recognize_stream(backend, language_code, stream, merger, diagnostics=None):
+    """
+    스트림 하나를 실행하고 결과를 merger로 전달하는 함수
+    오류가 발생하면 오류 메시지를 전달하고 예외 문자열을 반환합니다.
+    결과에는 수신 시각(received_at)과 인식 지연시간(recognition_latency)을 붙입니다.
+    """
+    # 비동기 제너레이터 - 스트림 큐의 오디오를 백엔드로 전달
+    async def audio_chunks():
+        while True:
+            chunk = await stream.queue.get()
+
+            # None은 스트림 종료 신호
+            if chunk is None:
+                break
+
+            stream.mark_sent(len(chunk))
+            if diagnostics is not None:
+                diagnostics.audio_sent(len(chunk))
+            yield chunk
+
+    try:
+        # STT 백엔드 호출 및 결과 전달
+        async for result in backend.streaming_recognize(audio_chunks(), language_code):
+            received_at = time.monotonic()
+            sent_at = stream.sent_at(result.get("end_offset"))
+            latency = received_at - sent_at if sent_at is not None else None
+            if diagnostics is not None:
+                diagnostics.result_received(result["is_final"], latency)
+            result = {**result, "received_at": received_at, "recognition_latency": latency}
+            await merger.emit(stream.generation, result)
+        return None
+
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logging.error(f"STT 스트리밍 오류 (스트림 {stream.generation}): {str(e)}")
+        if diagnostics is not None:
+            diagnostics.error()
+        await merger.emit(stream.generation, {"error": str(e)})
+        return str(e)
+    finally:
+        merger.close(stream.generation)
+        stream.drain()
+
+async def process_responses(
+    response_queue,
+    output,
+    protocol=PROTOCOL_FULL,
+    interim_rate=None,
+    writer=None,
+    translate_lang=None,
+    diagnostics=None,
+    report_diagnostics=False,
+    channel=None,
+):
     """
     STT 응답을 처리하고 WebSocket으로 전송하는 함수
     중간 결과는 'interim' 타입으로, 최종 결과는 'final' 타입으로 전송합니다.
-    
+    protocol이 "delta"이면 중간 결과는 'interim_delta' 타입으로 달라진 부분만 보내며,
+    중간 결과는 interim_rate(초당 횟수) 이하로 모아 보내고 최종 결과는 바로 보냅니다.
+    writer가 있으면 최종 결과를 스크립트 파일과 벡터 DB에 저장하도록 넘깁니다.
+    최종 결과에는 세션 안에서 0부터 증가하는 id를 붙입니다 (resume/ack, 번역 메시지에서 사용).
+    translate_lang이 있으면 최종 결과의 번역 토큰을 같은 소켓으로 이어서 보냅니다.
+    report_diagnostics이면 최종 결과마다 단계별 지연시간을, 스트림 종료 시 세션 요약을
+    'diagnostics' 타입으로 보냅니다. 세션 요약은 항상 종료 시 로그로 남깁니다.
+
     Args:
-        response_queue (asyncio.Queue): STT 결과를 받는 큐
-        websocket (WebSocket): 결과를 전송할 WebSocket
+        response_queue (asyncio.Queue): STT 결과를 받는 큐 (None은 종료 신호)
+        output (SessionOutput): 결과를 전송할 출력 (최종 결과는 재연결 시 재전송용으로 보관)
+        protocol (str): 중간 결과 전송 방식 ("full" 또는 "delta")
+        interim_rate (float): 중간 결과 초당 최대 전송 횟수
+        writer (TranscriptWriter): 최종 결과 저장용 writer (없으면 저장하지 않음)
+        translate_lang (str): 최종 결과를 번역할 언어 코드 (없으면 번역하지 않음)
+        diagnostics (SessionDiagnostics): 단계별 지연시간 기록 (없으면 기록하지 않음)
+        report_diagnostics (bool): 'diagnostics' 메시지 전송 여부
+        channel (int): 다중 채널 세션의 채널 id (있으면 모든 메시지에 "channel"로 붙임)
     """
+    async def send_json(payload):
+        if channel is not None:
+            payload = {**payload, "channel": channel}
+        await output.send_text(json.dumps(payload, ensure_ascii=False))
+
     # 현재 상태 관리
-    last_interim_text = ""  # 마지막으로 전송한 중간 텍스트
+    publisher = InterimPublisher(send_json, protocol, interim_rate)
     last_final_text = ""    # 마지막으로 전송한 최종 텍스트
-    
+    get_task = None
+    translator = TranslationPipeline(send_json, translate_lang) if translate_lang else None
+    segment_id = 0
+
     try:
         while True:
-            # 큐에서 응답 가져오기
-            response = await response_queue.get()
-            
+            # 큐에서 응답 가져오기 (모아 둔 중간 결과가 있으면 전송 시점까지만 대기)
+            if get_task is None:
+                get_task = asyncio.ensure_future(response_queue.get())
+            done, _ = await asyncio.wait({get_task}, timeout=publisher.flush_delay())
+            if not done:
+                await publisher.flush()
+                continue
+            response, get_task = get_task.result(), None
+
+            # 스트림 종료
+            if response is None:
+                await publisher.flush()
+                if translator is not None:
+                    await translator.close()
+                if report_diagnostics and diagnostics is not None:
+                    await send_json({"type": "diagnostics", "event": "summary", **diagnostics.summary()})
+                break
+
             # 오류 발생 시
             if "error" in response:
                 error_response = {
                     "type": "error",
                     "message": f"음성 인식 오류: {response['error']}"
                 }
-                await websocket.send_text(json.dumps(error_response, ensure_ascii=False))
+                await send_json(error_response)
                 continue
-                
+
             # 정상 응답 처리
             transcript = response["transcript"].strip()
             is_final = response["is_final"]
             # confidence = response.get("confidence", 0.0)
-            
+
             # 텍스트가 비어있으면 무시
             if not transcript:
                 continue
-                
+
             # 결과 유형에 따라 처리
             if is_final:
+                # 중간 결과 초기화
+                publisher.final()
+
                 # 최종 결과가 이전 최종 결과와 다를 경우에만 전송
                 if transcript != last_final_text:
                     json_response = {
                         "type": "final",
                         "text": transcript,
+                        "id": segment_id,
                         # "confidence": confidence
                     }
-                    await websocket.send_text(json.dumps(json_response, ensure_ascii=False))
+                    if channel is not None:
+                        json_response["channel"] = channel
+                    # 재연결 시 다시 보낼 수 있도록 보관 후 전송
+                    final_text = json.dumps(json_response, ensure_ascii=False)
+                    output.record_final(segment_id, final_text)
+                    await output.send_text(final_text)
                     last_final_text = transcript
+                    delivery = record_delivery(diagnostics, response)
+
+                    if report_diagnostics:
+                        await send_json({
+                            "type": "diagnostics",
+                            "event": "final",
+                            "recognition_ms": to_ms(response.get("recognition_latency")),
+                            "delivery_ms": to_ms(delivery),
+                        })
+
+                    if translator is not None:
+                        translator.submit(segment_id, transcript)
+                    segment_id += 1
+
+                    if writer is not None:
+                        writer.add(transcript)
 
-                # 중간 결과 초기화
-                last_interim_text = ""
-                
             else:
                 # 중간 결과가 이전 중간 결과와 다를 경우에만 전송
-                if transcript != last_interim_text:
-                    json_response = {
-                        "type": "interim",
-                        "text": transcript,
-                        # "confidence": confidence
-                    }
-                    await websocket.send_text(json.dumps(json_response, ensure_ascii=False))
-                    last_interim_text = transcript
-                    
+                await publisher.interim(transcript)
+                record_delivery(diagnostics, response)
+
     except asyncio.CancelledError:
         # 태스크 취소
         return
@@ -265,5 +1010,29 @@ async def process_responses(response_queue, websocket):
             "type": "error",
             "message": f"응답 처리 오류: {str(e)}"
         }
-        await websocket.send_text(json.dumps(error_response, ensure_ascii=False))
+        if channel is not None:
+            error_response["channel"] = channel
+        await output.send_text(json.dumps(error_response, ensure_ascii=False))
+    finally:
+        if get_task is not None:
+            get_task.cancel()
+        if writer is not None:
+            writer.close()
+        if translator is not None:
+            translator.cancel()
+        if diagnostics is not None:
+            diagnostics.log_summary()
+
+def record_delivery(diagnostics, response):
+    """결과 수신부터 WebSocket 전송까지 걸린 시간을 기록하고 반환"""
+    received_at = response.get("received_at")
+    if received_at is None:
+        return None
+    delivery = time.monotonic() - received_at
+    if diagnostics is not None:
+        diagnostics.record(STAGE_DELIVERY, delivery)
+        diagnostics.result_delivered()
+    return delivery
 
+def to_ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
@@ -0,0 +1,259 @@
+"""
+/stt/websocket 동시 접속 부하 테스트 및 지연시간 측정
+
+각 세션은 실제 클라이언트와 같은 프로토콜을 따릅니다.
+"start" JSON 전송 -> 16kHz LINEAR16 오디오를 실시간 속도로 전송 -> "end" 전송
+
+동시 접속 수준별로 다음 지표의 백분위수를 JSON으로 출력합니다.
+- time_to_first_interim_ms: 첫 오디오 전송부터 첫 중간 결과까지
+- start_to_first_interim_ms: "start" 전송부터 첫 중간 결과까지 (STT_WARM_STANDBY 비교용)
+- final_latency_ms: 마지막 오디오 전송(발화 종료)부터 마지막 최종 결과까지
+- messages_per_second: 세션별 수신 메시지 속도
+- server: --server-pid 지정 시 서버 프로세스 RSS / CPU 사용률
+
+사용 예:
+    python benchmark/stt_websocket_load.py --audio ../tts/ai_learning.mp3 \
+        --concurrency 1,10,50 --server-pid 12345 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import wave
+import asyncio
+import argparse
+import subprocess
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load_pcm(path: str) -> bytes:
+    """오디오 파일을 16kHz 모노 LINEAR16으로 변환 (.pcm/.raw는 그대로, .wav는 직접, 그 외는 ffmpeg)"""
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in (".pcm", ".raw"):
+        with open(path, "rb") as f:
+            return f.read()
+
+    if extension == ".wav":
+        with wave.open(path, "rb") as f:
+            if f.getsampwidth() != 2:
+                raise ValueError("16-bit PCM WAV만 지원합니다")
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+            channels, rate = f.getnchannels(), f.getframerate()
+        samples = samples.reshape(-1, channels).mean(axis=1)
+        if rate != SAMPLE_RATE:
+            positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+            samples = np.interp(positions, np.arange(len(samples)), samples)
+        return samples.astype("<i2").tobytes()
+
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+    return result.stdout
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 2) for p in PERCENTILES}
+    summary["max"] = round(float(max(values)), 2)
+    summary["count"] = len(values)
+    return summary
+
+
+class ProcessSampler:
+    """/proc/<pid>에서 서버 RSS와 CPU 사용률을 주기적으로 수집"""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.rss_mb = []
+        self.cpu_percent = []
+        self._task = None
+
+    def _read(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_ticks = int(fields[11]) + int(fields[12])  # utime + stime
+        rss_pages = int(fields[21])
+        return cpu_ticks / os.sysconf("SC_CLK_TCK"), rss_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+    async def _run(self):
+        last_cpu, _ = self._read()
+        last_time = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            cpu, rss = self._read()
+            now = time.monotonic()
+            self.cpu_percent.append((cpu - last_cpu) / (now - last_time) * 100)
+            self.rss_mb.append(rss)
+            last_cpu, last_time = cpu, now
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return {
+            "rss_mb_max": round(max(self.rss_mb), 1) if self.rss_mb else None,
+            "rss_mb_avg": round(sum(self.rss_mb) / len(self.rss_mb), 1) if self.rss_mb else None,
+            "cpu_percent_avg": round(sum(self.cpu_percent) / len(self.cpu_percent), 1) if self.cpu_percent else None,
+            "cpu_percent_max": round(max(self.cpu_percent), 1) if self.cpu_percent else None,
+        }
+
+
+async def run_session(url: str, pcm: bytes, start_message: dict, chunk_ms: int, final_timeout: float) -> dict:
+    """세션 하나를 실행하고 지연시간 지표를 반환"""
+    chunk_bytes = BYTES_PER_SECOND * chunk_ms // 1000
+    metrics = {"interims": 0, "finals": 0, "errors": [], "messages": 0}
+    first_audio_at = None
+    last_audio_at = None
+    first_interim_at = None
+    last_final_at = None
+    last_message_at = None
+
+    async with websockets.connect(url, max_size=None) as ws:
+        start_sent_at = time.monotonic()
+        await ws.send(json.dumps(start_message))
+        await ws.recv()  # system 메시지
+
+        async def receive():
+            nonlocal first_interim_at, last_final_at, last_message_at
+            async for raw in ws:
+                now = time.monotonic()
+                message = json.loads(raw)
+                metrics["messages"] += 1
+                last_message_at = now
+                message_type = message.get("type")
+                if message_type in ("interim", "interim_delta"):
+                    metrics["interims"] += 1
+                    if first_interim_at is None:
+                        first_interim_at = now
+                elif message_type == "final":
+                    metrics["finals"] += 1
+                    last_final_at = now
+                elif message_type == "error":
+                    metrics["errors"].append(message.get("message"))
+
+        receiver = asyncio.create_task(receive())
+
+        # 실시간 속도로 오디오 전송
+        started = time.monotonic()
+        for index, offset in enumerate(range(0, len(pcm), chunk_bytes)):
+            await asyncio.sleep(max(0.0, started + index * chunk_ms / 1000 - time.monotonic()))
+            await ws.send(pcm[offset:offset + chunk_bytes])
+            last_audio_at = time.monotonic()
+            if first_audio_at is None:
+                first_audio_at = last_audio_at
+
+        await ws.send(json.dumps({"type": "end"}))
+
+        # 마지막 메시지 이후 final_timeout 동안 조용하면 종료
+        while not receiver.done():
+            idle_since = last_message_at or last_audio_at
+            remaining = idle_since + final_timeout - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, 0.1))
+        receiver.cancel()
+        await asyncio.gather(receiver, return_exceptions=True)
+
+    duration = (last_message_at or last_audio_at) - first_audio_at
+    return {
+        **metrics,
+        "time_to_first_interim_ms": (first_interim_at - first_audio_at) * 1000 if first_interim_at else None,
+        "start_to_first_interim_ms": (first_interim_at - start_sent_at) * 1000 if first_interim_at else None,
+        "final_latency_ms": (last_final_at - last_audio_at) * 1000 if last_final_at and last_final_at >= last_audio_at else None,
+        "messages_per_second": metrics["messages"] / duration if duration > 0 else 0.0,
+    }
+
+
+async def run_level(args, pcm: bytes, concurrency: int) -> dict:
+    """동시 접속 수준 하나를 실행하고 집계"""
+    start_message = {"type": "start", "lang": args.lang}
+    if args.protocol:
+        start_message["protocol"] = args.protocol
+
+    sampler = ProcessSampler(args.server_pid) if args.server_pid else None
+    if sampler:
+        sampler.start()
+
+    async def session(index: int):
+        # 접속이 한 순간에 몰리지 않도록 ramp-up 구간에 분산
+        await asyncio.sleep(args.ramp_up * index / concurrency)
+        return await run_session(args.url, pcm, start_message, args.chunk_ms, args.final_timeout)
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(session(i) for i in range(concurrency)), return_exceptions=True)
+    elapsed = time.monotonic() - started
+
+    ok = [r for r in results if isinstance(r, dict)]
+    failed = [repr(r) for r in results if not isinstance(r, dict)]
+
+    level = {
+        "concurrency": concurrency,
+        "sessions_ok": len(ok),
+        "sessions_failed": len(failed),
+        "failures": failed[:10],
+        "stream_errors": sum(len(r["errors"]) for r in ok),
+        "wall_seconds": round(elapsed, 2),
+        "time_to_first_interim_ms": percentiles([r["time_to_first_interim_ms"] for r in ok if r["time_to_first_interim_ms"] is not None]),
+        "start_to_first_interim_ms": percentiles([r["start_to_first_interim_ms"] for r in ok if r["start_to_first_interim_ms"] is not None]),
+        "final_latency_ms": percentiles([r["final_latency_ms"] for r in ok if r["final_latency_ms"] is not None]),
+        "messages_per_second": percentiles([r["messages_per_second"] for r in ok]),
+        "interims_total": sum(r["interims"] for r in ok),
+        "finals_total": sum(r["finals"] for r in ok),
+    }
+    if sampler:
+        level["server"] = await sampler.stop()
+    return level
+
+
+async def main(args):
+    pcm = load_pcm(args.audio)
+    if args.repeat > 1:
+        pcm = pcm * args.repeat
+
+    report = {
+        "url": args.url,
+        "audio": args.audio,
+        "audio_seconds": round(len(pcm) / BYTES_PER_SECOND, 2),
+        "chunk_ms": args.chunk_ms,
+        "protocol": args.protocol or "full",
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "levels": [],
+    }
+
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        print(f"concurrency={concurrency} ...", file=sys.stderr)
+        report["levels"].append(await run_level(args, pcm, concurrency))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/stt/websocket 부하 테스트")
+    parser.add_argument("--url", default="ws://localhost:8000/stt/websocket")
+    parser.add_argument("--audio", required=True, help="오디오 파일 (.mp3 등은 ffmpeg 필요)")
+    parser.add_argument("--concurrency", default="1,10,50", help="쉼표로 구분한 동시 세션 수")
+    parser.add_argument("--lang", default="ko-KR")
+    parser.add_argument("--protocol", default=None, help="중간 결과 프로토콜 (full / delta)")
+    parser.add_argument("--chunk-ms", type=int, default=500, help="프레임 길이 (recorder-processor.js 기본값 500ms)")
+    parser.add_argument("--repeat", type=int, default=1, help="오디오 반복 횟수")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="세션 시작을 분산할 시간 (초)")
+    parser.add_argument("--final-timeout", type=float, default=5.0, help="end 이후 메시지 대기 시간 (초)")
+    parser.add_argument("--server-pid", type=int, default=None, help="RSS/CPU를 측정할 서버 PID")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    asyncio.run(main(parser.parse_args()))
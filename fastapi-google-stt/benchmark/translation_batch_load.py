@@ -0,0 +1,154 @@
+"""
+/openai/translate 동시 요청 부하 테스트 및 처리량 / 비용 측정
+
+짧은 문장 번역 요청을 동시에 보내고 다음 지표를 JSON으로 출력합니다.
+- requests_per_second: 전체 요청 수 / 소요 시간
+- first_token_ms / total_ms: 요청별 첫 토큰 / 마지막 토큰([DONE])까지 걸린 시간 백분위수
+- llm: 실행 전후 /openai/metrics 차이로 계산한 LLM 호출 수, 토큰 사용량, 예상 비용
+
+서버를 TRANSLATION_BATCH_ENABLED=true / false로 각각 실행해 결과를 비교합니다.
+캐시 적중이 섞이지 않도록 서버는 TRANSLATION_CACHE_ENABLED=false로 실행하세요.
+
+사용 예:
+    python benchmark/translation_batch_load.py --script-id <script id> \
+        --concurrency 1,20,50 --output batch_on.json
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import httpx
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+
+# 회의 중 자주 나오는 짧은 발화
+DEFAULT_TEXTS = [
+    "네", "감사합니다", "다음 슬라이드로 넘어가겠습니다", "질문 있으신가요?",
+    "잠시만 기다려 주세요", "화면 공유하겠습니다", "좋은 의견입니다", "일정은 다음 주 금요일입니다",
+    "예산 검토가 필요합니다", "회의를 마치겠습니다",
+]
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 2) for p in PERCENTILES}
+    summary["max"] = round(float(max(values)), 2)
+    summary["count"] = len(values)
+    return summary
+
+
+async def run_request(client: httpx.AsyncClient, args, text: str) -> dict:
+    """번역 요청 하나를 보내고 SSE 스트림을 끝까지 읽음"""
+    started = time.monotonic()
+    first_token = None
+    tokens = []
+    async with client.stream(
+        "POST",
+        f"{args.url}/openai/translate",
+        json={"lang": args.lang, "message": text},
+        headers={"x-script-id": args.script_id},
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[len("data: "):]
+            if data == "[DONE]":
+                break
+            if first_token is None:
+                first_token = time.monotonic()
+            tokens.append(data)
+    finished = time.monotonic()
+    return {
+        "first_token_ms": (first_token - started) * 1000 if first_token else None,
+        "total_ms": (finished - started) * 1000,
+        "text": "".join(tokens),
+    }
+
+
+async def get_translation_usage(client: httpx.AsyncClient, url: str) -> dict:
+    """요청별 / 묶음 경로를 합친 LLM 호출 수와 토큰 사용량"""
+    response = await client.get(f"{url}/openai/metrics")
+    response.raise_for_status()
+    translation = response.json()["translation"]
+    return {
+        key: translation["single"][key] + translation["batch"][key]
+        for key in ("llm_requests", "input_tokens", "output_tokens")
+    }
+
+
+async def run_level(client: httpx.AsyncClient, args, concurrency: int) -> dict:
+    """동시 요청 수준 하나를 실행하고 집계"""
+    texts = [DEFAULT_TEXTS[i % len(DEFAULT_TEXTS)] for i in range(concurrency * args.rounds)]
+    before = await get_translation_usage(client, args.url)
+
+    started = time.monotonic()
+    results = []
+    for round_index in range(args.rounds):
+        batch = texts[round_index * concurrency:(round_index + 1) * concurrency]
+        results += await asyncio.gather(*(run_request(client, args, text) for text in batch), return_exceptions=True)
+    elapsed = time.monotonic() - started
+
+    after = await get_translation_usage(client, args.url)
+    usage = {key: after[key] - before[key] for key in after}
+    cost = (usage["input_tokens"] * args.input_price + usage["output_tokens"] * args.output_price) / 1_000_000
+
+    ok = [r for r in results if isinstance(r, dict)]
+    failed = [repr(r) for r in results if not isinstance(r, dict)]
+    return {
+        "concurrency": concurrency,
+        "requests_ok": len(ok),
+        "requests_failed": len(failed),
+        "failures": failed[:10],
+        "empty_translations": sum(1 for r in ok if not r["text"]),
+        "wall_seconds": round(elapsed, 2),
+        "requests_per_second": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        "first_token_ms": percentiles([r["first_token_ms"] for r in ok if r["first_token_ms"] is not None]),
+        "total_ms": percentiles([r["total_ms"] for r in ok]),
+        "llm": {
+            **usage,
+            "requests_per_llm_call": round(len(ok) / usage["llm_requests"], 2) if usage["llm_requests"] else None,
+            "cost_usd": round(cost, 6),
+            "cost_usd_per_1k_requests": round(cost / len(ok) * 1000, 4) if ok else None,
+        },
+    }
+
+
+async def main(args):
+    report = {
+        "url": args.url,
+        "lang": args.lang,
+        "rounds": args.rounds,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "levels": [],
+    }
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=httpx.Limits(max_connections=None)) as client:
+        report["batching"] = (await client.get(f"{args.url}/openai/metrics")).json()["translation"]["batch"]["enabled"]
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            print(f"concurrency={concurrency} ...", file=sys.stderr)
+            report["levels"].append(await run_level(client, args, concurrency))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/openai/translate 부하 테스트")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--script-id", required=True, help="x-script-id 헤더로 보낼 스크립트 ID")
+    parser.add_argument("--concurrency", default="1,20,50", help="쉼표로 구분한 동시 요청 수")
+    parser.add_argument("--rounds", type=int, default=3, help="동시 요청 수준별 반복 횟수")
+    parser.add_argument("--lang", default="en-US")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    # gpt-4o-mini 기준 1M 토큰당 가격 (USD)
+    parser.add_argument("--input-price", type=float, default=0.15)
+    parser.add_argument("--output-price", type=float, default=0.60)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""
+벡터 DB 추가 / 검색 지연시간 비교: 호출마다 Chroma를 새로 여는 방식 vs 공유 레지스트리
+
+- per_call: 예전 init_vectordb처럼 호출마다 Chroma와 임베딩 클라이언트를 새로 생성
+- registry: VectorStoreRegistry로 한 번 연 클라이언트 / 컬렉션 / 임베딩 클라이언트를 재사용
+
+각 방식으로 발화 한 줄 추가(add_documents)와 스크립트 필터 검색(similarity_search)을
+--iterations회씩 실행하고 지연시간 백분위수를 JSON으로 출력합니다.
+기본값은 가짜 임베딩(--embeddings fake)으로 Chroma를 여는 비용만 측정하며,
+--embeddings openai면 OPENAI_API_KEY로 실제 임베딩 호출까지 포함합니다.
+
+사용 예:
+    python benchmark/vector_store_latency.py --iterations 200 --output vector_bench.json
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_chroma import Chroma
+from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.services.openai_vector_store import VectorStoreRegistry, COLLECTION_NAMES, create_embeddings
+
+PERCENTILES = (50, 90, 95, 99)
+SCRIPT_ID = "benchmark"
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 2) for p in PERCENTILES}
+    summary["max"] = round(float(max(values)), 2)
+    summary["count"] = len(values)
+    return summary
+
+
+def make_embeddings_factory(kind: str):
+    if kind == "openai":
+        return create_embeddings
+    return lambda: DeterministicFakeEmbedding(size=1536)
+
+
+def measure(get_vectordb, iterations: int) -> dict:
+    """발화 추가와 검색을 번갈아 실행하며 각각의 지연시간(ms) 측정"""
+    add_ms, query_ms = [], []
+    for i in range(iterations):
+        started = time.perf_counter()
+        get_vectordb().add_documents([Document(
+            page_content=f"벤치마크 발화 {i}: 다음 분기 일정과 예산을 검토합니다",
+            metadata={"script_id": SCRIPT_ID, "source": "stt"},
+        )])
+        add_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        get_vectordb().similarity_search("예산 검토", k=5, filter={"script_id": SCRIPT_ID})
+        query_ms.append((time.perf_counter() - started) * 1000)
+    return {"add_ms": percentiles(add_ms), "query_ms": percentiles(query_ms)}
+
+
+def main(args):
+    embeddings_factory = make_embeddings_factory(args.embeddings)
+    report = {
+        "iterations": args.iterations,
+        "embeddings": args.embeddings,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    with tempfile.TemporaryDirectory() as per_call_path, tempfile.TemporaryDirectory() as registry_path:
+        def per_call():
+            return Chroma(
+                collection_name=COLLECTION_NAMES[0],
+                embedding_function=embeddings_factory(),
+                persist_directory=per_call_path,
+            )
+
+        print("per_call ...", file=sys.stderr)
+        report["per_call"] = measure(per_call, args.iterations)
+
+        registry = VectorStoreRegistry(registry_path, embeddings_factory)
+        print("registry ...", file=sys.stderr)
+        report["registry"] = measure(lambda: registry.get(0), args.iterations)
+        registry.close()
+
+    for metric in ("add_ms", "query_ms"):
+        before, after = report["per_call"][metric]["p50"], report["registry"][metric]["p50"]
+        report.setdefault("p50_speedup", {})[metric] = round(before / after, 2) if after else None
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벡터 DB 추가 / 검색 지연시간 비교")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--embeddings", choices=("fake", "openai"), default="fake", help="임베딩 종류")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    main(parser.parse_args())
@@ -0,0 +1,22 @@
+# conftest.py - 단위 테스트 공통 설정
+import os
+import sys
+
+# 외부 서비스 없이 모듈을 불러올 수 있도록 필요한 환경 변수 기본값 설정
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+
+@pytest.fixture
+def fake_stt(monkeypatch):
+    """지연 없는 가짜 STT 백엔드를 프로세스 전역 백엔드로 사용"""
+    from app.services import stt_backend
+    from app.services.fake_stt_backend import FakeSttBackend
+
+    backend = FakeSttBackend(latency_ms=0, jitter_ms=0)
+    monkeypatch.setattr(stt_backend, "_backend", backend)
+    return backend
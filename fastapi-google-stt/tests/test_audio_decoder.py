@@ -0,0 +1,56 @@
+import asyncio
+import stat
+
+import pytest
+
+from app.services import audio_decoder
+from app.services.audio_decoder import AUDIO_FORMAT_WEBM_OPUS, AudioDecodeError, StreamingAudioDecoder
+
+
+def fake_ffmpeg(tmp_path, script):
+    path = tmp_path / "ffmpeg"
+    path.write_text("#!/bin/sh\n" + script)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_noisy_stderr_does_not_stall_decoding(tmp_path, monkeypatch):
+    # stderr 파이프 버퍼(64KB)보다 많이 쓴 뒤에야 stdout으로 출력하는 디코더
+    monkeypatch.setattr(audio_decoder, "FFMPEG_PATH", fake_ffmpeg(tmp_path, (
+        "i=0; while [ $i -lt 2000 ]; do echo \"warning line $i padding padding padding\" >&2; i=$((i+1)); done\n"
+        "cat\n"
+    )))
+    received = []
+
+    async def sink(chunk):
+        received.append(chunk)
+
+    async def run():
+        decoder = StreamingAudioDecoder(AUDIO_FORMAT_WEBM_OPUS, sink)
+        await decoder.start()
+        await decoder.feed(b"\1\2" * 100)
+        await asyncio.wait_for(decoder.close(), timeout=5)
+        return decoder
+
+    decoder = asyncio.run(run())
+    assert b"".join(received) == b"\1\2" * 100
+    assert len(decoder._stderr_tail) <= audio_decoder.AUDIO_DECODER_STDERR_TAIL_BYTES
+    assert decoder._stderr_tail.rstrip().endswith(b"warning line 1999 padding padding padding")
+
+
+def test_decoder_exit_reports_stderr_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_decoder, "FFMPEG_PATH", fake_ffmpeg(tmp_path, "echo 'Invalid data found' >&2; exit 1\n"))
+
+    async def sink(chunk):
+        pass
+
+    async def run():
+        decoder = StreamingAudioDecoder(AUDIO_FORMAT_WEBM_OPUS, sink)
+        await decoder.start()
+        await decoder._process.wait()
+        with pytest.raises(AudioDecodeError, match="Invalid data found"):
+            for _ in range(100):
+                await decoder.feed(b"\0" * 4096)
+        await decoder.cancel()
+
+    asyncio.run(run())
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.services.audio_ingest_buffer import (
+    AudioBufferOverflowError,
+    AudioIngestBuffer,
+    POLICY_BLOCK,
+    POLICY_DROP_OLDEST,
+    POLICY_FAIL,
+    get_ingest_stats,
+)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AudioIngestBuffer("bad-policy", policy="wait")
+
+
+def test_drop_oldest_keeps_newest_chunks():
+    async def run():
+        buffer = AudioIngestBuffer("drop", max_bytes=6, max_chunks=10, policy=POLICY_DROP_OLDEST)
+        for chunk in (b"aa", b"bb", b"cc", b"dd"):
+            await buffer.put(chunk)
+        buffer.close()
+        chunks = []
+        while (chunk := await buffer.get()) is not None:
+            chunks.append(chunk)
+        stats = buffer.get_stats()
+        buffer.release()
+        return chunks, stats
+
+    chunks, stats = asyncio.run(run())
+    assert chunks == [b"bb", b"cc", b"dd"]
+    assert stats["dropped_chunks"] == 1 and stats["dropped_bytes"] == 2
+
+
+def test_fail_policy_raises_when_full():
+    async def run():
+        buffer = AudioIngestBuffer("fail", max_bytes=100, max_chunks=2, policy=POLICY_FAIL)
+        await buffer.put(b"a")
+        await buffer.put(b"b")
+        try:
+            with pytest.raises(AudioBufferOverflowError):
+                await buffer.put(b"c")
+            return buffer.get_stats()
+        finally:
+            buffer.release()
+
+    stats = asyncio.run(run())
+    assert stats["queue_depth"] == 2 and stats["dropped_chunks"] == 1
+
+
+def test_block_policy_waits_for_space():
+    async def run():
+        buffer = AudioIngestBuffer("block", max_bytes=4, max_chunks=10, policy=POLICY_BLOCK)
+        await buffer.put(b"aaaa")
+        blocked = asyncio.create_task(buffer.put(b"bb"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert await buffer.get() == b"aaaa"
+        await asyncio.wait_for(blocked, timeout=1)
+        stats = buffer.get_stats()
+        assert await buffer.get() == b"bb"
+        buffer.release()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["blocked_count"] == 1 and stats["dropped_chunks"] == 0
+
+
+def test_oversized_chunk_is_accepted_into_empty_buffer():
+    async def run():
+        buffer = AudioIngestBuffer("oversized", max_bytes=2, max_chunks=1, policy=POLICY_FAIL)
+        await buffer.put(b"abcdef")
+        chunk = await buffer.get()
+        buffer.release()
+        return chunk
+
+    assert asyncio.run(run()) == b"abcdef"
+
+
+def test_close_drains_then_returns_none_and_release_frees_global_bytes():
+    async def run():
+        buffer = AudioIngestBuffer("drain", max_bytes=100, max_chunks=10, policy=POLICY_BLOCK)
+        await buffer.put(b"xyz")
+        assert get_ingest_stats()["global_bytes"] == 3
+        buffer.close()
+        await buffer.put(b"ignored")
+        assert await buffer.get() == b"xyz"
+        assert await buffer.get() is None
+        await buffer.put(b"later")
+        buffer.release()
+        return get_ingest_stats()
+
+    stats = asyncio.run(run())
+    assert stats["global_bytes"] == 0
+    assert all(session["session_id"] != "drain" for session in stats["sessions"])
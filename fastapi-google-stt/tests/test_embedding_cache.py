@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCacheStore, make_embedding_key
+
+
+class CountingEmbeddings(Embeddings):
+    """받은 텍스트를 기록하고 텍스트 길이로 벡터를 만드는 임베딩"""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[len(text) / 3, 0.1, -1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EmbeddingCacheStore(path=str(tmp_path / "embeddings.sqlite3"), memory_entries=100, disk_entries=100)
+    yield store
+    store.close()
+
+
+def test_vectors_are_stored_as_float16_and_read_back_identically(store, tmp_path):
+    stored = store.put_many({"k": [1 / 3, 0.1, -1.0]})["k"]
+    assert stored != [1 / 3, 0.1, -1.0]
+    assert stored == np.asarray([1 / 3, 0.1, -1.0], dtype=np.float16).astype(np.float32).tolist()
+
+    reopened = EmbeddingCacheStore(path=store.path, memory_entries=100)
+    assert reopened.get_many(["k", "other"]) == {"k": stored}
+    assert (reopened.disk_hits, reopened.misses) == (1, 1)
+    reopened.close()
+
+
+def test_float32_store_keeps_full_precision(tmp_path):
+    store = EmbeddingCacheStore(path=str(tmp_path / "e.sqlite3"), dtype="float32")
+    vector = np.asarray([1 / 3, 0.1], dtype=np.float32).tolist()
+    assert store.put_many({"k": vector}) == {"k": vector}
+    store.close()
+
+
+def test_disk_eviction_drops_least_recently_used(tmp_path):
+    store = EmbeddingCacheStore(path=str(tmp_path / "e.sqlite3"), memory_entries=0, disk_entries=3)
+    for key in "abc":
+        store.put_many({key: [1.0]})
+    store.get_many(["a"])
+    store.put_many({"d": [1.0]})
+
+    assert sorted(store.get_many(list("abcd"))) == ["a", "c", "d"]
+    assert store.get_stats()["disk_evictions"] == 1
+    assert store.get_stats()["disk_entries"] == 3
+    store.close()
+
+
+def test_duplicate_keys_count_once(store):
+    store.put_many({"a": [1.0]})
+    assert list(store.get_many(["a", "a", "b", "b"])) == ["a"]
+    assert (store.memory_hits, store.misses) == (1, 1)
+
+
+def test_cached_embeddings_only_embeds_new_normalized_texts(store):
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, "text-embedding-3-small", store)
+
+    first = embeddings.embed_documents(["hello  world", "bye", "hello world"])
+    second = embeddings.embed_documents(["bye", "new"])
+    query = embeddings.embed_query(" hello world ")
+
+    assert inner.calls == [["hello world", "bye"], ["new"]]
+    assert first[0] == first[2] == query
+    assert second[0] == first[1]
+    assert embeddings.get_stats()["api_calls"] == 2
+    assert embeddings.get_stats()["embedded_texts"] == 3
+
+
+def test_embedding_key_depends_on_model():
+    assert make_embedding_key("m1", "a  b") == make_embedding_key("m1", "a b")
+    assert make_embedding_key("m1", "a b") != make_embedding_key("m2", "a b")
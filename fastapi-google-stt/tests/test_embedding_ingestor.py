@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from langchain.schema import Document
+
+from app.services import openai_vector_store
+from app.services.openai_vector_store import EmbeddingIngestor
+
+
+class FakeVectorStore:
+    """add_documents 호출(배치)을 기록하는 가짜 컬렉션"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def add_documents(self, docs):
+        if self.error is not None:
+            raise self.error
+        self.batches.append([doc.page_content for doc in docs])
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    stores = {}
+
+    def init_vectordb(collection_num=0):
+        return stores.setdefault(collection_num, FakeVectorStore())
+
+    monkeypatch.setattr(openai_vector_store, "init_vectordb", init_vectordb)
+    return stores
+
+
+def docs(*texts, script_id="s"):
+    return [Document(page_content=text, metadata={"script_id": script_id}) for text in texts]
+
+
+def make_ingestor(max_wait_ms=50):
+    ingestor = EmbeddingIngestor()
+    ingestor.max_wait = max_wait_ms / 1000
+    return ingestor
+
+
+def test_concurrent_adds_share_one_batch_per_collection(stores):
+    async def run():
+        ingestor = make_ingestor()
+        await asyncio.gather(
+            ingestor.add(docs("a", script_id="s1")),
+            ingestor.add(docs("b", "c", script_id="s2")),
+            ingestor.add(docs("x"), collection_num=1),
+        )
+        stats = ingestor.get_stats()
+        await ingestor.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stores[0].batches == [["a", "b", "c"]]
+    assert stores[1].batches == [["x"]]
+    assert stats["batches"] == 2 and stats["documents"] == 4 and stats["queued_documents"] == 0
+
+
+def test_batch_is_flushed_when_document_limit_is_reached(stores, monkeypatch):
+    monkeypatch.setattr(openai_vector_store, "EMBEDDING_BATCH_MAX_DOCS", 3)
+
+    async def run():
+        ingestor = make_ingestor(max_wait_ms=10_000)
+        await asyncio.wait_for(asyncio.gather(
+            ingestor.add(docs("a", "b")),
+            ingestor.add(docs("c")),
+            ingestor.add(docs("d", "e", "f")),
+        ), timeout=1)
+        await ingestor.close()
+
+    asyncio.run(run())
+    # 한 번의 add()로 들어온 문서는 나누지 않음
+    assert stores[0].batches == [["a", "b", "c"], ["d", "e", "f"]]
+
+
+def test_token_budget_splits_batches(stores, monkeypatch):
+    monkeypatch.setattr(openai_vector_store, "EMBEDDING_BATCH_TOKEN_BUDGET", 1)
+
+    async def run():
+        ingestor = make_ingestor()
+        await asyncio.gather(ingestor.add(docs("long text one")), ingestor.add(docs("long text two")))
+        await ingestor.close()
+
+    asyncio.run(run())
+    assert stores[0].batches == [["long text one"], ["long text two"]]
+
+
+def test_failed_batch_raises_to_every_caller(monkeypatch):
+    store = FakeVectorStore(error=RuntimeError("chroma down"))
+    monkeypatch.setattr(openai_vector_store, "init_vectordb", lambda collection_num=0: store)
+
+    async def run():
+        ingestor = make_ingestor()
+        results = await asyncio.gather(
+            ingestor.add(docs("a")), ingestor.add(docs("b")), return_exceptions=True
+        )
+        stats = ingestor.get_stats()
+        await ingestor.close()
+        return results, stats
+
+    results, stats = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert stats["failed_batches"] == 1 and stats["batches"] == 0
+
+
+def test_close_flushes_pending_documents(stores):
+    async def run():
+        ingestor = make_ingestor(max_wait_ms=10_000)
+        pending = asyncio.create_task(ingestor.add(docs("late")))
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(ingestor.close(), timeout=1)
+        await pending
+
+    asyncio.run(run())
+    assert stores[0].batches == [["late"]]
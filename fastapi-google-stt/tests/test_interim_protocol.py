@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.services.interim_protocol import (
+    InterimPublisher,
+    PROTOCOL_DELTA,
+    PROTOCOL_FULL,
+    common_prefix_length,
+    utf16_length,
+)
+
+
+def apply_delta(previous: str, message: dict) -> str:
+    """클라이언트(String.slice)와 같은 방식으로 UTF-16 코드 유닛 기준 복원"""
+    units = previous.encode("utf-16-le")[:message["offset"] * 2]
+    return units.decode("utf-16-le") + message["text"]
+
+
+def publish(texts, protocol=PROTOCOL_DELTA, max_rate=0):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        publisher = InterimPublisher(send, protocol, max_rate=max_rate)
+        for text in texts:
+            await publisher.interim(text)
+        return publisher
+
+    publisher = asyncio.run(run())
+    return sent, publisher
+
+
+def test_common_prefix_length():
+    assert common_prefix_length("hello", "help") == 3
+    assert common_prefix_length("", "abc") == 0
+    assert common_prefix_length("abc", "abc") == 3
+
+
+def test_utf16_length_counts_surrogate_pairs():
+    assert utf16_length("abc") == 3
+    assert utf16_length("회의") == 2
+    assert utf16_length("a😀") == 3
+
+
+def test_delta_sends_only_changed_suffix():
+    sent, _ = publish(["오늘", "오늘 회의", "오늘 회의는", "오늘 회의"])
+    assert sent == [
+        {"type": "interim_delta", "offset": 0, "text": "오늘"},
+        {"type": "interim_delta", "offset": 2, "text": " 회의"},
+        {"type": "interim_delta", "offset": 5, "text": "는"},
+        {"type": "interim_delta", "offset": 5, "text": ""},
+    ]
+
+
+@pytest.mark.parametrize("texts", [
+    ["a😀b", "a😀bc", "a😀x", "😀😀", "😀"],
+    ["𠀀 확장", "𠀀 확장 한자", "𠀁"],
+])
+def test_delta_offsets_rebuild_text_with_utf16_slicing(texts):
+    sent, _ = publish(texts)
+    text = ""
+    rebuilt = []
+    for message in sent:
+        text = apply_delta(text, message)
+        rebuilt.append(text)
+    assert rebuilt == texts
+
+
+def test_full_protocol_sends_whole_text_and_skips_repeats():
+    sent, _ = publish(["a", "a", "ab"], protocol=PROTOCOL_FULL)
+    assert sent == [{"type": "interim", "text": "a"}, {"type": "interim", "text": "ab"}]
+
+
+def test_rate_limit_keeps_only_latest_pending_interim():
+    sent, publisher = publish(["one", "two", "three"], max_rate=1)
+    assert [m["text"] for m in sent] == ["one"]
+    assert publisher.pending == "three"
+    assert 0 < publisher.flush_delay() <= 1.0
+
+    asyncio.run(publisher.flush())
+    assert sent[-1] == {"type": "interim_delta", "offset": 0, "text": "three"}
+    assert publisher.flush_delay() is None
+
+
+def test_final_resets_delta_base():
+    sent, publisher = publish(["hello"])
+    publisher.final()
+    asyncio.run(publisher.interim("hello again"))
+    assert sent[-1] == {"type": "interim_delta", "offset": 0, "text": "hello again"}
+
+
+def test_unknown_protocol_is_rejected():
+    with pytest.raises(ValueError):
+        InterimPublisher(None, "binary")
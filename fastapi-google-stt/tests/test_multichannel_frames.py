@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+from app.services.interim_protocol import PROTOCOL_FULL
+from app.services.websocket_stt_service import MultiChannelSession
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def test_unknown_channel_frames_warn_once_and_are_counted(fake_stt):
+    websocket = FakeWebSocket()
+
+    async def run():
+        session = MultiChannelSession(websocket, "en-US", PROTOCOL_FULL, 0, None, False)
+        await session.start([0])
+        await session.feed(b"\x07" + b"\0" * 320)
+        await session.feed(b"\x07" + b"\0" * 320)
+        await session.feed(b"\x00" + b"\0" * 320)
+        await session.cancel()
+        return session
+
+    session = asyncio.run(run())
+    warnings = [m for m in websocket.sent if m["type"] == "warning"]
+    assert warnings == [{"type": "warning", "channel": 7, "message": warnings[0]["message"]}]
+    assert session.unknown_frames == 2
@@ -0,0 +1,222 @@
+import asyncio
+import contextlib
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import transcript_writer
+from app.services.transcript_writer import ScriptWriteBehind
+
+
+class Storage:
+    """스크립트 조회, 파일 추가, 임베딩을 대신하는 메모리 저장소"""
+
+    def __init__(self, scripts=("s1", "s2")):
+        self.scripts = set(scripts)
+        self.lookups = []
+        self.files = {}
+        self.embedded = []
+        self.failing = set()  # 임베딩이 실패하는 script_id
+
+    @contextlib.asynccontextmanager
+    async def session(self):
+        yield None
+
+    async def get_script_file_path(self, db, script_id):
+        self.lookups.append(script_id)
+        if script_id not in self.scripts:
+            raise HTTPException(status_code=404, detail=f"Script with ID {script_id} not found")
+        return f"/scripts/{script_id}.txt"
+
+    def append_lines(self, file_path, lines):
+        self.files.setdefault(file_path, []).extend(lines)
+
+    async def add_texts(self, lines, script_id):
+        if script_id in self.failing:
+            raise RuntimeError("vector store unavailable")
+        self.embedded.extend(lines)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = Storage()
+    monkeypatch.setattr(transcript_writer, "AsyncSessionLocal", storage.session)
+    monkeypatch.setattr(transcript_writer, "get_script_file_path", storage.get_script_file_path)
+    monkeypatch.setattr(transcript_writer, "append_lines", storage.append_lines)
+    monkeypatch.setattr(transcript_writer, "add_texts", storage.add_texts)
+    monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_FLUSH_INTERVAL", 0.01)
+    monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_RETRY_DELAY", 0.001)
+    return storage
+
+
+def read_journal(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def unacked_texts(path):
+    records = read_journal(path)
+    acked = {seq for record in records if "ack" in record for seq in record["ack"]}
+    return [record["text"] for record in records if "seq" in record and record["seq"] not in acked]
+
+
+def test_cancelled_enqueue_does_not_block_flush(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_QUEUE_SIZE", 1)
+
+    async def run():
+        writer = ScriptWriteBehind(str(tmp_path / "journal.jsonl"))
+        await writer.start()
+        writer._task.cancel()  # 저장 태스크를 멈춰 큐가 비지 않도록 함
+        await asyncio.gather(writer._task, return_exceptions=True)
+        writer._task = asyncio.create_task(asyncio.sleep(3600))
+
+        await writer.enqueue("s1", "queued")
+        blocked = asyncio.create_task(writer.enqueue("s1", "cancelled"))
+        await asyncio.sleep(0.01)
+        blocked.cancel()
+        await asyncio.gather(blocked, return_exceptions=True)
+        stats = writer.get_stats()
+        writer._task.cancel()
+        return stats, dict(writer._pending)
+
+    stats, pending = asyncio.run(run())
+    assert pending == {"s1": 1}
+    assert stats["enqueued"] == 1 and stats["journal_outstanding"] == 1
+
+
+def test_script_path_cache_is_bounded_and_expires(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_SCRIPT_CACHE_SIZE", 2)
+    storage.scripts.update({"s3"})
+
+    async def run():
+        writer = ScriptWriteBehind(str(tmp_path / "journal.jsonl"))
+        for script_id in ("s1", "s1", "s2", "s3", "s1"):
+            await writer.get_file_path(script_id)
+        cached = list(writer._file_paths)
+
+        # 유지 시간이 지나면 다시 조회하므로 삭제된 스크립트는 404
+        monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_SCRIPT_CACHE_TTL", 0)
+        storage.scripts.discard("s3")
+        with pytest.raises(HTTPException) as error:
+            await writer.get_file_path("s3")
+        return cached, error.value.status_code
+
+    cached, status = asyncio.run(run())
+    assert storage.lookups == ["s1", "s2", "s3", "s1", "s3"]
+    assert cached == ["s3", "s1"]
+    assert status == 404
+
+
+def test_missing_header_is_rejected_before_lookup(storage, tmp_path):
+    async def run():
+        writer = ScriptWriteBehind(str(tmp_path / "journal.jsonl"))
+        with pytest.raises(HTTPException) as error:
+            await writer.enqueue(None, "text")
+        return error.value.status_code
+
+    assert asyncio.run(run()) == 400
+    assert storage.lookups == []
+
+
+def test_failed_write_clears_cached_path(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_MAX_RETRIES", 0)
+    storage.failing.add("s1")
+
+    async def run():
+        writer = ScriptWriteBehind(str(tmp_path / "journal.jsonl"))
+        await writer.enqueue("s1", "text")
+        await writer.flush("s1")
+        cached = "s1" in writer._file_paths
+        await writer.close()
+        return cached
+
+    assert asyncio.run(run()) is False
+
+
+def test_entries_past_retries_are_dead_until_restart(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_MAX_RETRIES", 1)
+    path = str(tmp_path / "journal.jsonl")
+    storage.failing.add("s2")
+
+    async def first_run():
+        writer = ScriptWriteBehind(path)
+        await writer.enqueue("s1", "saved")
+        await writer.enqueue("s2", "stuck")
+        # 재시도를 초과해도 flush()는 반환
+        await asyncio.wait_for(writer.flush("s2"), timeout=1)
+        stats = writer.get_stats()
+        await writer.close()
+        return stats
+
+    stats = asyncio.run(first_run())
+    assert stats["dead"] == 1 and stats["retries"] == 1 and stats["pending_scripts"] == 0
+    assert unacked_texts(path) == ["stuck"]
+
+    storage.failing.clear()
+
+    async def second_run():
+        writer = ScriptWriteBehind(path)
+        await writer.start()
+        await writer.flush("s2")
+        stats = writer.get_stats()
+        await writer.close()
+        return stats
+
+    stats = asyncio.run(second_run())
+    assert stats["replayed"] == 1 and stats["saved"] == 1
+    assert storage.embedded == ["saved", "stuck"]
+    assert storage.files["/scripts/s2.txt"] == ["stuck"]
+    assert read_journal(path) == []
+
+
+def test_journal_replays_unacked_entries_after_crash(storage, tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for record in (
+            {"seq": 1, "script_id": "s1", "text": "one"},
+            {"seq": 2, "script_id": "s1", "text": "two"},
+            {"ack": [1]},
+            {"seq": 3, "script_id": "s2", "text": "three"},
+        ):
+            f.write(json.dumps(record) + "\n")
+        f.write('{"seq": 4, "script_id": "s1", "te')  # 기록 도중 중단된 줄
+
+    async def run():
+        writer = ScriptWriteBehind(path)
+        await writer.start()
+        await writer.flush("s1")
+        await writer.flush("s2")
+        await writer.enqueue("s1", "four")
+        await writer.flush("s1")
+        await writer.close()
+        return writer._seq
+
+    last_seq = asyncio.run(run())
+    assert sorted(storage.embedded) == ["four", "three", "two"]
+    assert last_seq == 4  # 새 항목은 남은 항목 다음 번호 사용
+    assert read_journal(path) == []
+
+
+def test_journal_is_compacted_to_outstanding_entries(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_JOURNAL_COMPACT_RECORDS", 10)
+    monkeypatch.setattr(transcript_writer, "WRITE_BEHIND_MAX_RETRIES", 0)
+    path = str(tmp_path / "journal.jsonl")
+    storage.failing.add("s2")
+
+    async def run():
+        writer = ScriptWriteBehind(path)
+        await writer.enqueue("s2", "kept")
+        await writer.flush("s2")
+        sizes = []
+        for index in range(30):
+            await writer.enqueue("s1", f"line {index}")
+            await writer.flush("s1")
+            sizes.append(writer.get_stats()["journal_records"])
+        await writer.close()
+        return sizes
+
+    sizes = asyncio.run(run())
+    assert max(sizes) <= 10
+    assert len(read_journal(path)) <= 10
+    assert unacked_texts(path) == ["kept"]
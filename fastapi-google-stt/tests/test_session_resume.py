@@ -0,0 +1,105 @@
+import asyncio
+
+from app.services import stt_session_registry
+from app.services.stt_session_registry import (
+    SessionOutput, detach_session, resume_session, close_detached_sessions, get_resume_stats,
+)
+
+
+class Socket:
+    def __init__(self, fail=False, on_send=None):
+        self.sent = []
+        self.fail = fail
+        self.on_send = on_send
+
+    async def send_text(self, text):
+        if self.fail:
+            raise ConnectionError("closed")
+        self.sent.append(text)
+        if self.on_send is not None:
+            self.on_send(text)
+
+
+def deliver(output, final_id):
+    """process_responses와 같은 순서로 보관 후 전송"""
+    text = f"final-{final_id}"
+    output.record_final(final_id, text)
+    return output.send_text(text)
+
+
+def test_send_failure_detaches_and_resume_replays_unacked_finals_in_order():
+    async def run():
+        output = SessionOutput(Socket())
+        for final_id in range(3):
+            await deliver(output, final_id)
+        output.ack(0)
+
+        output.websocket.fail = True
+        await deliver(output, 3)
+        assert output.websocket is None
+        await deliver(output, 4)  # 소켓 없이 보관만 됨
+
+        # 클라이언트는 1번까지 받았다고 알림
+        new_socket = Socket()
+        await output.attach(new_socket, last_final_id=1)
+        await deliver(output, 5)
+        return new_socket.sent, output
+
+    sent, output = asyncio.run(run())
+    assert sent == ["final-2", "final-3", "final-4", "final-5"]
+    assert output.last_final_id == 5
+
+
+def test_attach_also_sends_finals_recorded_during_replay():
+    async def run():
+        output = SessionOutput(None)
+        for final_id in range(2):
+            output.record_final(final_id, f"final-{final_id}")
+
+        def on_send(text):
+            # 재전송 중에 새 최종 결과가 생긴 경우
+            if text == "final-0":
+                output.record_final(2, "final-2")
+
+        socket = Socket(on_send=on_send)
+        await output.attach(socket, last_final_id=-1)
+        return socket.sent
+
+    assert asyncio.run(run()) == ["final-0", "final-1", "final-2"]
+
+
+def test_acked_and_overflowing_finals_are_not_kept():
+    output = SessionOutput(None, max_finals=3)
+    for final_id in range(5):
+        output.record_final(final_id, f"final-{final_id}")
+    assert [final_id for final_id, _ in output.finals] == [2, 3, 4]
+
+    output.ack(3)
+    output.record_final(3, "late duplicate")
+    assert [final_id for final_id, _ in output.finals] == [4]
+    output.ack(1)  # 더 작은 ack는 무시
+    assert output.acked_id == 3
+
+
+def test_detached_session_resumes_before_ttl_and_expires_after(monkeypatch):
+    monkeypatch.setattr(stt_session_registry, "STT_RESUME_TTL", 0.05)
+    expired = []
+
+    async def on_expire(token):
+        expired.append(token)
+
+    async def run():
+        detach_session("kept", {"n": 1}, lambda: on_expire("kept"))
+        detach_session("lost", {"n": 2}, lambda: on_expire("lost"))
+        assert get_resume_stats()["detached_sessions"] == 2
+        assert resume_session("kept") == {"n": 1}
+        await asyncio.sleep(0.1)
+        assert resume_session("lost") is None
+        assert resume_session("kept") is None
+
+        detach_session("shutdown", {}, lambda: on_expire("shutdown"))
+        await close_detached_sessions()
+
+    asyncio.run(run())
+    assert expired == ["lost", "shutdown"]
+    assert get_resume_stats()["detached_sessions"] == 0
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class Upstream:
+    """호출 횟수와 취소 여부를 기록하는 가짜 업스트림 스트림"""
+
+    def __init__(self, items, error=None, delay=0.01):
+        self.items = items
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = False
+
+    async def stream(self):
+        self.calls += 1
+        try:
+            for item in self.items:
+                await asyncio.sleep(self.delay)
+                yield item
+            if self.error is not None:
+                raise self.error
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def collect(group, key, factory):
+    return [item async for item in group.stream(key, factory)]
+
+
+def test_concurrent_requests_share_one_upstream_call():
+    upstream = Upstream(["a", "b", "c"])
+
+    async def run():
+        group = SingleFlight("test-share")
+        first = asyncio.create_task(collect(group, "k", upstream.stream))
+        await asyncio.sleep(0.015)  # 첫 항목을 받은 뒤 합류해도 전체 스트림을 받음
+        second = asyncio.create_task(collect(group, "k", upstream.stream))
+        return await asyncio.gather(first, second), group.get_stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [["a", "b", "c"], ["a", "b", "c"]]
+    assert upstream.calls == 1
+    assert stats["upstream_calls"] == 1 and stats["coalesced"] == 1 and stats["in_flight"] == 0
+
+
+def test_finished_key_starts_a_new_call():
+    upstream = Upstream(["a"])
+
+    async def run():
+        group = SingleFlight("test-sequential")
+        await collect(group, "k", upstream.stream)
+        await collect(group, "k", upstream.stream)
+
+    asyncio.run(run())
+    assert upstream.calls == 2
+
+
+def test_error_is_raised_to_every_subscriber():
+    upstream = Upstream(["a"], error=RuntimeError("upstream failed"))
+
+    async def run():
+        group = SingleFlight("test-error")
+        received = [[], []]
+
+        async def consume(index):
+            async for item in group.stream("k", upstream.stream):
+                received[index].append(item)
+
+        results = await asyncio.gather(consume(0), consume(1), return_exceptions=True)
+        return received, results
+
+    received, results = asyncio.run(run())
+    assert received == [["a"], ["a"]]
+    assert all(isinstance(r, RuntimeError) and str(r) == "upstream failed" for r in results)
+    assert upstream.calls == 1
+
+
+def test_upstream_is_cancelled_when_all_subscribers_leave():
+    upstream = Upstream(["a", "b", "c"], delay=0.05)
+
+    async def run():
+        group = SingleFlight("test-cancel")
+        tasks = [asyncio.create_task(collect(group, "k", upstream.stream)) for _ in range(2)]
+        await asyncio.sleep(0.07)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        return group.get_stats()
+
+    stats = asyncio.run(run())
+    assert upstream.cancelled
+    assert stats["in_flight"] == 0
+
+
+def test_upstream_keeps_running_while_a_subscriber_remains():
+    upstream = Upstream(["a", "b", "c"], delay=0.02)
+
+    async def run():
+        group = SingleFlight("test-partial-cancel")
+        leaving = asyncio.create_task(collect(group, "k", upstream.stream))
+        staying = asyncio.create_task(collect(group, "k", upstream.stream))
+        await asyncio.sleep(0.03)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+    assert not upstream.cancelled and upstream.calls == 1
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from app.services.fake_stt_backend import AUDIO_BYTES_PER_SECOND, FakeSttBackend
+from app.services.stt_backend import SttBackend
+
+
+def test_backend_without_streaming_recognize_cannot_be_created():
+    class Incomplete(SttBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def recognize(backend, seconds, interim_results=True):
+    async def audio():
+        chunk = b"\0" * (AUDIO_BYTES_PER_SECOND // 10)
+        for _ in range(int(seconds * 10)):
+            yield chunk
+
+    async def run():
+        return [result async for result in backend.streaming_recognize(audio(), "en-US", interim_results=interim_results)]
+
+    return asyncio.run(run())
+
+
+def test_fake_backend_is_deterministic_and_ordered():
+    backend = FakeSttBackend(latency_ms=1, jitter_ms=1, seed=7)
+    first = recognize(backend, 4)
+    assert first == recognize(backend, 4)
+
+    finals = [r for r in first if r["is_final"]]
+    # 2.5단어/초 x 4초 = 10단어 -> 8단어 발화 1개 + 종료 시 남은 2단어
+    assert [len(r["transcript"].split()) for r in finals] == [8, 2]
+    assert first[-1]["is_final"]
+    offsets = [r["end_offset"] for r in first]
+    assert offsets == sorted(offsets)
+
+
+def test_fake_backend_without_interim_results_returns_only_finals():
+    results = recognize(FakeSttBackend(latency_ms=0, jitter_ms=0), 4, interim_results=False)
+    assert results and all(r["is_final"] for r in results)
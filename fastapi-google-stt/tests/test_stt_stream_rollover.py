@@ -0,0 +1,157 @@
+import asyncio
+
+from app.services.audio_ring_buffer import AudioRingBuffer
+from app.services.stt_stream_rollover import RolloverMerger, trim_overlap
+
+
+def final(transcript, end_offset):
+    return {"transcript": transcript, "is_final": True, "confidence": 0.9, "end_offset": end_offset}
+
+
+def interim(transcript):
+    return {"transcript": transcript, "is_final": False, "confidence": 0.0, "end_offset": 1.0}
+
+
+def drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def test_trim_overlap_removes_longest_repeated_words():
+    assert trim_overlap("we will review the budget", "the budget and the plan") == "and the plan"
+    assert trim_overlap("a b a b", "a b a b c") == "c"
+
+
+def test_trim_overlap_keeps_text_without_overlap():
+    assert trim_overlap("hello world", "next topic") == "next topic"
+    assert trim_overlap("", "next topic") == "next topic"
+    assert trim_overlap("same words", "same words") == ""
+
+
+def test_merger_drops_finals_inside_replayed_audio():
+    async def run():
+        queue = asyncio.Queue()
+        merger = RolloverMerger(queue, overlap_seconds=2.0)
+        merger.open(0)
+        await merger.emit(0, final("today we review the budget", 239.0))
+        merger.open(1)
+        await merger.emit(1, final("the budget", 1.5))
+        await merger.emit(1, final("the budget and the release plan", 4.0))
+        return drain(queue)
+
+    results = asyncio.run(run())
+    assert [r["transcript"] for r in results] == ["today we review the budget", "and the release plan"]
+
+
+def test_merger_does_not_trim_without_replay():
+    async def run():
+        queue = asyncio.Queue()
+        merger = RolloverMerger(queue, overlap_seconds=2.0)
+        merger.open(0)
+        await merger.emit(0, final("the budget", 10.0))
+        merger.close(0)
+        merger.open(1, replay=False)
+        await merger.emit(1, final("the budget again", 1.0))
+        return drain(queue)
+
+    results = asyncio.run(run())
+    assert [r["transcript"] for r in results] == ["the budget", "the budget again"]
+
+
+def emit_all(merger, *events):
+    async def run():
+        for event in events:
+            if event[0] == "open":
+                merger.open(*event[1:])
+            elif event[0] == "close":
+                merger.close(event[1])
+            else:
+                await merger.emit(*event)
+        return [r["transcript"] for r in drain(merger.response_queue)]
+
+    return asyncio.run(run())
+
+
+def test_merger_trims_overlap_spanning_several_previous_finals():
+    merger = RolloverMerger(asyncio.Queue(), overlap_seconds=2.0)
+    transcripts = emit_all(
+        merger,
+        ("open", 0),
+        (0, final("first point", 235.0)),
+        (0, final("is done", 238.0)),
+        ("open", 1),
+        (1, final("point is done now the second", 3.0)),
+    )
+    assert transcripts == ["first point", "is done", "now the second"]
+
+
+def test_merger_uses_late_final_from_closing_stream_for_dedup():
+    merger = RolloverMerger(asyncio.Queue(), overlap_seconds=2.0)
+    transcripts = emit_all(
+        merger,
+        ("open", 0),
+        ("open", 1),
+        # 이전 스트림의 마지막 최종 결과가 새 스트림 교체 뒤에 도착
+        (0, final("we agreed on", 240.0)),
+        ("close", 0),
+        (1, final("agreed on the date", 2.5)),
+    )
+    assert transcripts == ["we agreed on", "the date"]
+
+
+def test_merger_only_trims_first_final_after_boundary():
+    merger = RolloverMerger(asyncio.Queue(), overlap_seconds=2.0)
+    transcripts = emit_all(
+        merger,
+        ("open", 0),
+        (0, final("yes", 100.0)),
+        ("open", 1),
+        (1, final("yes we can", 2.5)),
+        # 경계 이후에 실제로 반복된 말은 그대로 유지
+        (1, final("we can", 5.0)),
+    )
+    assert transcripts == ["yes", "we can", "we can"]
+
+
+def test_merger_trims_boundary_final_without_offset_and_drops_full_repeat():
+    merger = RolloverMerger(asyncio.Queue(), overlap_seconds=2.0)
+    transcripts = emit_all(
+        merger,
+        ("open", 0),
+        (0, final("see you tomorrow", 239.0)),
+        ("open", 1),
+        # 재전송 구간 밖이지만 이전 결과와 완전히 같으면 보내지 않음
+        (1, final("see you tomorrow", 2.2)),
+        (1, final("goodbye", None)),
+        ("open", 2),
+        (2, final("goodbye everyone", None)),
+    )
+    assert transcripts == ["see you tomorrow", "goodbye", "everyone"]
+
+
+def test_merger_hides_new_interims_until_previous_stream_closes():
+    async def run():
+        queue = asyncio.Queue()
+        merger = RolloverMerger(queue)
+        merger.open(0)
+        merger.open(1)
+        await merger.emit(1, interim("hidden"))
+        await merger.emit(0, interim("old stream"))
+        merger.close(0)
+        await merger.emit(1, interim("shown"))
+        await merger.emit(1, {"error": "boom"})
+        return drain(queue)
+
+    results = asyncio.run(run())
+    assert [r.get("transcript", r.get("error")) for r in results] == ["old stream", "shown", "boom"]
+
+
+def test_ring_buffer_keeps_only_latest_bytes():
+    ring = AudioRingBuffer(5)
+    ring.append(b"abc")
+    ring.append(b"defg")
+    assert ring.tail(ring.max_bytes) == b"cdefg"
+    assert ring.tail(2) == b"fg"
+    assert ring.tail(0) == b""
@@ -0,0 +1,37 @@
+import numpy as np
+
+from app.services import stt_upload_service, voice_activity_detector
+from app.services.stt_upload_service import AUDIO_BYTES_PER_SECOND, split_at_silence
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype("<i2")
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * 16000), dtype="<i2")
+
+
+def test_split_at_silence_cuts_inside_pauses_and_skips_silent_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(stt_upload_service, "STT_SEGMENT_TARGET_SECONDS", 2)
+    monkeypatch.setattr(stt_upload_service, "STT_SEGMENT_MAX_SECONDS", 10)
+    pcm = tmp_path / "audio.pcm"
+    pcm.write_bytes(np.concatenate([tone(3), silence(1), tone(3), silence(2)]).tobytes())
+
+    segments = list(split_at_silence(str(pcm)))
+
+    assert len(segments) == 2
+    first_end = segments[0][1] / AUDIO_BYTES_PER_SECOND
+    assert 3 < first_end < 4
+    assert segments[1][0] == segments[0][1]
+
+
+def test_split_at_silence_does_not_count_as_vad_session(tmp_path):
+    pcm = tmp_path / "audio.pcm"
+    pcm.write_bytes(tone(1).tobytes())
+    before = dict(voice_activity_detector._totals)
+
+    list(split_at_silence(str(pcm)))
+
+    assert voice_activity_detector._totals == before
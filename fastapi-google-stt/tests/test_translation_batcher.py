@@ -0,0 +1,72 @@
+import asyncio
+
+from app.services.translation_batcher import BatchOutputParser, _BatchItem
+
+
+def make_items(count):
+    return [_BatchItem(f"text {index}", "en-US") for index in range(count)]
+
+
+def collected(item):
+    tokens = []
+    while not item.queue.empty():
+        tokens.append(item.queue.get_nowait())
+    return tokens
+
+
+def parse(chunks, count):
+    async def run():
+        items = make_items(count)
+        parser = BatchOutputParser(items)
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+        return items
+
+    return asyncio.run(run())
+
+
+def test_lines_are_routed_to_their_items():
+    items = parse(["<<0>> Hello\n<<1>> Thank you\n"], 2)
+    assert collected(items[0]) == ["Hello", None]
+    assert collected(items[1]) == ["Thank you", None]
+
+
+def test_tokens_split_across_markers_and_lines():
+    chunks = ["<", "<1", ">>", " Good", " idea", "\n<<0", ">> ", "Yes"]
+    items = parse(chunks, 2)
+    assert "".join(t for t in collected(items[1]) if t) == "Good idea"
+    assert items[1].done
+    assert "".join(t for t in collected(items[0]) if t) == "Yes"
+    assert items[0].done
+
+
+def test_tokens_stream_before_line_ends():
+    async def run():
+        items = make_items(1)
+        parser = BatchOutputParser(items)
+        parser.feed("<<0>> Hel")
+        first = collected(items[0])
+        parser.feed("lo\n")
+        return first, collected(items[0])
+
+    first, rest = asyncio.run(run())
+    assert first == ["Hel"]
+    assert rest == ["lo", None]
+
+
+def test_unknown_and_malformed_lines_are_ignored():
+    items = parse(["Sure, here you go:\n<<5>> stray\n<<0>> ok\n"], 1)
+    assert collected(items[0]) == ["ok", None]
+
+
+def test_empty_and_missing_items_are_left_for_fallback():
+    items = parse(["<<0>> \n<<2>> done\n"], 3)
+    assert not items[0].started and not items[0].done
+    assert not items[1].started and not items[1].done
+    assert items[2].done
+
+
+def test_last_line_without_newline_finishes_on_close():
+    items = parse(["<<0>> first\n<<1>> last"], 2)
+    assert collected(items[1]) == ["last", None]
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.translation_cache import TranslationCache, make_cache_key
+
+
+def test_cache_key_ignores_formatting_but_not_language_or_version():
+    key = make_cache_key("Ｈｅｌｌｏ,   world\n", " EN ", "v1")
+    assert key == make_cache_key("Hello, world", "en", "v1")
+    assert key != make_cache_key("Hello, world", "ko", "v1")
+    assert key != make_cache_key("Hello, world", "en", "v2")
+
+
+def test_disk_tier_survives_restart_and_refills_memory(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+
+    first = TranslationCache(path=path, memory_entries=10)
+    asyncio.run(first.put("k", ["안녕", "하세요"]))
+    assert asyncio.run(first.get("k")) == ["안녕", "하세요"]
+    first.close()
+
+    second = TranslationCache(path=path, memory_entries=10)
+    assert asyncio.run(second.get("k")) == ["안녕", "하세요"]
+    assert asyncio.run(second.get("k")) == ["안녕", "하세요"]
+    assert asyncio.run(second.get("missing")) is None
+    stats = second.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["disk_entries"] == 1
+    second.close()
+
+
+def test_memory_lru_spills_to_disk(tmp_path):
+    cache = TranslationCache(path=str(tmp_path / "cache.sqlite3"), memory_entries=2)
+
+    async def run():
+        for key in "abc":
+            await cache.put(key, [key])
+        return await cache.get("a")
+
+    assert asyncio.run(run()) == ["a"]
+    stats = cache.get_stats()
+    assert stats["memory_evictions"] == 2  # "a"가 밀려났다가 다시 올라오며 "b"가 밀려남
+    assert stats["disk_hits"] == 1
+    assert list(cache._memory) == ["c", "a"]
+    cache.close()
+
+
+@pytest.mark.parametrize("eviction, evicted", [("lru", "b"), ("lfu", "a")])
+def test_disk_eviction_policy(tmp_path, eviction, evicted):
+    # 메모리 캐시 없이 디스크만 사용
+    cache = TranslationCache(path=str(tmp_path / "cache.sqlite3"), memory_entries=0, disk_entries=3, eviction=eviction)
+
+    async def run():
+        for key in "abc":
+            await cache.put(key, [key])
+        # a는 가장 최근에 썼지만 사용 횟수가 가장 적음
+        for key in "bbcca":
+            await cache.get(key)
+            time.sleep(0.002)
+        await cache.put("d", ["d"])
+        return {key: await cache.get(key) for key in "abcd"}
+
+    found = asyncio.run(run())
+    assert [key for key, tokens in found.items() if tokens is None] == [evicted]
+    assert cache.get_stats()["disk_evictions"] == 1
+    cache.close()
+
+
+def test_expired_entries_are_dropped_from_both_tiers(tmp_path):
+    cache = TranslationCache(path=str(tmp_path / "cache.sqlite3"), ttl=0.05)
+    asyncio.run(cache.put("k", ["x"]))
+    time.sleep(0.1)
+
+    assert asyncio.run(cache.get("k")) is None
+    assert cache.get_stats()["expired"] == 1
+    assert cache.get_stats()["disk_entries"] == 0
+    assert "k" not in cache._memory
+    cache.close()
+
+
+def test_memory_only_cache_without_path():
+    cache = TranslationCache(path="", memory_entries=1)
+    asyncio.run(cache.put("a", ["a"]))
+    asyncio.run(cache.put("b", ["b"]))
+    assert asyncio.run(cache.get("a")) is None
+    assert asyncio.run(cache.get("b")) == ["b"]
+    assert cache.get_stats()["disk_capacity"] == 0
+
+
+def test_unknown_eviction_policy_is_rejected():
+    with pytest.raises(ValueError):
+        TranslationCache(path="", eviction="fifo")
@@ -0,0 +1,58 @@
+import asyncio
+
+from app.services import websocket_stt_service
+from app.services.websocket_stt_service import PreparedSession, WarmStandby
+
+
+def count_sessions(monkeypatch):
+    opened = []
+
+    class CountingSession(PreparedSession):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    monkeypatch.setattr(websocket_stt_service, "PreparedSession", CountingSession)
+    return opened
+
+
+def test_standby_stops_replacing_sessions_after_max_idle(fake_stt, monkeypatch):
+    monkeypatch.setattr(websocket_stt_service, "STT_STANDBY_TTL", 0.05)
+    monkeypatch.setattr(websocket_stt_service, "STT_STANDBY_MAX_IDLE_SECONDS", 0.2)
+    opened = count_sessions(monkeypatch)
+
+    async def run():
+        standby = WarmStandby()
+        standby.arm("en-US")
+        await asyncio.sleep(0.4)
+        state = (standby.session, standby._task.done())
+        taken = await standby.take("en-US")
+        await standby.close()
+        return state, taken
+
+    (session, finished), taken = asyncio.run(run())
+    assert finished and session is None and taken is None
+    assert 3 <= len(opened) <= 5
+    assert all(s.stt_task.done() for s in opened)
+
+
+def test_taken_standby_keeps_its_stream(fake_stt, monkeypatch):
+    monkeypatch.setattr(websocket_stt_service, "STT_STANDBY_TTL", 10)
+    opened = count_sessions(monkeypatch)
+
+    async def run():
+        standby = WarmStandby()
+        standby.arm("en-US")
+        await asyncio.sleep(0.01)
+        other_language = await standby.take("ko-KR")
+        standby.arm("en-US")
+        await asyncio.sleep(0.01)
+        session = await standby.take("en-US")
+        state = (session.idle_close.is_set(), session.stt_task.done())
+        await session.cancel()
+        return other_language, session, state
+
+    other_language, session, (idle_close, done) = asyncio.run(run())
+    assert other_language is None
+    assert session is opened[-1] and len(opened) == 2
+    assert idle_close and not done